@@ -8,8 +8,10 @@ from app.api.v1.endpoints import (
     bookings,
     payments,
     reviews,
-    analytics
+    analytics,
+    waiting_room
 )
+from app.services.response_cache import response_cache
 
 api_router = APIRouter()
 
@@ -23,9 +25,16 @@ api_router.include_router(bookings.router, prefix="/bookings", tags=["Bookings"]
 api_router.include_router(payments.router, prefix="/payments", tags=["Payments"])
 api_router.include_router(reviews.router, prefix="/reviews", tags=["Reviews"])
 api_router.include_router(analytics.router, prefix="/analytics", tags=["Analytics"])
+api_router.include_router(waiting_room.router, prefix="/waiting-room", tags=["Waiting Room"])
 
 
 @api_router.get("/health")
 async def health_check():
     """Health check endpoint"""
     return {"status": "healthy", "service": "EventBook API"}
+
+
+@api_router.get("/health/cache")
+async def cache_stats():
+    """Response cache hit/miss counters and size"""
+    return response_cache.stats()
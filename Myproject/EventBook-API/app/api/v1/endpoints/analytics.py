@@ -1,8 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select
 from typing import List
-from app.db.database import get_db
+from app.db.database import get_async_db
 from app.schemas.schemas import OrganizerStats, EventStats
 from app.models.models import (
     Event as EventModel,
@@ -10,67 +10,33 @@ from app.models.models import (
     Payment as PaymentModel,
     Seat as SeatModel,
     User,
-    BookingStatus,
     PaymentStatus
 )
 from app.core.security import get_current_organizer
+from app.services.organizer_stats import organizer_stats
 
 router = APIRouter()
 
 
 @router.get("/organizer/dashboard", response_model=OrganizerStats)
-def get_organizer_dashboard_stats(
-    db: Session = Depends(get_db),
+async def get_organizer_dashboard_stats(
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_organizer)
 ):
     """Get dashboard statistics for organizer"""
-    # Get all events by organizer
-    events = db.query(EventModel).filter(EventModel.organizer_id == current_user.id).all()
-    event_ids = [event.id for event in events]
-    
-    # Total events
-    total_events = len(events)
-    
-    # Active events
-    active_events = len([e for e in events if e.is_active])
-    
-    # Total bookings
-    total_bookings = db.query(BookingModel).filter(
-        BookingModel.event_id.in_(event_ids)
-    ).count()
-    
-    # Total revenue from completed payments
-    total_revenue = db.query(func.sum(PaymentModel.amount)).join(
-        BookingModel
-    ).filter(
-        BookingModel.event_id.in_(event_ids),
-        PaymentModel.status == PaymentStatus.completed
-    ).scalar() or 0.0
-    
-    # Total attendees (confirmed + attended bookings)
-    total_attendees = db.query(BookingModel).filter(
-        BookingModel.event_id.in_(event_ids),
-        BookingModel.status.in_([BookingStatus.confirmed, BookingStatus.attended])
-    ).count()
-    
-    return {
-        "total_events": total_events,
-        "active_events": active_events,
-        "total_bookings": total_bookings,
-        "total_revenue": float(total_revenue),
-        "total_attendees": total_attendees
-    }
+    # Kept current by the write paths; see app/services/organizer_stats.py
+    return await organizer_stats(db, current_user.id)
 
 
 @router.get("/event/{event_id}/stats", response_model=EventStats)
-def get_event_stats(
+async def get_event_stats(
     event_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_organizer)
 ):
     """Get detailed statistics for a specific event"""
     # Verify event exists and belongs to organizer
-    event = db.query(EventModel).filter(EventModel.id == event_id).first()
+    event = await db.get(EventModel, event_id)
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
     
@@ -81,38 +47,46 @@ def get_event_stats(
     total_seats = event.total_seats
     
     # Booked seats
-    booked_seats = db.query(SeatModel).filter(
-        SeatModel.event_id == event_id,
-        SeatModel.is_available == False
-    ).count()
+    booked_seats = await db.scalar(
+        select(func.count(SeatModel.id)).where(
+            SeatModel.event_id == event_id,
+            SeatModel.is_available == False
+        )
+    )
     
     # Available seats
     available_seats = event.available_seats
     
     # Total revenue
-    total_revenue = db.query(func.sum(PaymentModel.amount)).join(
-        BookingModel
-    ).filter(
-        BookingModel.event_id == event_id,
-        PaymentModel.status == PaymentStatus.completed
-    ).scalar() or 0.0
+    total_revenue = await db.scalar(
+        select(func.sum(PaymentModel.amount)).join(
+            BookingModel
+        ).where(
+            BookingModel.event_id == event_id,
+            PaymentModel.status == PaymentStatus.completed
+        )
+    ) or 0.0
     
     # Bookings by tier
     bookings_by_tier = {}
-    tiers = db.query(SeatModel.tier, func.count(SeatModel.id)).join(
-        BookingModel
-    ).filter(
-        SeatModel.event_id == event_id,
-        SeatModel.is_available == False
-    ).group_by(SeatModel.tier).all()
+    tiers = await db.execute(
+        select(SeatModel.tier, func.count(SeatModel.id)).join(
+            BookingModel
+        ).where(
+            SeatModel.event_id == event_id,
+            SeatModel.is_available == False
+        ).group_by(SeatModel.tier)
+    )
     
     for tier, count in tiers:
         bookings_by_tier[tier.value] = count
     
     # Recent bookings (last 10)
-    recent_bookings = db.query(BookingModel).filter(
-        BookingModel.event_id == event_id
-    ).order_by(BookingModel.created_at.desc()).limit(10).all()
+    recent_bookings = (await db.scalars(
+        select(BookingModel).where(
+            BookingModel.event_id == event_id
+        ).order_by(BookingModel.created_at.desc()).limit(10)
+    )).all()
     
     return {
         "event_id": event_id,
@@ -126,14 +100,14 @@ def get_event_stats(
 
 
 @router.get("/event/{event_id}/revenue")
-def get_event_revenue(
+async def get_event_revenue(
     event_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_organizer)
 ):
     """Get revenue breakdown for an event"""
     # Verify event exists and belongs to organizer
-    event = db.query(EventModel).filter(EventModel.id == event_id).first()
+    event = await db.get(EventModel, event_id)
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
     
@@ -142,13 +116,15 @@ def get_event_revenue(
     
     # Revenue by tier
     revenue_by_tier = {}
-    tiers_revenue = db.query(
-        SeatModel.tier,
-        func.sum(PaymentModel.amount)
-    ).join(BookingModel).join(PaymentModel).filter(
-        SeatModel.event_id == event_id,
-        PaymentModel.status == PaymentStatus.completed
-    ).group_by(SeatModel.tier).all()
+    tiers_revenue = await db.execute(
+        select(
+            SeatModel.tier,
+            func.sum(PaymentModel.amount)
+        ).select_from(SeatModel).join(BookingModel).join(PaymentModel).where(
+            SeatModel.event_id == event_id,
+            PaymentModel.status == PaymentStatus.completed
+        ).group_by(SeatModel.tier)
+    )
     
     for tier, revenue in tiers_revenue:
         revenue_by_tier[tier.value] = float(revenue or 0)
@@ -157,10 +133,12 @@ def get_event_revenue(
     total_revenue = sum(revenue_by_tier.values())
     
     # Completed payments count
-    completed_payments = db.query(PaymentModel).join(BookingModel).filter(
-        BookingModel.event_id == event_id,
-        PaymentModel.status == PaymentStatus.completed
-    ).count()
+    completed_payments = await db.scalar(
+        select(func.count(PaymentModel.id)).join(BookingModel).where(
+            BookingModel.event_id == event_id,
+            PaymentModel.status == PaymentStatus.completed
+        )
+    )
     
     return {
         "event_id": event_id,
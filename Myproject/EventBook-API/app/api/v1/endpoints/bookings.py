@@ -1,10 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 from datetime import datetime
 import secrets
-from app.db.database import get_db
-from app.schemas.schemas import Booking, BookingCreate, BookingWithDetails, QRCodeVerification, QRCodeResponse
+from app.db.database import get_async_db
+from app.schemas.schemas import (
+    Booking,
+    BookingCreate,
+    BookingCartCreate,
+    BookingGroup,
+    BookingWithDetails,
+    QRCodeVerification,
+    QRCodeResponse,
+    CheckInBatch,
+    CheckInBatchResponse
+)
 from app.models.models import (
     Booking as BookingModel,
     Seat as SeatModel,
@@ -12,9 +24,24 @@ from app.models.models import (
     User,
     BookingStatus
 )
-from app.core.security import get_current_active_user
+from app.core.security import get_current_active_user, get_admission_pass, get_organizer_event, require_admission
+from app.utils.pagination import Pagination
+from app.utils.conditional import Conditional, entity_tag, page_fingerprint, rows_fingerprint
+from app.utils.idempotency import IdempotentRoute
+from app.utils.eager_loading import ResponseLoading, eager_options
+from app.utils.sparse_fields import SparseFields
+from app.services.availability import seat_availability, AVAILABLE, BOOKED
+from app.services.expiry import expiry_engine
+from app.services.reservations import sell_seats, restock_seats
+from app.services.seat_counters import adjust_available_seats
+from app.services.check_in import check_in_scans, CHECKED_IN
+from app.services.exports import export_bookings, FORMATS
+from app.services.tickets import is_signed_code, read_ticket, revoked_bookings, sign_ticket
+
+router = APIRouter(route_class=IdempotentRoute)
 
-router = APIRouter()
+# Relationships serialized by BookingWithDetails, for routes whose response wraps it
+BOOKING_DETAILS = eager_options(BookingModel, BookingWithDetails)
 
 
 def generate_booking_number():
@@ -22,77 +49,179 @@ def generate_booking_number():
     return f"BK{datetime.now().strftime('%Y%m%d')}{secrets.token_hex(4).upper()}"
 
 
-def generate_qr_code():
-    """Generate unique QR code"""
-    return secrets.token_urlsafe(32)
+def generate_qr_code(booking_number: str, event_id: int, seat_id: int):
+    """Generate signed QR code that verifies without a database lookup"""
+    return sign_ticket(booking_number, event_id, seat_id)
 
 
-@router.post("/", response_model=Booking, status_code=status.HTTP_201_CREATED)
-def create_booking(
-    booking: BookingCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
-):
-    """Create a new booking"""
-    # Verify event exists
-    event = db.query(EventModel).filter(EventModel.id == booking.event_id).first()
-    if not event:
+def generate_group_reference():
+    """Generate unique reference for a multi-seat booking"""
+    return f"GR{datetime.now().strftime('%Y%m%d')}{secrets.token_hex(4).upper()}"
+
+
+async def raise_if_not_on_sale(db: AsyncSession, event_id: int):
+    """404 for a missing event, 400 for one deactivated or being deleted"""
+    event = await db.get(EventModel, event_id)
+    if event is None:
         raise HTTPException(status_code=404, detail="Event not found")
-    
-    # Verify seat exists and is available
-    seat = db.query(SeatModel).filter(SeatModel.id == booking.seat_id).first()
+    if not event.is_active:
+        raise HTTPException(status_code=400, detail="Event is not on sale")
+
+
+async def raise_seat_unavailable(db: AsyncSession, event_id: int, seat_id: int):
+    """Explain why a seat claim for event_id matched no row"""
+    await raise_if_not_on_sale(db, event_id)
+
+    seat = await db.scalar(
+        select(SeatModel).where(SeatModel.id == seat_id, SeatModel.event_id == event_id)
+    )
     if not seat:
         raise HTTPException(status_code=404, detail="Seat not found")
-    
     if not seat.is_available:
         raise HTTPException(status_code=400, detail="Seat not available")
-    
-    # Create booking
-    db_booking = BookingModel(
-        user_id=current_user.id,
-        event_id=booking.event_id,
-        seat_id=booking.seat_id,
-        booking_number=generate_booking_number(),
-        qr_code=generate_qr_code(),
-        total_amount=seat.price,
-        status=BookingStatus.pending
-    )
-    
-    # Mark seat as unavailable
-    seat.is_available = False
-    seat.is_reserved = False
-    
+    raise HTTPException(status_code=400, detail="Seat is reserved by another user")
+
+
+async def book_seats(
+    db: AsyncSession,
+    user_id: int,
+    event_id: int,
+    claimed: list,
+    group_reference: Optional[str] = None
+) -> List[BookingModel]:
+    """Insert pending bookings for claimed seats and commit the transaction"""
+    rows = []
+    for seat in claimed:
+        booking_number = generate_booking_number()
+        rows.append({
+            "user_id": user_id,
+            "event_id": event_id,
+            "seat_id": seat.id,
+            "booking_number": booking_number,
+            "qr_code": generate_qr_code(booking_number, event_id, seat.id),
+            "group_reference": group_reference,
+            "total_amount": seat.price,
+            "status": BookingStatus.pending,
+        })
+    bookings = (await db.scalars(insert(BookingModel).returning(BookingModel), rows)).all()
+
     # Update event available seats
-    event.available_seats -= 1
-    
-    db.add(db_booking)
-    db.commit()
-    db.refresh(db_booking)
-    return db_booking
+    await adjust_available_seats(db, event_id, -len(claimed))
+
+    await db.commit()
+    seat_availability.mark(event_id, [seat.id for seat in claimed], BOOKED)
+    for db_booking in bookings:
+        expiry_engine.schedule_booking(db_booking.id, db_booking.created_at)
+    return bookings
+
+
+@router.post("/", response_model=Booking, status_code=status.HTTP_201_CREATED)
+async def create_booking(
+    booking: BookingCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user),
+    admission_pass: Optional[str] = Depends(get_admission_pass)
+):
+    """Create a new booking"""
+    await require_admission(booking.event_id, current_user.id, admission_pass)
+
+    # Claim the seat; fails if it is booked or held by another user
+    claimed = await sell_seats(db, [booking.seat_id], current_user.id, booking.event_id)
+    if not claimed:
+        await db.rollback()
+        await raise_seat_unavailable(db, booking.event_id, booking.seat_id)
+
+    bookings = await book_seats(db, current_user.id, booking.event_id, claimed)
+    return bookings[0]
+
+
+@router.post("/cart", response_model=BookingGroup, status_code=status.HTTP_201_CREATED)
+async def create_group_booking(
+    cart: BookingCartCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user),
+    admission_pass: Optional[str] = Depends(get_admission_pass)
+):
+    """Book several seats of one event together: all or none"""
+    await require_admission(cart.event_id, current_user.id, admission_pass)
+
+    seat_ids = set(cart.seat_ids)
+    claimed = await sell_seats(db, seat_ids, current_user.id, cart.event_id)
+    if len(claimed) != len(seat_ids):
+        await db.rollback()
+        await raise_if_not_on_sale(db, cart.event_id)
+        unavailable = sorted(seat_ids - {seat.id for seat in claimed})
+        raise HTTPException(status_code=400, detail=f"Seats not available: {unavailable}")
+
+    group_reference = generate_group_reference()
+    bookings = await book_seats(db, current_user.id, cart.event_id, claimed, group_reference)
+    return {
+        "group_reference": group_reference,
+        "event_id": cart.event_id,
+        "total_amount": sum(booking.total_amount for booking in bookings),
+        "bookings": bookings,
+    }
+
+
+async def booking_not_modified(
+    db: AsyncSession,
+    conditional: Conditional,
+    current_user: User,
+    criterion
+) -> Optional[Response]:
+    """304 when the caller may see the booking and their copy is current; None to load it"""
+    current = (await db.execute(
+        select(BookingModel.id, BookingModel.user_id, BookingModel.updated_at).where(criterion)
+    )).one_or_none()
+    # Missing and forbidden bookings take the full path, which raises
+    if current is None or (current.user_id != current_user.id and current_user.role != "organizer"):
+        return None
+    if conditional.validators(entity_tag(current.id, current.updated_at), current.updated_at):
+        return conditional.not_modified()
+    return None
 
 
 @router.get("/", response_model=List[Booking])
-def list_user_bookings(
+async def list_user_bookings(
     skip: int = 0,
     limit: int = 50,
-    db: Session = Depends(get_db),
+    page: Pagination = Depends(),
+    conditional: Conditional = Depends(),
+    fields: SparseFields = Depends(),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Get all bookings for current user"""
-    bookings = db.query(BookingModel).filter(
-        BookingModel.user_id == current_user.id
-    ).order_by(BookingModel.created_at.desc()).offset(skip).limit(limit).all()
-    return bookings
+    query = (
+        select(BookingModel)
+        .options(*fields.options(BookingModel, "created_at", "updated_at"))
+        .where(BookingModel.user_id == current_user.id)
+    )
+    query = page.apply(query, BookingModel.created_at, BookingModel.id, limit=limit, skip=skip)
+    if conditional.requested:
+        fingerprint = (await db.execute(page_fingerprint(query))).one()
+        if conditional.validators(entity_tag(*fingerprint)):
+            return conditional.not_modified()
+    bookings = (await db.scalars(query)).all()
+    conditional.validators(entity_tag(*rows_fingerprint(bookings)))
+    return fields.render(page.page(bookings))
 
 
 @router.get("/{booking_id}", response_model=BookingWithDetails)
-def get_booking(
+async def get_booking(
     booking_id: int,
-    db: Session = Depends(get_db),
+    loading: ResponseLoading = Depends(),
+    conditional: Conditional = Depends(),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Get booking by ID"""
-    booking = db.query(BookingModel).filter(BookingModel.id == booking_id).first()
+    if conditional.requested:
+        not_modified = await booking_not_modified(db, conditional, current_user, BookingModel.id == booking_id)
+        if not_modified is not None:
+            return not_modified
+
+    booking = await db.get(BookingModel, booking_id, options=loading.options(BookingModel))
     if not booking:
         raise HTTPException(status_code=404, detail="Booking not found")
     
@@ -100,17 +229,29 @@ def get_booking(
     if booking.user_id != current_user.id and current_user.role != "organizer":
         raise HTTPException(status_code=403, detail="Not authorized")
     
+    conditional.validators(entity_tag(booking.id, booking.updated_at), booking.updated_at)
     return booking
 
 
 @router.get("/number/{booking_number}", response_model=BookingWithDetails)
-def get_booking_by_number(
+async def get_booking_by_number(
     booking_number: str,
-    db: Session = Depends(get_db),
+    loading: ResponseLoading = Depends(),
+    conditional: Conditional = Depends(),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Get booking by booking number"""
-    booking = db.query(BookingModel).filter(BookingModel.booking_number == booking_number).first()
+    if conditional.requested:
+        not_modified = await booking_not_modified(
+            db, conditional, current_user, BookingModel.booking_number == booking_number
+        )
+        if not_modified is not None:
+            return not_modified
+
+    booking = await db.scalar(
+        select(BookingModel).options(*loading.options(BookingModel)).where(BookingModel.booking_number == booking_number)
+    )
     if not booking:
         raise HTTPException(status_code=404, detail="Booking not found")
     
@@ -118,13 +259,14 @@ def get_booking_by_number(
     if booking.user_id != current_user.id and current_user.role != "organizer":
         raise HTTPException(status_code=403, detail="Not authorized")
     
+    conditional.validators(entity_tag(booking.id, booking.updated_at), booking.updated_at)
     return booking
 
 
 @router.post("/verify-qr", response_model=QRCodeResponse)
-def verify_qr_code(
+async def verify_qr_code(
     qr_data: QRCodeVerification,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Verify QR code and check-in attendee"""
@@ -132,10 +274,49 @@ def verify_qr_code(
     if current_user.role != "organizer":
         raise HTTPException(status_code=403, detail="Only organizers can verify QR codes")
     
-    booking = db.query(BookingModel).filter(BookingModel.qr_code == qr_data.qr_code).first()
+    if is_signed_code(qr_data.qr_code):
+        # Forgeries, other events' tickets and cancellations are rejected without the database
+        ticket = read_ticket(qr_data.qr_code)
+        if ticket is None:
+            return QRCodeResponse(valid=False, message="Invalid QR code")
+        if qr_data.event_id is not None and ticket.event_id != qr_data.event_id:
+            return QRCodeResponse(valid=False, message="Ticket is for a different event")
+        if ticket.booking_number in revoked_bookings:
+            return QRCodeResponse(valid=False, message="Booking cancelled")
+
+        booking_id = await db.scalar(
+            update(BookingModel)
+            .where(
+                BookingModel.booking_number == ticket.booking_number,
+                BookingModel.event_id == ticket.event_id,
+                BookingModel.status != BookingStatus.cancelled,
+                BookingModel.checked_in_at == None,
+            )
+            .values(status=BookingStatus.attended, checked_in_at=datetime.utcnow())
+            .returning(BookingModel.id)
+            .execution_options(synchronize_session=False)
+        )
+        if booking_id is not None:
+            await db.commit()
+            booking = await db.get(BookingModel, booking_id, options=BOOKING_DETAILS)
+            return QRCodeResponse(valid=True, booking=booking, message="Check-in successful")
+
+        # Already checked in, or cancelled by another worker: report it below
+        booking = await db.scalar(
+            select(BookingModel).options(*BOOKING_DETAILS).where(
+                BookingModel.booking_number == ticket.booking_number
+            )
+        )
+    else:
+        booking = await db.scalar(
+            select(BookingModel).options(*BOOKING_DETAILS).where(BookingModel.qr_code == qr_data.qr_code)
+        )
     
     if not booking:
         return QRCodeResponse(valid=False, message="Invalid QR code")
+
+    if qr_data.event_id is not None and booking.event_id != qr_data.event_id:
+        return QRCodeResponse(valid=False, message="Ticket is for a different event")
     
     if booking.status == BookingStatus.cancelled:
         return QRCodeResponse(valid=False, booking=booking, message="Booking cancelled")
@@ -150,20 +331,86 @@ def verify_qr_code(
     # Check in the attendee
     booking.status = BookingStatus.attended
     booking.checked_in_at = datetime.utcnow()
-    db.commit()
-    db.refresh(booking)
+    await db.commit()
     
     return QRCodeResponse(valid=True, booking=booking, message="Check-in successful")
 
 
+@router.post("/check-in/batch", response_model=CheckInBatchResponse)
+async def check_in_batch(
+    batch: CheckInBatch,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Apply buffered gate scans in one pass; the earliest scan of a ticket wins"""
+    await get_organizer_event(db, batch.event_id, current_user)
+
+    results = await check_in_scans(db, batch.event_id, batch.scans)
+    await db.commit()
+    return {
+        "event_id": batch.event_id,
+        "checked_in": sum(result["result"] == CHECKED_IN for result in results),
+        "results": results,
+    }
+
+
+@router.get("/event/{event_id}/manifest")
+async def get_event_manifest(
+    event_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Ticket list for scanners to validate offline (organizer only)"""
+    await get_organizer_event(db, event_id, current_user)
+
+    result = await db.execute(
+        select(
+            BookingModel.qr_code,
+            BookingModel.booking_number,
+            SeatModel.row_number,
+            SeatModel.seat_number,
+            BookingModel.status,
+            BookingModel.checked_in_at,
+        )
+        .join(SeatModel, SeatModel.id == BookingModel.seat_id)
+        .where(BookingModel.event_id == event_id)
+        .order_by(BookingModel.id)
+    )
+    return {
+        "event_id": event_id,
+        "generated_at": datetime.utcnow(),
+        "fields": ["qr_code", "booking_number", "row_number", "seat_number", "status", "checked_in_at"],
+        "bookings": [list(row) for row in result],
+    }
+
+
+@router.get("/event/{event_id}/export")
+async def export_event_bookings(
+    event_id: int,
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    gzip: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Stream every booking of an event with seat, attendee and payment status (organizer only)"""
+    await get_organizer_event(db, event_id, current_user)
+
+    filename = f"event-{event_id}-bookings.{format}" + (".gz" if gzip else "")
+    return StreamingResponse(
+        export_bookings(event_id, format, compress=gzip),
+        media_type="application/gzip" if gzip else FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
 @router.put("/{booking_id}/cancel", response_model=Booking)
-def cancel_booking(
+async def cancel_booking(
     booking_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Cancel a booking"""
-    booking = db.query(BookingModel).filter(BookingModel.id == booking_id).first()
+    booking = await db.get(BookingModel, booking_id)
     if not booking:
         raise HTTPException(status_code=404, detail="Booking not found")
     
@@ -177,40 +424,59 @@ def cancel_booking(
     if booking.status == BookingStatus.attended:
         raise HTTPException(status_code=400, detail="Cannot cancel attended booking")
     
-    # Cancel booking
-    booking.status = BookingStatus.cancelled
+    # Cancel only a still-active booking: the expiry engine may have cancelled it and resold its seat
+    cancelled = (await db.execute(
+        update(BookingModel)
+        .where(
+            BookingModel.id == booking_id,
+            BookingModel.status.in_([BookingStatus.pending, BookingStatus.confirmed])
+        )
+        .values(status=BookingStatus.cancelled)
+        .returning(BookingModel.seat_id, BookingModel.event_id, BookingModel.booking_number)
+        .execution_options(synchronize_session=False)
+    )).one_or_none()
+    if cancelled is None:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="Booking is already cancelled or attended")
     
     # Make seat available again
-    seat = db.query(SeatModel).filter(SeatModel.id == booking.seat_id).first()
-    seat.is_available = True
-    
-    # Update event available seats
-    event = db.query(EventModel).filter(EventModel.id == booking.event_id).first()
-    event.available_seats += 1
-    
-    db.commit()
-    db.refresh(booking)
+    restocked = await restock_seats(db, [cancelled.seat_id])
+    if restocked:
+        await adjust_available_seats(db, cancelled.event_id, 1)
+
+    await db.commit()
+    await db.refresh(booking)
+    revoked_bookings.add([cancelled.booking_number])
+    if restocked:
+        seat_availability.mark(cancelled.event_id, [cancelled.seat_id], AVAILABLE)
     return booking
 
 
 @router.get("/event/{event_id}/bookings", response_model=List[BookingWithDetails])
-def get_event_bookings(
+async def get_event_bookings(
     event_id: int,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    page: Pagination = Depends(),
+    fields: SparseFields = Depends(),
+    conditional: Conditional = Depends(),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Get all bookings for an event (organizer only)"""
     # Verify event belongs to organizer
-    event = db.query(EventModel).filter(EventModel.id == event_id).first()
-    if not event:
-        raise HTTPException(status_code=404, detail="Event not found")
-    
-    if event.organizer_id != current_user.id and current_user.role != "admin":
-        raise HTTPException(status_code=403, detail="Not authorized")
-    
-    bookings = db.query(BookingModel).filter(
-        BookingModel.event_id == event_id
-    ).order_by(BookingModel.created_at.desc()).offset(skip).limit(limit).all()
-    return bookings
+    await get_organizer_event(db, event_id, current_user)
+
+    query = (
+        select(BookingModel)
+        .options(*fields.options(BookingModel, "created_at", "updated_at"))
+        .where(BookingModel.event_id == event_id)
+    )
+    query = page.apply(query, BookingModel.created_at, BookingModel.id, limit=limit, skip=skip)
+    if conditional.requested:
+        fingerprint = (await db.execute(page_fingerprint(query))).one()
+        if conditional.validators(entity_tag(*fingerprint)):
+            return conditional.not_modified()
+    bookings = (await db.scalars(query)).all()
+    conditional.validators(entity_tag(*rows_fingerprint(bookings)))
+    return fields.render(page.page(bookings))
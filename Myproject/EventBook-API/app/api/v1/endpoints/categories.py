@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime
@@ -7,8 +8,11 @@ from app.schemas.schemas import Category, CategoryCreate
 from app.models.models import Category as CategoryModel
 from app.core.security import get_current_active_user, get_current_organizer
 from app.models.models import User
+from app.services.response_cache import response_cache
+from app.utils.response_caching import CachedRoute, cached
+from app.utils.conditional import Conditional, entity_tag, page_fingerprint, rows_fingerprint
 
-router = APIRouter()
+router = APIRouter(route_class=CachedRoute)
 
 
 @router.post("/", response_model=Category, status_code=status.HTTP_201_CREATED)
@@ -27,31 +31,51 @@ def create_category(
     db.add(db_category)
     db.commit()
     db.refresh(db_category)
+    response_cache.invalidate("categories")
     return db_category
 
 
 @router.get("/", response_model=List[Category])
-def list_categories(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+@cached("categories")
+def list_categories(
+    skip: int = 0,
+    limit: int = 100,
+    conditional: Conditional = Depends(),
+    db: Session = Depends(get_db)
+):
     """List all categories"""
-    categories = db.query(CategoryModel).offset(skip).limit(limit).all()
+    # Categories are never edited, only created and deleted
+    query = select(CategoryModel).order_by(CategoryModel.id).offset(skip).limit(limit)
+    if conditional.requested:
+        fingerprint = db.execute(page_fingerprint(query, modified="created_at")).one()
+        if conditional.validators(entity_tag(*fingerprint)):
+            return conditional.not_modified()
+    categories = db.scalars(query).all()
+    conditional.validators(entity_tag(*rows_fingerprint(categories, modified="created_at")))
     return categories
 
 
 @router.get("/{category_id}", response_model=Category)
-def get_category(category_id: int, db: Session = Depends(get_db)):
+@cached("categories")
+def get_category(category_id: int, conditional: Conditional = Depends(), db: Session = Depends(get_db)):
     """Get category by ID"""
     category = db.query(CategoryModel).filter(CategoryModel.id == category_id).first()
     if not category:
         raise HTTPException(status_code=404, detail="Category not found")
+    if conditional.validators(entity_tag(category.id, category.created_at), category.created_at):
+        return conditional.not_modified()
     return category
 
 
 @router.get("/slug/{slug}", response_model=Category)
-def get_category_by_slug(slug: str, db: Session = Depends(get_db)):
+@cached("categories")
+def get_category_by_slug(slug: str, conditional: Conditional = Depends(), db: Session = Depends(get_db)):
     """Get category by slug"""
     category = db.query(CategoryModel).filter(CategoryModel.slug == slug).first()
     if not category:
         raise HTTPException(status_code=404, detail="Category not found")
+    if conditional.validators(entity_tag(category.id, category.created_at), category.created_at):
+        return conditional.not_modified()
     return category
 
 
@@ -68,4 +92,5 @@ def delete_category(
     
     db.delete(category)
     db.commit()
+    response_cache.invalidate("categories")
     return None
@@ -1,35 +1,86 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Tuple
 from datetime import datetime
-from app.db.database import get_db
-from app.schemas.schemas import Event, EventCreate, EventUpdate, EventWithDetails
-from app.models.models import Event as EventModel, User
+from app.db.database import get_async_db
+from app.schemas.schemas import Event, EventCreate, EventFacets, EventPurge, EventUpdate, EventWithDetails
+from app.models.models import Event as EventModel, EventPurge as EventPurgeModel, User
 from app.core.security import get_current_active_user, get_current_organizer
+from app.utils.pagination import Pagination
+from app.utils.eager_loading import ResponseLoading
+from app.utils.sparse_fields import SparseFields
+from app.services.seat_counters import reconcile_seat_counts
+from app.services.event_purge import event_purger, purge_blocker, start_purge
+from app.services.event_search import search_events
+from app.services.event_facets import event_facets
+from app.services.geo import event_geohash, nearby_events
+from app.services.response_cache import response_cache
+from app.utils.response_caching import CachedRoute, cached
+from app.utils.conditional import Conditional, entity_tag, page_fingerprint, rows_fingerprint
 
-router = APIRouter()
+router = APIRouter(route_class=CachedRoute)
+
+# available_seats moves without touching updated_at, so it is part of every event validator
+EVENT_SUMS = ("available_seats",)
+# Columns list handlers read from loaded events whatever ?fields= asks for
+EVENT_READS = ("updated_at", *EVENT_SUMS)
+
+
+def parse_near(near: str) -> Tuple[float, float]:
+    """"lat,lon" query value as coordinates"""
+    try:
+        latitude, longitude = (float(part) for part in near.split(","))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="near must be 'latitude,longitude'")
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        raise HTTPException(status_code=400, detail="near is out of range")
+    return latitude, longitude
+
+
+def filter_events(
+    dialect: str,
+    category_id: Optional[int],
+    location: Optional[str],
+    search: Optional[str],
+    start_date: Optional[datetime],
+    is_active: Optional[bool],
+    rank: bool = True,
+) -> Tuple[Select, bool]:
+    """Events matching the listing filters; True when ordered by relevance"""
+    query = select(EventModel)
+    if is_active is not None:
+        query = query.where(EventModel.is_active == is_active)
+    if category_id:
+        query = query.where(EventModel.category_id == category_id)
+    if start_date:
+        query = query.where(EventModel.start_date >= start_date)
+    return search_events(query, dialect, search=search, location=location, rank=rank)
 
 
 @router.post("/", response_model=Event, status_code=status.HTTP_201_CREATED)
-def create_event(
+async def create_event(
     event: EventCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_organizer)
 ):
     """Create a new event (organizer only)"""
     db_event = EventModel(
         **event.dict(),
         organizer_id=current_user.id,
-        available_seats=event.total_seats
+        available_seats_base=event.total_seats,
+        geohash=event_geohash(event.latitude, event.longitude)
     )
     db.add(db_event)
-    db.commit()
-    db.refresh(db_event)
+    await db.commit()
+    await db.refresh(db_event)
+    response_cache.invalidate("events")
     return db_event
 
 
 @router.get("/", response_model=List[Event])
-def list_events(
+@cached("events")
+async def list_events(
     skip: int = 0,
     limit: int = 50,
     category_id: Optional[int] = None,
@@ -37,44 +88,93 @@ def list_events(
     search: Optional[str] = None,
     start_date: Optional[datetime] = None,
     is_active: bool = True,
-    db: Session = Depends(get_db)
+    near: Optional[str] = Query(None, description="latitude,longitude; results nearest first"),
+    radius_km: float = Query(25.0, gt=0, le=500),
+    page: Pagination = Depends(),
+    conditional: Conditional = Depends(),
+    fields: SparseFields = Depends(),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """List events with filtering"""
-    query = db.query(EventModel)
-    
-    if is_active is not None:
-        query = query.filter(EventModel.is_active == is_active)
-    if category_id:
-        query = query.filter(EventModel.category_id == category_id)
-    if location:
-        query = query.filter(EventModel.location.ilike(f"%{location}%"))
-    if search:
-        query = query.filter(EventModel.title.ilike(f"%{search}%"))
-    if start_date:
-        query = query.filter(EventModel.start_date >= start_date)
+    """List events with filtering; with search, ranked by relevance; with near, by distance"""
+    # Distance orders nearby results, so they match on the full text filter, not the capped ranking
+    query, ranked = filter_events(
+        db.get_bind().dialect.name, category_id, location, search, start_date, is_active, rank=not near
+    )
     
-    events = query.order_by(EventModel.start_date).offset(skip).limit(limit).all()
-    return events
+    if near:
+        latitude, longitude = parse_near(near)
+        events = await nearby_events(
+            db, query, latitude, longitude, radius_km, skip=skip, limit=limit,
+            options=fields.options(EventModel, *EVENT_READS)
+        )
+        if conditional.validators(entity_tag(*rows_fingerprint(events, sums=EVENT_SUMS))):
+            return conditional.not_modified()
+        return fields.render(events)
+
+    if ranked:
+        # Relevance is not a stable key to seek on, so ranked results page by offset
+        query = query.offset(skip).limit(limit)
+    else:
+        query = page.apply(query, EventModel.start_date, EventModel.id, limit=limit, skip=skip, descending=False)
+
+    if conditional.requested:
+        fingerprint = (await db.execute(page_fingerprint(query, sums=EVENT_SUMS))).one()
+        if conditional.validators(entity_tag(*fingerprint)):
+            return conditional.not_modified()
+    events = (await db.scalars(query.options(*fields.options(EventModel, "start_date", *EVENT_READS)))).all()
+    conditional.validators(entity_tag(*rows_fingerprint(events, sums=EVENT_SUMS)))
+    return fields.render(events if ranked else page.page(events))
+
+
+@router.get("/facets", response_model=EventFacets)
+@cached("events", "categories")
+async def get_event_facets(
+    category_id: Optional[int] = None,
+    location: Optional[str] = None,
+    search: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    is_active: bool = True,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Event counts per category, location, week and price band under the listing filters"""
+    query, _ = filter_events(
+        db.get_bind().dialect.name, category_id, location, search, start_date, is_active, rank=False
+    )
+    return await event_facets(db, query)
 
 
 @router.get("/{event_id}", response_model=EventWithDetails)
-def get_event(event_id: int, db: Session = Depends(get_db)):
+@cached("event:{event_id}", "categories")
+async def get_event(
+    event_id: int,
+    loading: ResponseLoading = Depends(),
+    conditional: Conditional = Depends(),
+    db: AsyncSession = Depends(get_async_db)
+):
     """Get event by ID with details"""
-    event = db.query(EventModel).filter(EventModel.id == event_id).first()
+    if conditional.requested:
+        current = (await db.execute(
+            select(EventModel.updated_at, EventModel.available_seats).where(EventModel.id == event_id)
+        )).one_or_none()
+        if current is not None and conditional.validators(entity_tag(event_id, *current)):
+            return conditional.not_modified()
+
+    event = await db.get(EventModel, event_id, options=loading.options(EventModel))
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
+    conditional.validators(entity_tag(event.id, event.updated_at, event.available_seats))
     return event
 
 
 @router.put("/{event_id}", response_model=Event)
-def update_event(
+async def update_event(
     event_id: int,
     event_update: EventUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_organizer)
 ):
     """Update event (organizer only - own events)"""
-    event = db.query(EventModel).filter(EventModel.id == event_id).first()
+    event = await db.get(EventModel, event_id)
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
     
@@ -82,22 +182,26 @@ def update_event(
     if event.organizer_id != current_user.id and current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Not authorized to update this event")
     
-    for key, value in event_update.dict(exclude_unset=True).items():
+    changes = event_update.dict(exclude_unset=True)
+    for key, value in changes.items():
         setattr(event, key, value)
+    if "latitude" in changes or "longitude" in changes:
+        event.geohash = event_geohash(event.latitude, event.longitude)
     
-    db.commit()
-    db.refresh(event)
+    await db.commit()
+    await db.refresh(event)
+    response_cache.invalidate("events", f"event:{event_id}")
     return event
 
 
-@router.delete("/{event_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_event(
+@router.delete("/{event_id}", response_model=EventPurge, status_code=status.HTTP_202_ACCEPTED)
+async def delete_event(
     event_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_organizer)
 ):
-    """Delete event (organizer only - own events)"""
-    event = db.query(EventModel).filter(EventModel.id == event_id).first()
+    """Delete event with its seats, bookings and reviews in the background (organizer only - own events)"""
+    event = await db.get(EventModel, event_id)
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
     
@@ -105,20 +209,69 @@ def delete_event(
     if event.organizer_id != current_user.id and current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Not authorized to delete this event")
     
-    db.delete(event)
-    db.commit()
-    return None
+    blocker = await purge_blocker(db, event_id)
+    if blocker is not None:
+        raise HTTPException(status_code=409, detail=blocker)
+    
+    purge = await start_purge(db, event)
+    await db.commit()
+    event_purger.schedule(event_id)
+    response_cache.invalidate("events", f"event:{event_id}")
+    return purge
+
+
+@router.get("/{event_id}/purge", response_model=EventPurge)
+async def get_event_purge(
+    event_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_organizer)
+):
+    """Progress of an event deletion (organizer only - own events)"""
+    purge = await db.get(EventPurgeModel, event_id)
+    if not purge:
+        raise HTTPException(status_code=404, detail="No deletion for this event")
+    if purge.organizer_id != current_user.id and current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Not authorized")
+    return purge
+
+
+@router.post("/{event_id}/seat-counts/reconcile")
+async def reconcile_event_seat_counts(
+    event_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_organizer)
+):
+    """Recompute total and available seats from the seats table (organizer only - own events)"""
+    event = await db.get(EventModel, event_id)
+    if not event:
+        raise HTTPException(status_code=404, detail="Event not found")
+    
+    if event.organizer_id != current_user.id and current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Not authorized")
+    
+    counts = await reconcile_seat_counts(db, event_id)
+    await db.commit()
+    response_cache.invalidate("events", f"event:{event_id}")
+    return counts
 
 
 @router.get("/organizer/my-events", response_model=List[Event])
-def get_organizer_events(
+async def get_organizer_events(
     skip: int = 0,
     limit: int = 50,
-    db: Session = Depends(get_db),
+    page: Pagination = Depends(),
+    conditional: Conditional = Depends(),
+    fields: SparseFields = Depends(),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_organizer)
 ):
     """Get all events created by current organizer"""
-    events = db.query(EventModel).filter(
-        EventModel.organizer_id == current_user.id
-    ).order_by(EventModel.created_at.desc()).offset(skip).limit(limit).all()
-    return events
+    query = select(EventModel).where(EventModel.organizer_id == current_user.id)
+    query = page.apply(query, EventModel.created_at, EventModel.id, limit=limit, skip=skip)
+    if conditional.requested:
+        fingerprint = (await db.execute(page_fingerprint(query, sums=EVENT_SUMS))).one()
+        if conditional.validators(entity_tag(*fingerprint)):
+            return conditional.not_modified()
+    events = (await db.scalars(query.options(*fields.options(EventModel, "created_at", *EVENT_READS)))).all()
+    conditional.validators(entity_tag(*rows_fingerprint(events, sums=EVENT_SUMS)))
+    return fields.render(page.page(events))
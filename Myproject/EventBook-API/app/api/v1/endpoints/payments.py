@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select, update
 from sqlalchemy.orm import Session
 from typing import List
 from datetime import datetime
@@ -12,8 +13,10 @@ from app.models.models import (
     BookingStatus
 )
 from app.core.security import get_current_active_user
+from app.utils.pagination import Pagination
+from app.utils.idempotency import IdempotentRoute
 
-router = APIRouter()
+router = APIRouter(route_class=IdempotentRoute)
 
 
 @router.post("/", response_model=Payment, status_code=status.HTTP_201_CREATED)
@@ -109,15 +112,24 @@ def confirm_payment(
     if booking.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized")
     
+    # Confirm only a still-pending booking: the expiry engine may have cancelled it and restocked its seat
+    confirmed = db.scalar(
+        update(BookingModel)
+        .where(BookingModel.id == booking.id, BookingModel.status == BookingStatus.pending)
+        .values(status=BookingStatus.confirmed)
+        .returning(BookingModel.id)
+        .execution_options(synchronize_session=False)
+    )
+    if confirmed is None:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Booking is cancelled, expired or already paid")
+    
     # Update payment status
     payment.status = PaymentStatus.completed
     payment.stripe_payment_intent_id = payment_intent_id
     payment.payment_method = payment_method
     payment.payment_date = datetime.utcnow()
     
-    # Update booking status
-    booking.status = BookingStatus.confirmed
-    
     db.commit()
     db.refresh(payment)
     return payment
@@ -149,17 +161,14 @@ def fail_payment(
 def get_user_payment_history(
     skip: int = 0,
     limit: int = 50,
+    page: Pagination = Depends(),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Get payment history for current user"""
-    # Get all bookings for user
-    bookings = db.query(BookingModel).filter(BookingModel.user_id == current_user.id).all()
-    booking_ids = [booking.id for booking in bookings]
-    
-    # Get payments for those bookings
-    payments = db.query(PaymentModel).filter(
-        PaymentModel.booking_id.in_(booking_ids)
-    ).order_by(PaymentModel.created_at.desc()).offset(skip).limit(limit).all()
-    
-    return payments
+    # Payments for the user's bookings
+    query = select(PaymentModel).join(BookingModel, BookingModel.id == PaymentModel.booking_id).where(
+        BookingModel.user_id == current_user.id
+    )
+    payments = db.scalars(page.apply(query, PaymentModel.created_at, PaymentModel.id, limit=limit, skip=skip))
+    return page.page(payments)
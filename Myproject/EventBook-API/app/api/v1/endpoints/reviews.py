@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from typing import List
 from app.db.database import get_db
@@ -11,8 +12,13 @@ from app.models.models import (
     BookingStatus
 )
 from app.core.security import get_current_active_user
+from app.utils.pagination import Pagination
+from app.utils.eager_loading import ResponseLoading
+from app.utils.conditional import Conditional, entity_tag, page_fingerprint, rows_fingerprint
+from app.services.response_cache import response_cache
+from app.utils.response_caching import CachedRoute, cached
 
-router = APIRouter()
+router = APIRouter(route_class=CachedRoute)
 
 
 @router.post("/", response_model=Review, status_code=status.HTTP_201_CREATED)
@@ -58,29 +64,48 @@ def create_review(
     db.add(db_review)
     db.commit()
     db.refresh(db_review)
+    response_cache.invalidate(f"event-reviews:{db_review.event_id}")
     return db_review
 
 
 @router.get("/event/{event_id}", response_model=List[ReviewWithUser])
+@cached("event-reviews:{event_id}")
 def get_event_reviews(
     event_id: int,
     skip: int = 0,
     limit: int = 50,
+    page: Pagination = Depends(),
+    loading: ResponseLoading = Depends(),
+    conditional: Conditional = Depends(),
     db: Session = Depends(get_db)
 ):
     """Get all reviews for an event"""
-    reviews = db.query(ReviewModel).filter(
-        ReviewModel.event_id == event_id
-    ).order_by(ReviewModel.created_at.desc()).offset(skip).limit(limit).all()
-    return reviews
+    query = select(ReviewModel).options(*loading.options(ReviewModel)).where(ReviewModel.event_id == event_id)
+    query = page.apply(query, ReviewModel.created_at, ReviewModel.id, limit=limit, skip=skip)
+    if conditional.requested and conditional.validators(entity_tag(*db.execute(page_fingerprint(query)).one())):
+        return conditional.not_modified()
+    reviews = db.scalars(query).all()
+    conditional.validators(entity_tag(*rows_fingerprint(reviews)))
+    return page.page(reviews)
 
 
 @router.get("/{review_id}", response_model=ReviewWithUser)
-def get_review(review_id: int, db: Session = Depends(get_db)):
+def get_review(
+    review_id: int,
+    loading: ResponseLoading = Depends(),
+    conditional: Conditional = Depends(),
+    db: Session = Depends(get_db)
+):
     """Get review by ID"""
-    review = db.query(ReviewModel).filter(ReviewModel.id == review_id).first()
+    if conditional.requested:
+        updated_at = db.scalar(select(ReviewModel.updated_at).where(ReviewModel.id == review_id))
+        if updated_at is not None and conditional.validators(entity_tag(review_id, updated_at), updated_at):
+            return conditional.not_modified()
+
+    review = db.get(ReviewModel, review_id, options=loading.options(ReviewModel))
     if not review:
         raise HTTPException(status_code=404, detail="Review not found")
+    conditional.validators(entity_tag(review.id, review.updated_at), review.updated_at)
     return review
 
 
@@ -107,6 +132,7 @@ def update_review(
     
     db.commit()
     db.refresh(review)
+    response_cache.invalidate(f"event-reviews:{review.event_id}")
     return review
 
 
@@ -127,6 +153,7 @@ def delete_review(
     
     db.delete(review)
     db.commit()
+    response_cache.invalidate(f"event-reviews:{review.event_id}")
     return None
 
 
@@ -134,11 +161,16 @@ def delete_review(
 def get_user_reviews(
     skip: int = 0,
     limit: int = 50,
+    page: Pagination = Depends(),
+    conditional: Conditional = Depends(),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Get all reviews by current user"""
-    reviews = db.query(ReviewModel).filter(
-        ReviewModel.user_id == current_user.id
-    ).order_by(ReviewModel.created_at.desc()).offset(skip).limit(limit).all()
-    return reviews
+    query = select(ReviewModel).where(ReviewModel.user_id == current_user.id)
+    query = page.apply(query, ReviewModel.created_at, ReviewModel.id, limit=limit, skip=skip)
+    if conditional.requested and conditional.validators(entity_tag(*db.execute(page_fingerprint(query)).one())):
+        return conditional.not_modified()
+    reviews = db.scalars(query).all()
+    conditional.validators(entity_tag(*rows_fingerprint(reviews)))
+    return page.page(reviews)
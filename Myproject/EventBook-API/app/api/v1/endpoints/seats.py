@@ -1,24 +1,46 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-from datetime import datetime, timedelta
-from app.db.database import get_db
-from app.schemas.schemas import Seat, SeatCreate, SeatBulkCreate
-from app.models.models import Seat as SeatModel, Event as EventModel, User
-from app.core.security import get_current_organizer
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+import asyncio
+import json
+from app.db.database import get_async_db, AsyncSessionLocal
+from app.schemas.schemas import (
+    Seat,
+    SeatCreate,
+    SeatBulkCreate,
+    SeatLayoutCreate,
+    BestAvailableRequest,
+    BestAvailableResponse
+)
+from app.models.models import Seat as SeatModel, Event as EventModel, User, SeatTier
+from app.core.security import get_current_active_user, get_current_organizer, get_admission_pass, require_admission
+from app.services.reservations import hold_seats, release_seats
+from app.services.availability import seat_availability, AVAILABLE, RESERVED, STATE_MASK, STATE_NAMES
+from app.services.seat_events import seat_hub, RESYNC
+from app.services.expiry import expiry_engine
+from app.services.seat_inventory import add_seat_counts, expand_layout, insert_seats, layout_size
+from app.services.response_cache import response_cache
+from app.utils.response_caching import CachedRoute, cached
+from app.utils.sparse_fields import SparseFields
+from app.core.config import settings
 
-router = APIRouter()
+router = APIRouter(route_class=CachedRoute)
+
+# Media type of the columnar seat map
+COMPACT_SEAT_MAP = "application/vnd.eventbook.seatmap+json"
 
 
 @router.post("/", response_model=Seat, status_code=status.HTTP_201_CREATED)
-def create_seat(
+async def create_seat(
     seat: SeatCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_organizer)
 ):
     """Create a single seat"""
     # Verify event exists and belongs to organizer
-    event = db.query(EventModel).filter(EventModel.id == seat.event_id).first()
+    event = await db.get(EventModel, seat.event_id)
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
     if event.organizer_id != current_user.id:
@@ -26,132 +48,278 @@ def create_seat(
     
     db_seat = SeatModel(**seat.dict())
     db.add(db_seat)
+    # Sessions do not autoflush; the counters update reads the new seat's price
+    await db.flush()
     
     # Update total seats count
-    event.total_seats += 1
-    event.available_seats += 1
-    
-    db.commit()
-    db.refresh(db_seat)
+    await add_seat_counts(db, seat.event_id, 1)
+
+    await db.commit()
+    await db.refresh(db_seat)
+    seat_availability.invalidate(seat.event_id)
+    response_cache.invalidate("events", f"event:{seat.event_id}")
     return db_seat
 
 
 @router.post("/bulk", status_code=status.HTTP_201_CREATED)
-def create_seats_bulk(
+async def create_seats_bulk(
     bulk_data: SeatBulkCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_organizer)
 ):
     """Create multiple seats at once"""
     # Verify event exists and belongs to organizer
-    event = db.query(EventModel).filter(EventModel.id == bulk_data.event_id).first()
+    event = await db.get(EventModel, bulk_data.event_id)
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
     if event.organizer_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    seats_created = 0
-    for seat_data in bulk_data.seats:
-        db_seat = SeatModel(
-            event_id=bulk_data.event_id,
-            **seat_data
-        )
-        db.add(db_seat)
-        seats_created += 1
+    seats_created = await insert_seats(
+        db,
+        ({**seat_data, "event_id": bulk_data.event_id} for seat_data in bulk_data.seats)
+    )
     
     # Update event seat counts
-    event.total_seats += seats_created
-    event.available_seats += seats_created
-    
-    db.commit()
-    return {"message": f"Created {seats_created} seats", "total_seats": event.total_seats}
+    total_seats = await add_seat_counts(db, bulk_data.event_id, seats_created)
+
+    await db.commit()
+    seat_availability.invalidate(bulk_data.event_id)
+    response_cache.invalidate("events", f"event:{bulk_data.event_id}")
+    return {"message": f"Created {seats_created} seats", "total_seats": total_seats}
+
 
+@router.post("/layout", status_code=status.HTTP_201_CREATED)
+async def create_seats_from_layout(
+    layout: SeatLayoutCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_organizer)
+):
+    """Create seats from row/seat ranges (e.g. rows A-ZZ x seats 1-40)"""
+    try:
+        seat_count = layout_size(layout.sections)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if seat_count > settings.SEAT_LAYOUT_MAX_SEATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Layout expands to {seat_count} seats (max {settings.SEAT_LAYOUT_MAX_SEATS})"
+        )
 
-@router.get("/event/{event_id}", response_model=List[Seat])
-def get_event_seats(
+    # Verify event exists and belongs to organizer
+    event = await db.get(EventModel, layout.event_id)
+    if not event:
+        raise HTTPException(status_code=404, detail="Event not found")
+    if event.organizer_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    seats_created = await insert_seats(db, expand_layout(layout.event_id, layout.sections))
+    total_seats = await add_seat_counts(db, layout.event_id, seats_created)
+
+    await db.commit()
+    seat_availability.invalidate(layout.event_id)
+    response_cache.invalidate("events", f"event:{layout.event_id}")
+    return {"message": f"Created {seats_created} seats", "total_seats": total_seats}
+
+
+@router.get(
+    "/event/{event_id}",
+    response_model=List[Seat],
+    responses={200: {"content": {COMPACT_SEAT_MAP: {}}}}
+)
+async def get_event_seats(
     event_id: int,
-    tier: str = None,
+    request: Request,
+    tier: Optional[SeatTier] = None,
     available_only: bool = False,
-    db: Session = Depends(get_db)
+    format: str = None,
+    fields: SparseFields = Depends(),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get all seats for an event"""
-    query = db.query(SeatModel).filter(SeatModel.event_id == event_id)
-    
-    if tier:
-        query = query.filter(SeatModel.tier == tier)
-    if available_only:
-        query = query.filter(SeatModel.is_available == True)
-    
-    seats = query.order_by(SeatModel.row_number, SeatModel.seat_number).all()
-    return seats
+    """Get all seats for an event (?format=compact for the columnar seat map)"""
+    index = await seat_availability.get(db, event_id)
+    if format == "compact" or COMPACT_SEAT_MAP in request.headers.get("accept", ""):
+        return Response(
+            content=json.dumps(index.compact(tier=tier, available_only=available_only)),
+            media_type=COMPACT_SEAT_MAP
+        )
+    return fields.render(index.seats(tier=tier, available_only=available_only))
+
+
+async def seat_snapshot_event(event_id: int) -> str:
+    """SSE snapshot of every seat's state, from the seat index"""
+    async with AsyncSessionLocal() as db:
+        index = await seat_availability.get(db, event_id)
+    data = json.dumps({
+        "event_id": event_id,
+        "states": STATE_NAMES,
+        "seats": [[seat_id, cell & STATE_MASK] for seat_id, cell in zip(index.ids, index.cells)],
+    })
+    return f"event: snapshot\ndata: {data}\n\n"
+
+
+@router.get("/event/{event_id}/stream")
+async def stream_event_seats(event_id: int):
+    """Server-Sent Events: a seat-state snapshot, then batched deltas"""
+    async def events():
+        subscription = seat_hub.subscribe(event_id)
+        try:
+            yield await seat_snapshot_event(event_id)
+            while True:
+                try:
+                    batch = await asyncio.wait_for(
+                        subscription.queue.get(),
+                        settings.SEAT_STREAM_KEEPALIVE_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+
+                if batch is RESYNC:
+                    yield await seat_snapshot_event(event_id)
+                else:
+                    yield f"event: seats\ndata: {batch}\n\n"
+        finally:
+            seat_hub.unsubscribe(subscription)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post("/event/{event_id}/best-available", response_model=BestAvailableResponse)
+async def reserve_best_available(
+    event_id: int,
+    request: BestAvailableRequest,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user),
+    admission_pass: Optional[str] = Depends(get_admission_pass)
+):
+    """Find and hold the best seats for a group, together in one row when possible"""
+    await require_admission(event_id, current_user.id, admission_pass)
+
+    for _ in range(settings.BEST_AVAILABLE_ATTEMPTS):
+        index = await seat_availability.get(db, event_id)
+        ordinals, contiguous = index.find_best_available(request.quantity, request.tier, request.max_price)
+        if not ordinals:
+            raise HTTPException(status_code=400, detail="Not enough seats available")
+
+        seat_ids = [index.ids[ordinal] for ordinal in ordinals]
+        claimed, reserved_until = await hold_seats(db, seat_ids, current_user.id, event_id)
+        if len(claimed) == len(seat_ids):
+            await db.commit()
+            seat_availability.mark(event_id, seat_ids, RESERVED, reserved_until)
+            for seat_id in seat_ids:
+                expiry_engine.schedule_hold(seat_id, reserved_until)
+            return {
+                "seats": [index.seat(ordinal) for ordinal in ordinals],
+                "contiguous": contiguous,
+                "reserved_until": reserved_until,
+            }
+
+        # Another worker got there first, or the event went off sale
+        await db.rollback()
+        if not await db.scalar(select(EventModel.is_active).where(EventModel.id == event_id)):
+            raise HTTPException(status_code=400, detail="Event is not on sale")
+        # Rebuild the index and retry
+        seat_availability.invalidate(event_id)
+
+    raise HTTPException(status_code=409, detail="Seats were taken, please retry")
 
 
 @router.get("/{seat_id}", response_model=Seat)
-def get_seat(seat_id: int, db: Session = Depends(get_db)):
+@cached("seat:{seat_id}")
+async def get_seat(seat_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get seat by ID"""
-    seat = db.query(SeatModel).filter(SeatModel.id == seat_id).first()
+    seat = await db.get(SeatModel, seat_id)
     if not seat:
         raise HTTPException(status_code=404, detail="Seat not found")
     return seat
 
 
 @router.post("/{seat_id}/reserve")
-def reserve_seat(seat_id: int, db: Session = Depends(get_db)):
-    """Reserve a seat for 10 minutes"""
-    seat = db.query(SeatModel).filter(SeatModel.id == seat_id).first()
-    if not seat:
+async def reserve_seat(
+    seat_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user),
+    admission_pass: Optional[str] = Depends(get_admission_pass)
+):
+    """Hold a seat for the current user (SEAT_HOLD_MINUTES)"""
+    # Plain read, then the waiting room: buyers it turns away never take a row lock
+    seat = (await db.execute(
+        select(SeatModel.event_id, EventModel.is_active)
+        .join(EventModel, EventModel.id == SeatModel.event_id)
+        .where(SeatModel.id == seat_id)
+    )).first()
+    if seat is None:
         raise HTTPException(status_code=404, detail="Seat not found")
-    
-    if not seat.is_available:
-        raise HTTPException(status_code=400, detail="Seat not available")
-    
-    if seat.is_reserved and seat.reserved_until > datetime.utcnow():
+    if not seat.is_active:
+        raise HTTPException(status_code=400, detail="Event is not on sale")
+    event_id = seat.event_id
+    await require_admission(event_id, current_user.id, admission_pass)
+
+    claimed, reserved_until = await hold_seats(db, [seat_id], current_user.id, event_id)
+    if not claimed:
+        await db.rollback()
+        is_available = await db.scalar(select(SeatModel.is_available).where(SeatModel.id == seat_id))
+        if is_available is None:
+            raise HTTPException(status_code=404, detail="Seat not found")
+        if not is_available:
+            raise HTTPException(status_code=400, detail="Seat not available")
         raise HTTPException(status_code=400, detail="Seat already reserved")
     
-    # Reserve for 10 minutes
-    seat.is_reserved = True
-    seat.reserved_until = datetime.utcnow() + timedelta(minutes=10)
-    
-    db.commit()
-    db.refresh(seat)
-    return {"message": "Seat reserved", "reserved_until": seat.reserved_until}
+    await db.commit()
+    seat_availability.mark(event_id, [seat_id], RESERVED, reserved_until)
+    expiry_engine.schedule_hold(seat_id, reserved_until)
+    return {"message": "Seat reserved", "reserved_until": reserved_until}
 
 
 @router.post("/{seat_id}/release")
-def release_seat(seat_id: int, db: Session = Depends(get_db)):
-    """Release a reserved seat"""
-    seat = db.query(SeatModel).filter(SeatModel.id == seat_id).first()
-    if not seat:
-        raise HTTPException(status_code=404, detail="Seat not found")
-    
-    seat.is_reserved = False
-    seat.reserved_until = None
-    
-    db.commit()
+async def release_seat(
+    seat_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Release a seat held by the current user"""
+    released = await release_seats(db, [seat_id], current_user.id)
+    if not released:
+        await db.rollback()
+        seat_exists = await db.scalar(select(SeatModel.id).where(SeatModel.id == seat_id))
+        if seat_exists is None:
+            raise HTTPException(status_code=404, detail="Seat not found")
+        raise HTTPException(status_code=400, detail="Seat is not reserved by you")
+
+    await db.commit()
+    seat_availability.mark(released[0].event_id, [seat_id], AVAILABLE)
     return {"message": "Seat released"}
 
 
 @router.delete("/{seat_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_seat(
+async def delete_seat(
     seat_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_organizer)
 ):
     """Delete a seat"""
-    seat = db.query(SeatModel).filter(SeatModel.id == seat_id).first()
+    seat = await db.get(SeatModel, seat_id)
     if not seat:
         raise HTTPException(status_code=404, detail="Seat not found")
     
     # Verify event belongs to organizer
-    event = db.query(EventModel).filter(EventModel.id == seat.event_id).first()
+    event = await db.get(EventModel, seat.event_id)
     if event.organizer_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    # Update event seat counts
-    event.total_seats -= 1
-    if seat.is_available:
-        event.available_seats -= 1
-    
-    db.delete(seat)
-    db.commit()
+    # Delete, then update event seat counts by what was actually removed
+    was_available = await db.scalar(
+        delete(SeatModel).where(SeatModel.id == seat_id).returning(SeatModel.is_available)
+    )
+    if was_available is not None:
+        await add_seat_counts(db, event.id, -1, -1 if was_available else 0)
+
+    await db.commit()
+    seat_availability.invalidate(event.id)
+    response_cache.invalidate("events", f"event:{event.id}", f"seat:{seat_id}")
     return None
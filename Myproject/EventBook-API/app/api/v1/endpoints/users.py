@@ -1,10 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from app.db.database import get_db
+from app.db.database import get_async_db
 from app.schemas.schemas import User
-from app.models.models import User as UserModel
+from app.models.models import Event as EventModel, Review as ReviewModel, User as UserModel
 from app.core.security import get_current_active_user
+from app.services.response_cache import response_cache
+from app.utils.pagination import Pagination
 
 router = APIRouter()
 
@@ -20,7 +23,7 @@ async def update_user_profile(
     full_name: str = None,
     phone: str = None,
     current_user: UserModel = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update current user profile"""
     if full_name:
@@ -28,19 +31,28 @@ async def update_user_profile(
     if phone:
         current_user.phone = phone
     
-    db.commit()
-    db.refresh(current_user)
+    await db.commit()
+    await db.refresh(current_user)
+    # Cached event details embed their organizer, and review lists their reviewers
+    events = await db.scalars(select(EventModel.id).where(EventModel.organizer_id == current_user.id))
+    reviewed = await db.scalars(
+        select(ReviewModel.event_id).where(ReviewModel.user_id == current_user.id).distinct()
+    )
+    response_cache.invalidate(
+        *(f"event:{event_id}" for event_id in events),
+        *(f"event-reviews:{event_id}" for event_id in reviewed),
+    )
     return current_user
 
 
 @router.get("/{user_id}", response_model=User)
 async def get_user_by_id(
     user_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: UserModel = Depends(get_current_active_user)
 ):
     """Get user by ID"""
-    user = db.query(UserModel).filter(UserModel.id == user_id).first()
+    user = await db.get(UserModel, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return user
@@ -50,12 +62,13 @@ async def get_user_by_id(
 async def list_users(
     skip: int = 0,
     limit: int = 50,
-    db: Session = Depends(get_db),
+    page: Pagination = Depends(),
+    db: AsyncSession = Depends(get_async_db),
     current_user: UserModel = Depends(get_current_active_user)
 ):
     """List all users (admin only)"""
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Not enough permissions")
     
-    users = db.query(UserModel).offset(skip).limit(limit).all()
-    return users
+    users = await db.scalars(page.apply(select(UserModel), UserModel.id, limit=limit, skip=skip, descending=False))
+    return page.page(users)
@@ -0,0 +1,82 @@
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.database import get_async_db
+from app.schemas.schemas import WaitingRoomOpen, WaitingRoomTicket, WaitingRoomStatus
+from app.models.models import User
+from app.core.security import get_current_organizer, get_current_user_id, get_organizer_event
+from app.core.config import settings
+from app.services.admission import admission_store, issue_ticket, read_ticket, issue_pass
+
+router = APIRouter()
+
+
+@router.put("/{event_id}")
+async def open_waiting_room(
+    event_id: int,
+    room: WaitingRoomOpen,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_organizer)
+):
+    """Open (or re-rate) the waiting room of an event (organizer only)"""
+    await get_organizer_event(db, event_id, current_user)
+    await admission_store.open(event_id, room.rate, room.burst)
+    return {"message": "Waiting room open", "rate": room.rate, "burst": room.burst}
+
+
+@router.delete("/{event_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def close_waiting_room(
+    event_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_organizer)
+):
+    """Close the waiting room; bookings no longer need a pass"""
+    await get_organizer_event(db, event_id, current_user)
+    await admission_store.close(event_id)
+    return None
+
+
+@router.post("/{event_id}/join", response_model=WaitingRoomTicket)
+async def join_waiting_room(event_id: int, user_id: int = Depends(get_current_user_id)):
+    """Take a place in line; joining again returns the same place"""
+    ticket = await admission_store.join(event_id, user_id)
+    if ticket is None:
+        raise HTTPException(status_code=404, detail="No waiting room open for this event")
+
+    admitted, _ = await admission_store.admitted_through(event_id) or (0, 0)
+    return {
+        "event_id": event_id,
+        "ticket": issue_ticket(event_id, user_id, ticket),
+        "position": max(ticket - admitted, 0),
+    }
+
+
+@router.get("/{event_id}/status", response_model=WaitingRoomStatus)
+async def get_waiting_room_status(event_id: int, ticket: str, response: Response):
+    """Poll a ticket's place in line; returns an admission pass once admitted"""
+    claims = read_ticket(ticket)
+    if claims is None or claims.get("event") != event_id:
+        raise HTTPException(status_code=401, detail="Invalid or expired ticket")
+
+    state = await admission_store.admitted_through(event_id)
+    if state is None:
+        raise HTTPException(status_code=404, detail="No waiting room open for this event")
+
+    admitted, _ = state
+    position = claims["ticket"] - admitted
+    if position > 0:
+        response.headers["Retry-After"] = str(settings.WAITING_ROOM_POLL_SECONDS)
+        return {
+            "event_id": event_id,
+            "position": position,
+            "admitted": False,
+            "retry_after": settings.WAITING_ROOM_POLL_SECONDS,
+        }
+
+    admission_pass, expires_at = issue_pass(event_id, int(claims["sub"]))
+    return {
+        "event_id": event_id,
+        "position": 0,
+        "admitted": True,
+        "admission_pass": admission_pass,
+        "pass_expires_at": expires_at,
+    }
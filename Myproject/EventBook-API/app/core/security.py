@@ -2,13 +2,14 @@ from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
-from app.db.database import get_db
-from app.models.models import User
+from app.db.database import get_async_db
+from app.models.models import Event, User
+from app.services.admission import admission_store, pass_event
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_PREFIX}/auth/login")
@@ -46,11 +47,8 @@ def create_refresh_token(data: dict) -> str:
     return encoded_jwt
 
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-) -> User:
-    """Get current authenticated user"""
+def decode_user_id(token: str) -> int:
+    """User id of a valid access token"""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -59,15 +57,31 @@ async def get_current_user(
     
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        user_id: int = payload.get("sub")
+        user_id = payload.get("sub")
         if user_id is None:
             raise credentials_exception
-    except JWTError:
+        return int(user_id)
+    except (JWTError, ValueError):
         raise credentials_exception
-    
-    user = db.query(User).filter(User.id == user_id).first()
+
+
+async def get_current_user_id(token: str = Depends(oauth2_scheme)) -> int:
+    """Get current user id from the token alone, without a database lookup"""
+    return decode_user_id(token)
+
+
+async def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db)
+) -> User:
+    """Get current authenticated user"""
+    user = await db.get(User, decode_user_id(token))
     if user is None:
-        raise credentials_exception
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     
     return user
 
@@ -91,3 +105,30 @@ async def get_current_organizer(
             detail="Not enough permissions. Organizer role required."
         )
     return current_user
+
+
+async def get_organizer_event(db: AsyncSession, event_id: int, current_user: User) -> Event:
+    """Event owned by current_user (or any event for admins)"""
+    event = await db.get(Event, event_id)
+    if not event:
+        raise HTTPException(status_code=404, detail="Event not found")
+
+    if event.organizer_id != current_user.id and current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Not authorized")
+    return event
+
+
+async def get_admission_pass(x_admission_pass: Optional[str] = Header(None)) -> Optional[str]:
+    """Waiting room pass sent in the X-Admission-Pass header"""
+    return x_admission_pass
+
+
+async def require_admission(event_id: int, user_id: int, admission_pass: Optional[str]):
+    """Reject buyers without a pass while the event's waiting room is open"""
+    if pass_event(admission_pass, user_id) == event_id:
+        return
+    if await admission_store.is_open(event_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Waiting room is open for this event; join it for an admission pass"
+        )
@@ -1,15 +1,54 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import settings
 
+# Async drivers used for each sync backend
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def get_async_database_url(database_url: str) -> str:
+    """Map a sync database URL onto the matching asyncio driver"""
+    url = make_url(database_url)
+    driver = ASYNC_DRIVERS.get(url.get_backend_name(), url.drivername)
+    return url.set(drivername=driver).render_as_string(hide_password=False)
+
+
+def get_pool_options(database_url: str) -> dict:
+    """Connection pool sizing (SQLite manages its own pool)"""
+    if make_url(database_url).get_backend_name() == "sqlite":
+        return {}
+    return {"pool_size": settings.DB_POOL_SIZE, "max_overflow": settings.DB_MAX_OVERFLOW}
+
+
 # Create database engine
 engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True)
 
+# Create async database engine
+ASYNC_DATABASE_URL = settings.ASYNC_DATABASE_URL or get_async_database_url(settings.DATABASE_URL)
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    pool_pre_ping=True,
+    **get_pool_options(ASYNC_DATABASE_URL)
+)
+
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Create async session factory (objects stay usable after commit)
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
 # Create base class for models
 Base = declarative_base()
 
@@ -21,3 +60,9 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# Dependency to get async database session
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
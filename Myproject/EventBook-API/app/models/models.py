@@ -1,8 +1,10 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Text, ForeignKey, Enum as SQLEnum
-from sqlalchemy.orm import relationship
+from sqlalchemy import DDL, event as sa_event
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Text, LargeBinary, ForeignKey, Index, Enum as SQLEnum, func, select
+from sqlalchemy.orm import column_property, relationship
 from datetime import datetime
 import enum
 
+from app.core.config import settings
 from app.db.database import Base
 
 
@@ -33,6 +35,13 @@ class PaymentStatus(str, enum.Enum):
     refunded = "refunded"
 
 
+class PurgeStatus(str, enum.Enum):
+    pending = "pending"
+    running = "running"
+    done = "done"
+    failed = "failed"
+
+
 class User(Base):
     __tablename__ = "users"
 
@@ -66,6 +75,15 @@ class Category(Base):
     events = relationship("Event", back_populates="category")
 
 
+class EventSeatCounter(Base):
+    """Sharded available_seats deltas, folded into events.available_seats in the background"""
+    __tablename__ = "event_seat_counters"
+
+    event_id = Column(Integer, ForeignKey("events.id", ondelete="CASCADE"), primary_key=True)
+    shard = Column(Integer, primary_key=True)
+    available_delta = Column(Integer, nullable=False, default=0)
+
+
 class Event(Base):
     __tablename__ = "events"
 
@@ -77,28 +95,93 @@ class Event(Base):
     venue = Column(String, nullable=False)
     location = Column(String, nullable=False)
     address = Column(Text)
+    latitude = Column(Float)
+    longitude = Column(Float)
+    geohash = Column(String)  # From latitude/longitude; see app/services/geo.py
     start_date = Column(DateTime, nullable=False)
     end_date = Column(DateTime, nullable=False)
     image_url = Column(String)
     total_seats = Column(Integer, default=0)
-    available_seats = Column(Integer, default=0)
+    available_seats_base = Column("available_seats", Integer, default=0)  # Folded; see EventSeatCounter
+    min_price = Column(Float)  # Cheapest seat, kept by add_seat_counts; drives price-band facets
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    # Folded base plus deltas not yet folded
+    available_seats = column_property(
+        available_seats_base + select(func.coalesce(func.sum(EventSeatCounter.available_delta), 0))
+        .where(EventSeatCounter.event_id == id)
+        .correlate_except(EventSeatCounter)
+        .scalar_subquery()
+    )
+
     # Relationships
     category = relationship("Category", back_populates="events")
     organizer = relationship("User", back_populates="organized_events")
-    seats = relationship("Seat", back_populates="event", cascade="all, delete-orphan")
+    # Seats go with the event in SQL (ON DELETE CASCADE), never loaded to be deleted
+    seats = relationship("Seat", back_populates="event", cascade="all, delete-orphan", passive_deletes=True)
     bookings = relationship("Booking", back_populates="event")
     reviews = relationship("Review", back_populates="event")
 
+    __table_args__ = (
+        # Keyset pagination of listings and organizer dashboards
+        Index("ix_events_active_start_date_id", "is_active", "start_date", "id"),
+        Index("ix_events_organizer_created_at_id", "organizer_id", "created_at", "id"),
+        # Covers the facet counts, so they never read event rows
+        Index("ix_events_facets", "is_active", "category_id", "start_date", "min_price", "location"),
+        # Geohash prefix ranges for proximity search; covers the distance refinement too
+        Index("ix_events_geohash_lat_lon", "geohash", "latitude", "longitude"),
+    )
+
+
+# Full-text search indexes (app/services/event_search.py), created with the events table.
+# PostgreSQL: generated weighted tsvector with a GIN index, trigram index on location.
+EVENT_SEARCH_DDL = {
+    "postgresql": [
+        """ALTER TABLE events ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(venue, '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(location, '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(description, '')), 'C')
+        ) STORED""",
+        "CREATE INDEX ix_events_search_vector ON events USING GIN (search_vector)",
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+        "CREATE INDEX ix_events_location_trgm ON events USING GIN (location gin_trgm_ops)",
+    ],
+    # SQLite: FTS5 external-content table mirrored by triggers
+    "sqlite": [
+        """CREATE VIRTUAL TABLE events_fts USING fts5(
+            title, description, venue, location,
+            content='events', content_rowid='id', tokenize='porter unicode61 remove_diacritics 2'
+        )""",
+        """CREATE TRIGGER events_fts_insert AFTER INSERT ON events BEGIN
+            INSERT INTO events_fts(rowid, title, description, venue, location)
+            VALUES (new.id, new.title, new.description, new.venue, new.location);
+        END""",
+        """CREATE TRIGGER events_fts_delete AFTER DELETE ON events BEGIN
+            INSERT INTO events_fts(events_fts, rowid, title, description, venue, location)
+            VALUES ('delete', old.id, old.title, old.description, old.venue, old.location);
+        END""",
+        # Only searchable columns, so seat-counter folds do not rewrite the index
+        """CREATE TRIGGER events_fts_update AFTER UPDATE OF title, description, venue, location ON events BEGIN
+            INSERT INTO events_fts(events_fts, rowid, title, description, venue, location)
+            VALUES ('delete', old.id, old.title, old.description, old.venue, old.location);
+            INSERT INTO events_fts(rowid, title, description, venue, location)
+            VALUES (new.id, new.title, new.description, new.venue, new.location);
+        END""",
+    ],
+}
+for _dialect, _statements in EVENT_SEARCH_DDL.items():
+    for _statement in _statements:
+        sa_event.listen(Event.__table__, "after_create", DDL(_statement).execute_if(dialect=_dialect))
+
 
 class Seat(Base):
     __tablename__ = "seats"
 
     id = Column(Integer, primary_key=True, index=True)
-    event_id = Column(Integer, ForeignKey("events.id"), nullable=False)
+    event_id = Column(Integer, ForeignKey("events.id", ondelete="CASCADE"), nullable=False)
     seat_number = Column(String, nullable=False)
     row_number = Column(String, nullable=False)
     tier = Column(SQLEnum(SeatTier), nullable=False)
@@ -106,12 +189,18 @@ class Seat(Base):
     is_available = Column(Boolean, default=True)
     is_reserved = Column(Boolean, default=False)
     reserved_until = Column(DateTime)
+    reserved_by = Column(Integer, ForeignKey("users.id"))
     created_at = Column(DateTime, default=datetime.utcnow)
 
     # Relationships
     event = relationship("Event", back_populates="seats")
     booking = relationship("Booking", back_populates="seat", uselist=False)
 
+    __table_args__ = (
+        # An event's seats, and its cheapest seat for events.min_price
+        Index("ix_seats_event_id_price", "event_id", "price"),
+    )
+
 
 class Booking(Base):
     __tablename__ = "bookings"
@@ -121,7 +210,8 @@ class Booking(Base):
     event_id = Column(Integer, ForeignKey("events.id"), nullable=False)
     seat_id = Column(Integer, ForeignKey("seats.id"), nullable=False)
     booking_number = Column(String, unique=True, nullable=False, index=True)
-    qr_code = Column(String)
+    qr_code = Column(String, unique=True, index=True)
+    group_reference = Column(String, index=True)  # Shared by seats booked together
     status = Column(SQLEnum(BookingStatus), default=BookingStatus.pending, nullable=False)
     total_amount = Column(Float, nullable=False)
     booking_date = Column(DateTime, default=datetime.utcnow)
@@ -135,6 +225,14 @@ class Booking(Base):
     seat = relationship("Seat", back_populates="booking")
     payment = relationship("Payment", back_populates="booking", uselist=False)
 
+    __table_args__ = (
+        # Pending bookings by age, for payment-deadline expiry
+        Index("ix_bookings_status_created_at", "status", "created_at"),
+        # Keyset pagination per user and per event
+        Index("ix_bookings_user_created_at_id", "user_id", "created_at", "id"),
+        Index("ix_bookings_event_created_at_id", "event_id", "created_at", "id"),
+    )
+
 
 class Payment(Base):
     __tablename__ = "payments"
@@ -153,6 +251,12 @@ class Payment(Base):
     # Relationships
     booking = relationship("Booking", back_populates="payment")
 
+    __table_args__ = (
+        Index("ix_payments_booking_id", "booking_id"),
+        # Keyset pagination of payment history
+        Index("ix_payments_created_at_id", "created_at", "id"),
+    )
+
 
 class Review(Base):
     __tablename__ = "reviews"
@@ -168,3 +272,142 @@ class Review(Base):
     # Relationships
     user = relationship("User", back_populates="reviews")
     event = relationship("Event", back_populates="reviews")
+
+    __table_args__ = (
+        # Keyset pagination per event and per user
+        Index("ix_reviews_event_created_at_id", "event_id", "created_at", "id"),
+        Index("ix_reviews_user_created_at_id", "user_id", "created_at", "id"),
+    )
+
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+
+    key = Column(String, primary_key=True)  # sha256 of caller, method, path and Idempotency-Key
+    request_hash = Column(String, nullable=False)
+    status_code = Column(Integer)  # NULL while the first request is running
+    response_body = Column(LargeBinary)
+    media_type = Column(String)
+    response_headers = Column(Text)  # JSON [name, value] pairs, replayed with the body
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+
+class EventPurge(Base):
+    """Progress of a batched event deletion; see app/services/event_purge.py"""
+    __tablename__ = "event_purges"
+
+    event_id = Column(Integer, primary_key=True)  # No foreign key: the event row is deleted last
+    organizer_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    status = Column(SQLEnum(PurgeStatus), default=PurgeStatus.pending, nullable=False)
+    stage = Column(String)  # Table being purged
+    total_rows = Column(Integer, default=0, nullable=False)
+    deleted_rows = Column(Integer, default=0, nullable=False)
+    error = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    finished_at = Column(DateTime)
+
+
+class OrganizerStat(Base):
+    """Organizer dashboard totals, kept by triggers; see app/services/organizer_stats.py"""
+    __tablename__ = "organizer_stats"
+
+    organizer_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    shard = Column(Integer, primary_key=True)  # Row id modulo ORGANIZER_STATS_SHARDS
+    total_events = Column(Integer, nullable=False, default=0)
+    active_events = Column(Integer, nullable=False, default=0)
+    total_bookings = Column(Integer, nullable=False, default=0)
+    total_attendees = Column(Integer, nullable=False, default=0)
+    total_revenue = Column(Float, nullable=False, default=0.0)
+
+
+ORGANIZER_STATS_COLUMNS = ("total_events", "active_events", "total_bookings", "total_attendees", "total_revenue")
+
+# What one row of each table adds to its organizer's stats, as
+# (column whose change moves the row to another organizer, organizer of {r},
+# contribution of {r} per ORGANIZER_STATS_COLUMNS)
+ORGANIZER_STATS_SOURCES = {
+    "events": (
+        "organizer_id",
+        "{r}.organizer_id",
+        ("1", "CASE WHEN {r}.is_active THEN 1 ELSE 0 END", "0", "0", "0"),
+    ),
+    "bookings": (
+        "event_id",
+        "(SELECT organizer_id FROM events WHERE id = {r}.event_id)",
+        ("0", "0", "1", "CASE WHEN {r}.status IN ('confirmed', 'attended') THEN 1 ELSE 0 END", "0"),
+    ),
+    "payments": (
+        "booking_id",
+        "(SELECT e.organizer_id FROM bookings b JOIN events e ON e.id = b.event_id WHERE b.id = {r}.booking_id)",
+        ("0", "0", "0", "0", "CASE WHEN {r}.status = 'completed' THEN {r}.amount ELSE 0 END"),
+    ),
+}
+
+
+def _stats_upsert(table: str, row: str, sign: str) -> str:
+    """Add (sign "") or take away (sign "-") row's contribution to its organizer's shard"""
+    _, organizer, contributions = ORGANIZER_STATS_SOURCES[table]
+    columns = ", ".join(ORGANIZER_STATS_COLUMNS)
+    values = ", ".join(f"{sign}({value.format(r=row)})" for value in contributions)
+    updates = ", ".join(f"{name} = organizer_stats.{name} + excluded.{name}" for name in ORGANIZER_STATS_COLUMNS)
+    # %% survives DDL's own %-formatting as the modulo operator
+    return (
+        f"INSERT INTO organizer_stats (organizer_id, shard, {columns}) "
+        f"SELECT organizer_id, {row}.id %% {settings.ORGANIZER_STATS_SHARDS}, {values} "
+        f"FROM (SELECT {organizer.format(r=row)} AS organizer_id) AS source WHERE organizer_id IS NOT NULL "
+        f"ON CONFLICT (organizer_id, shard) DO UPDATE SET {updates}"
+    )
+
+
+def _stats_changed(table: str, distinct: str) -> str:
+    """Trigger condition: an update moved the row's contribution"""
+    link, _, contributions = ORGANIZER_STATS_SOURCES[table]
+    changes = [f"old.{link} {distinct} new.{link}"] + [
+        f"({value.format(r='old')}) <> ({value.format(r='new')})"
+        for value in contributions if "{r}" in value
+    ]
+    return " OR ".join(changes)
+
+
+def _organizer_stats_ddl(table: str) -> dict:
+    return {
+        "postgresql": [
+            f"""CREATE OR REPLACE FUNCTION organizer_stats_{table}() RETURNS trigger AS $$
+            BEGIN
+                IF TG_OP <> 'INSERT' THEN {_stats_upsert(table, "OLD", "-")}; END IF;
+                IF TG_OP <> 'DELETE' THEN {_stats_upsert(table, "NEW", "")}; END IF;
+                RETURN NULL;
+            END
+            $$ LANGUAGE plpgsql""",
+            f"DROP TRIGGER IF EXISTS organizer_stats_{table}_write ON {table}",
+            f"""CREATE TRIGGER organizer_stats_{table}_write AFTER INSERT OR DELETE ON {table}
+            FOR EACH ROW EXECUTE FUNCTION organizer_stats_{table}()""",
+            f"DROP TRIGGER IF EXISTS organizer_stats_{table}_update ON {table}",
+            f"""CREATE TRIGGER organizer_stats_{table}_update AFTER UPDATE ON {table}
+            FOR EACH ROW WHEN ({_stats_changed(table, "IS DISTINCT FROM")}) EXECUTE FUNCTION organizer_stats_{table}()""",
+        ],
+        "sqlite": [
+            f"""CREATE TRIGGER IF NOT EXISTS organizer_stats_{table}_insert AFTER INSERT ON {table} BEGIN
+                {_stats_upsert(table, "new", "")};
+            END""",
+            f"""CREATE TRIGGER IF NOT EXISTS organizer_stats_{table}_delete AFTER DELETE ON {table} BEGIN
+                {_stats_upsert(table, "old", "-")};
+            END""",
+            f"""CREATE TRIGGER IF NOT EXISTS organizer_stats_{table}_update AFTER UPDATE ON {table}
+            WHEN {_stats_changed(table, "IS NOT")} BEGIN
+                {_stats_upsert(table, "old", "-")};
+                {_stats_upsert(table, "new", "")};
+            END""",
+        ],
+    }
+
+
+# Triggers keep organizer_stats in step with every write to events, bookings
+# and payments, ORM or Core, in the writing transaction. Created once all
+# tables exist, and idempotent because that runs on every create_all.
+for _table in ORGANIZER_STATS_SOURCES:
+    for _dialect, _statements in _organizer_stats_ddl(_table).items():
+        for _statement in _statements:
+            sa_event.listen(Base.metadata, "after_create", DDL(_statement).execute_if(dialect=_dialect))
@@ -32,6 +32,13 @@ class PaymentStatus(str, Enum):
     refunded = "refunded"
 
 
+class PurgeStatus(str, Enum):
+    pending = "pending"
+    running = "running"
+    done = "done"
+    failed = "failed"
+
+
 # User Schemas
 class UserBase(BaseModel):
     email: EmailStr
@@ -93,6 +100,8 @@ class EventBase(BaseModel):
     venue: str
     location: str
     address: Optional[str] = None
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
     start_date: datetime
     end_date: datetime
     image_url: Optional[str] = None
@@ -110,6 +119,8 @@ class EventUpdate(BaseModel):
     venue: Optional[str] = None
     location: Optional[str] = None
     address: Optional[str] = None
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
     start_date: Optional[datetime] = None
     end_date: Optional[datetime] = None
     image_url: Optional[str] = None
@@ -120,6 +131,7 @@ class Event(EventBase):
     id: int
     organizer_id: int
     available_seats: int
+    min_price: Optional[float] = None
     is_active: bool
     created_at: datetime
     updated_at: datetime
@@ -133,6 +145,40 @@ class EventWithDetails(Event):
     organizer: Optional[User] = None
 
 
+class EventPurge(BaseModel):
+    event_id: int
+    status: PurgeStatus
+    stage: Optional[str] = None
+    total_rows: int
+    deleted_rows: int
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class FacetCount(BaseModel):
+    value: str
+    count: int
+
+
+class CategoryFacet(BaseModel):
+    category_id: Optional[int] = None
+    name: Optional[str] = None
+    count: int
+
+
+class EventFacets(BaseModel):
+    total: int
+    categories: List[CategoryFacet]
+    locations: List[FacetCount]
+    weeks: List[FacetCount]  # Monday of each week, YYYY-MM-DD
+    price_bands: List[FacetCount]  # By cheapest seat, e.g. "25-50"; events without seats are left out
+
+
 # Seat Schemas
 class SeatBase(BaseModel):
     event_id: int
@@ -151,6 +197,20 @@ class SeatBulkCreate(BaseModel):
     seats: List[dict]  # List of seat configurations
 
 
+class SeatLayoutSection(BaseModel):
+    first_row: str = Field(..., pattern="^[A-Za-z]{1,3}$")
+    last_row: Optional[str] = Field(None, pattern="^[A-Za-z]{1,3}$")  # Defaults to first_row
+    first_seat: int = Field(1, ge=1)
+    last_seat: int = Field(..., ge=1)
+    tier: SeatTier
+    price: float = Field(..., ge=0)
+
+
+class SeatLayoutCreate(BaseModel):
+    event_id: int
+    sections: List[SeatLayoutSection]  # Rows x seat ranges expanded server-side
+
+
 class Seat(SeatBase):
     id: int
     is_available: bool
@@ -162,6 +222,18 @@ class Seat(SeatBase):
         from_attributes = True
 
 
+class BestAvailableRequest(BaseModel):
+    quantity: int = Field(..., ge=1, le=20)
+    tier: Optional[SeatTier] = None
+    max_price: Optional[float] = None
+
+
+class BestAvailableResponse(BaseModel):
+    seats: List[Seat]
+    contiguous: bool  # False when the group had to be split
+    reserved_until: datetime
+
+
 # Booking Schemas
 class BookingBase(BaseModel):
     event_id: int
@@ -172,11 +244,17 @@ class BookingCreate(BookingBase):
     pass
 
 
+class BookingCartCreate(BaseModel):
+    event_id: int
+    seat_ids: List[int] = Field(..., min_length=1, max_length=20)
+
+
 class Booking(BookingBase):
     id: int
     user_id: int
     booking_number: str
     qr_code: Optional[str] = None
+    group_reference: Optional[str] = None
     status: BookingStatus
     total_amount: float
     booking_date: datetime
@@ -194,6 +272,34 @@ class BookingWithDetails(Booking):
     user: Optional[User] = None
 
 
+class BookingGroup(BaseModel):
+    group_reference: str
+    event_id: int
+    total_amount: float
+    bookings: List[Booking]
+
+
+# Waiting Room Schemas
+class WaitingRoomOpen(BaseModel):
+    rate: float = Field(..., gt=0)  # Buyers admitted per second
+    burst: int = Field(50, ge=1)
+
+
+class WaitingRoomTicket(BaseModel):
+    event_id: int
+    ticket: str
+    position: int
+
+
+class WaitingRoomStatus(BaseModel):
+    event_id: int
+    position: int  # 0 once admitted
+    admitted: bool
+    admission_pass: Optional[str] = None
+    pass_expires_at: Optional[datetime] = None
+    retry_after: Optional[int] = None
+
+
 # Payment Schemas
 class PaymentBase(BaseModel):
     booking_id: int
@@ -265,9 +371,35 @@ class EventStats(BaseModel):
 # QR Code Verification
 class QRCodeVerification(BaseModel):
     qr_code: str
+    event_id: Optional[int] = None  # Gate's event; tickets for other events are rejected
 
 
 class QRCodeResponse(BaseModel):
     valid: bool
     booking: Optional[BookingWithDetails] = None
     message: str
+
+
+class CheckInScan(BaseModel):
+    qr_code: str
+    scanned_at: datetime
+    scanner_id: Optional[str] = None
+
+
+class CheckInBatch(BaseModel):
+    event_id: int
+    scans: List[CheckInScan] = Field(..., min_length=1, max_length=5000)
+
+
+class CheckInResult(BaseModel):
+    qr_code: str
+    scanned_at: datetime
+    result: str  # checked_in, already_checked_in, cancelled, wrong_event, invalid
+    booking_number: Optional[str] = None
+    checked_in_at: Optional[datetime] = None
+
+
+class CheckInBatchResponse(BaseModel):
+    event_id: int
+    checked_in: int
+    results: List[CheckInResult]
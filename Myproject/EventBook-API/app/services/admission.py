@@ -0,0 +1,282 @@
+"""Waiting room admission control for high-demand on-sales.
+
+An organizer opens a waiting room for an event with an admission rate and
+burst. Buyers joining it draw consecutive ticket numbers; a token bucket
+refilled at the configured rate advances the admitted-through counter,
+evaluated lazily whenever someone polls. Admitted buyers get a short-lived
+signed pass that the seat and booking routes check before touching the
+database. Tickets and passes are JWTs signed with a key derived from
+SECRET_KEY for admission only, so polling needs nothing but the store and
+neither can pass for an access token.
+
+Queue state lives behind AdmissionStore: MemoryAdmissionStore for a single
+node, KeyValueAdmissionStore for a shared key-value backend. The latter
+only needs get / set / set-if-absent / incr / compare-and-set, which map
+directly onto Redis; LocalKeyValueBackend is the in-process stand-in.
+"""
+import asyncio
+import hashlib
+import hmac
+import json
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+from jose import JWTError, jwt
+
+from app.core.config import settings
+
+TICKET = "waiting_room_ticket"
+PASS = "admission_pass"
+
+
+@dataclass
+class RoomState:
+    """Admission state of one waiting room"""
+    rate: float
+    burst: int
+    tokens: float
+    updated: float
+    issued: int = 0
+    admitted: int = 0
+
+    def refill(self, now: float):
+        """Spend accumulated tokens admitting the next tickets in line"""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        admit = min(int(self.tokens), self.issued - self.admitted)
+        self.admitted += admit
+        self.tokens -= admit
+
+
+class AdmissionStore(ABC):
+    """Where waiting room state lives"""
+
+    @abstractmethod
+    async def open(self, event_id: int, rate: float, burst: int):
+        """Open the waiting room, or change its rate and burst"""
+
+    @abstractmethod
+    async def close(self, event_id: int):
+        """Close the waiting room and drop its tickets"""
+
+    @abstractmethod
+    async def is_open(self, event_id: int) -> bool:
+        """Whether buyers need a pass for event_id"""
+
+    @abstractmethod
+    async def join(self, event_id: int, user_id: int) -> Optional[int]:
+        """Ticket number of user_id, drawing one on first join; None if closed"""
+
+    @abstractmethod
+    async def admitted_through(self, event_id: int) -> Optional[Tuple[int, int]]:
+        """Refill the bucket; returns (admitted, issued) or None if closed"""
+
+
+class MemoryAdmissionStore(AdmissionStore):
+    """Waiting rooms of a single process"""
+
+    def __init__(self):
+        self._rooms: Dict[int, RoomState] = {}
+        self._tickets: Dict[Tuple[int, int], int] = {}
+
+    async def open(self, event_id: int, rate: float, burst: int):
+        room = self._rooms.get(event_id)
+        if room is not None:
+            # Settle tokens earned at the old rate before switching
+            room.refill(time.time())
+            room.rate, room.burst = rate, burst
+        else:
+            self._rooms[event_id] = RoomState(rate, burst, tokens=burst, updated=time.time())
+
+    async def close(self, event_id: int):
+        self._rooms.pop(event_id, None)
+        for key in [key for key in self._tickets if key[0] == event_id]:
+            del self._tickets[key]
+
+    async def is_open(self, event_id: int) -> bool:
+        return event_id in self._rooms
+
+    async def join(self, event_id: int, user_id: int) -> Optional[int]:
+        room = self._rooms.get(event_id)
+        if room is None:
+            return None
+        ticket = self._tickets.get((event_id, user_id))
+        if ticket is None:
+            room.issued += 1
+            ticket = self._tickets[(event_id, user_id)] = room.issued
+        return ticket
+
+    async def admitted_through(self, event_id: int) -> Optional[Tuple[int, int]]:
+        room = self._rooms.get(event_id)
+        if room is None:
+            return None
+        room.refill(time.time())
+        return room.admitted, room.issued
+
+
+class LocalKeyValueBackend:
+    """In-process stand-in for a shared key-value server such as Redis"""
+
+    def __init__(self):
+        self._data: Dict[str, str] = {}
+
+    async def get(self, key: str) -> Optional[str]:
+        return self._data.get(key)
+
+    async def set(self, key: str, value: str):
+        self._data[key] = value
+
+    async def set_if_absent(self, key: str, value: str) -> bool:
+        if key in self._data:
+            return False
+        self._data[key] = value
+        return True
+
+    async def incr(self, key: str) -> int:
+        value = int(self._data.get(key, 0)) + 1
+        self._data[key] = str(value)
+        return value
+
+    async def compare_and_set(self, key: str, expected: Optional[str], value: str) -> bool:
+        if self._data.get(key) != expected:
+            return False
+        self._data[key] = value
+        return True
+
+    async def delete_prefix(self, prefix: str):
+        for key in [key for key in self._data if key.startswith(prefix)]:
+            del self._data[key]
+
+
+class KeyValueAdmissionStore(AdmissionStore):
+    """Waiting rooms shared by every node through a key-value backend"""
+
+    def __init__(self, backend, prefix: str = "waiting_room"):
+        self.backend = backend
+        self.prefix = prefix
+
+    def _key(self, event_id: int, *parts) -> str:
+        return ":".join([self.prefix, str(event_id), *map(str, parts)])
+
+    async def _update_bucket(self, event_id: int, update) -> Optional[dict]:
+        """Apply update to the bucket with optimistic retries"""
+        key = self._key(event_id, "bucket")
+        while True:
+            current = await self.backend.get(key)
+            if current is None:
+                return None
+            bucket = json.loads(current)
+            update(bucket)
+            if await self.backend.compare_and_set(key, current, json.dumps(bucket)):
+                return bucket
+            await asyncio.sleep(0)
+
+    async def open(self, event_id: int, rate: float, burst: int):
+        bucket = {"rate": rate, "burst": burst, "tokens": burst, "updated": time.time(), "admitted": 0}
+        if await self.backend.set_if_absent(self._key(event_id, "bucket"), json.dumps(bucket)):
+            return
+
+        # Settle tokens earned at the old rate before switching
+        issued = await self._issued(event_id)
+
+        def reconfigure(bucket):
+            _refill(bucket, issued, time.time())
+            bucket["rate"], bucket["burst"] = rate, burst
+
+        await self._update_bucket(event_id, reconfigure)
+
+    async def close(self, event_id: int):
+        await self.backend.delete_prefix(self._key(event_id, ""))
+
+    async def is_open(self, event_id: int) -> bool:
+        return await self.backend.get(self._key(event_id, "bucket")) is not None
+
+    async def _issued(self, event_id: int) -> int:
+        return int(await self.backend.get(self._key(event_id, "issued")) or 0)
+
+    async def join(self, event_id: int, user_id: int) -> Optional[int]:
+        if not await self.is_open(event_id):
+            return None
+        user_key = self._key(event_id, "user", user_id)
+        ticket = await self.backend.get(user_key)
+        if ticket is not None:
+            return int(ticket)
+        ticket = await self.backend.incr(self._key(event_id, "issued"))
+        if not await self.backend.set_if_absent(user_key, str(ticket)):
+            # A concurrent join of the same user won; its ticket stands
+            return int(await self.backend.get(user_key))
+        return ticket
+
+    async def admitted_through(self, event_id: int) -> Optional[Tuple[int, int]]:
+        issued = await self._issued(event_id)
+        bucket = await self._update_bucket(event_id, lambda bucket: _refill(bucket, issued, time.time()))
+        if bucket is None:
+            return None
+        return bucket["admitted"], issued
+
+
+def _refill(bucket: dict, issued: int, now: float):
+    """RoomState.refill over a serialized bucket"""
+    room = RoomState(bucket["rate"], bucket["burst"], bucket["tokens"], bucket["updated"], issued, bucket["admitted"])
+    room.refill(now)
+    bucket["tokens"], bucket["updated"], bucket["admitted"] = room.tokens, room.updated, room.admitted
+
+
+def create_store(kind: str) -> AdmissionStore:
+    if kind == "memory":
+        return MemoryAdmissionStore()
+    if kind == "kv":
+        return KeyValueAdmissionStore(LocalKeyValueBackend())
+    raise ValueError(f"Unknown admission store: {kind}")
+
+
+def _signing_key() -> str:
+    """Key for tickets and passes, distinct from the one access tokens are signed with"""
+    return hmac.new(settings.SECRET_KEY.encode(), b"admission", hashlib.sha256).hexdigest()
+
+
+def _sign(claims: dict, expires_delta: timedelta) -> Tuple[str, datetime]:
+    expires_at = datetime.utcnow() + expires_delta
+    token = jwt.encode({**claims, "exp": expires_at}, _signing_key(), algorithm=settings.ALGORITHM)
+    return token, expires_at
+
+
+def _verify(token: str, token_type: str) -> Optional[dict]:
+    try:
+        claims = jwt.decode(token, _signing_key(), algorithms=[settings.ALGORITHM])
+    except JWTError:
+        return None
+    return claims if claims.get("type") == token_type else None
+
+
+def issue_ticket(event_id: int, user_id: int, ticket: int) -> str:
+    token, _ = _sign(
+        {"type": TICKET, "sub": str(user_id), "event": event_id, "ticket": ticket},
+        timedelta(minutes=settings.WAITING_ROOM_TICKET_MINUTES),
+    )
+    return token
+
+
+def read_ticket(token: str) -> Optional[dict]:
+    return _verify(token, TICKET)
+
+
+def issue_pass(event_id: int, user_id: int) -> Tuple[str, datetime]:
+    return _sign(
+        {"type": PASS, "sub": str(user_id), "event": event_id},
+        timedelta(minutes=settings.ADMISSION_PASS_MINUTES),
+    )
+
+
+def pass_event(token: Optional[str], user_id: int) -> Optional[int]:
+    """Event an admission pass is valid for, if it is valid and held by user_id"""
+    claims = _verify(token, PASS) if token else None
+    if claims is None or claims.get("sub") != str(user_id):
+        return None
+    return claims.get("event")
+
+
+admission_store = create_store(settings.ADMISSION_STORE)
@@ -0,0 +1,400 @@
+"""In-memory seat availability index, one per event.
+
+Each event's seats are held in flat arrays ordered by row then seat
+(natural order, so row "AA" follows "Z" and seat "10" follows "9"). A
+seat's position in that order is its ordinal; one byte per ordinal packs
+the tier code and the available/reserved/booked state. Seat-map reads are
+served from here, and the seat and booking routes mark changes after they
+commit. Indexes are per-process and rebuilt from the seats table on a
+miss or after SEAT_INDEX_TTL_SECONDS, which bounds drift between workers.
+Expired indexes are dropped and at most SEAT_INDEX_MAX_EVENTS are kept.
+"""
+import asyncio
+import base64
+import re
+import sys
+import time
+from array import array
+from collections import OrderedDict
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.models import Seat, SeatTier
+from app.services.response_cache import response_cache
+from app.services.seat_events import seat_hub
+
+# Seat states (low two bits of a cell)
+AVAILABLE = 0
+RESERVED = 1
+BOOKED = 2
+STATE_MASK = 0b11
+
+STATE_NAMES = ["available", "reserved", "booked"]
+
+# Tier codes (remaining bits of a cell)
+TIERS = list(SeatTier)
+TIER_CODES = {tier: code for code, tier in enumerate(TIERS)}
+
+
+def free_run_pattern(tier: Optional[SeatTier] = None):
+    """Regex matching runs of available seats, optionally of one tier"""
+    codes = [TIER_CODES[tier]] if tier is not None else range(len(TIERS))
+    cells = b"".join(re.escape(bytes([code << 2 | AVAILABLE])) for code in codes)
+    return re.compile(b"[" + cells + b"]+")
+
+
+def natural_seat_key(row_number: str, seat_number: str):
+    """Sort key placing row AA after Z and seat 10 after 9"""
+    seat_key = (0, int(seat_number), "") if seat_number.isdigit() else (1, 0, seat_number)
+    return (len(row_number), row_number, seat_key)
+
+
+def seat_state(is_available: bool, is_reserved: bool) -> int:
+    if not is_available:
+        return BOOKED
+    return RESERVED if is_reserved else AVAILABLE
+
+
+class EventSeatIndex:
+    """Seat map of one event"""
+
+    def __init__(self, event_id: int, seats: Iterable):
+        self.event_id = event_id
+        self.loaded_at = time.monotonic()
+
+        seats = sorted(seats, key=lambda s: natural_seat_key(s.row_number, s.seat_number))
+        count = len(seats)
+
+        self.ids = array("q", (s.id for s in seats))
+        self.prices = array("d", (s.price for s in seats))
+        self.cells = bytearray(
+            TIER_CODES[s.tier] << 2 | seat_state(s.is_available, s.is_reserved) for s in seats
+        )
+        self.seat_labels = [sys.intern(s.seat_number) for s in seats]
+
+        # Rows are contiguous runs of ordinals
+        self.row_labels: List[str] = []
+        self.row_starts = array("l")
+        for ordinal, seat in enumerate(seats):
+            if not self.row_labels or self.row_labels[-1] != seat.row_number:
+                self.row_labels.append(seat.row_number)
+                self.row_starts.append(ordinal)
+        self.row_starts.append(count)
+
+        # Share one datetime object per distinct creation time
+        created = {}
+        self.created_at = [created.setdefault(s.created_at, s.created_at) for s in seats]
+
+        self.reserved_until: Dict[int, datetime] = {
+            ordinal: s.reserved_until for ordinal, s in enumerate(seats) if s.is_reserved and s.is_available
+        }
+
+        # Sorted ids with their ordinals, for id lookups via bisect
+        by_id = sorted(range(count), key=self.ids.__getitem__)
+        self.sorted_ids = array("q", (self.ids[o] for o in by_id))
+        self.sorted_ordinals = array("l", by_id)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def ordinal(self, seat_id: int) -> Optional[int]:
+        position = bisect_left(self.sorted_ids, seat_id)
+        if position < len(self.sorted_ids) and self.sorted_ids[position] == seat_id:
+            return self.sorted_ordinals[position]
+        return None
+
+    def row_of(self, ordinal: int) -> int:
+        return bisect_right(self.row_starts, ordinal) - 1
+
+    def state(self, ordinal: int) -> int:
+        return self.cells[ordinal] & STATE_MASK
+
+    def tier(self, ordinal: int) -> SeatTier:
+        return TIERS[self.cells[ordinal] >> 2]
+
+    def mark(self, seat_ids: Iterable[int], state: int, reserved_until: Optional[datetime] = None):
+        """Set the state of seats in this event"""
+        for seat_id in seat_ids:
+            ordinal = self.ordinal(seat_id)
+            if ordinal is None:
+                continue
+            self.cells[ordinal] = (self.cells[ordinal] & ~STATE_MASK) | state
+            if state == RESERVED:
+                self.reserved_until[ordinal] = reserved_until
+            else:
+                self.reserved_until.pop(ordinal, None)
+
+    def seat(self, ordinal: int, row_label: Optional[str] = None) -> dict:
+        """Seat ordinal as a dict matching the Seat schema"""
+        cell = self.cells[ordinal]
+        state = cell & STATE_MASK
+        return {
+            "id": self.ids[ordinal],
+            "event_id": self.event_id,
+            "seat_number": self.seat_labels[ordinal],
+            "row_number": row_label or self.row_labels[self.row_of(ordinal)],
+            "tier": TIERS[cell >> 2],
+            "price": self.prices[ordinal],
+            "is_available": state != BOOKED,
+            "is_reserved": state == RESERVED,
+            "reserved_until": self.reserved_until.get(ordinal),
+            "created_at": self.created_at[ordinal],
+        }
+
+    def seats(self, tier: Optional[SeatTier] = None, available_only: bool = False) -> List[dict]:
+        """Seat map in natural order, optionally filtered"""
+        tier_code = TIER_CODES[tier] if tier is not None else None
+        result = []
+        for row, row_label in enumerate(self.row_labels):
+            for ordinal in range(self.row_starts[row], self.row_starts[row + 1]):
+                cell = self.cells[ordinal]
+                if tier_code is not None and cell >> 2 != tier_code:
+                    continue
+                if available_only and cell & STATE_MASK == BOOKED:
+                    continue
+                result.append(self.seat(ordinal, row_label))
+        return result
+
+    def free_runs(self, row: int, pattern, max_price: Optional[float] = None) -> List[Tuple[int, int]]:
+        """(start, end) ordinal ranges of available seats in a row within max_price"""
+        start, end = self.row_starts[row], self.row_starts[row + 1]
+        if max_price is not None and min(self.prices[start:end], default=0) > max_price:
+            return []
+        runs = [match.span() for match in pattern.finditer(self.cells, start, end)]
+        if max_price is None or max(self.prices[start:end], default=0) <= max_price:
+            return runs
+
+        # Mixed prices in this row: split runs around seats over the ceiling
+        affordable = []
+        for run_start, run_end in runs:
+            piece_start = None
+            for ordinal in range(run_start, run_end):
+                if self.prices[ordinal] <= max_price:
+                    if piece_start is None:
+                        piece_start = ordinal
+                elif piece_start is not None:
+                    affordable.append((piece_start, ordinal))
+                    piece_start = None
+            if piece_start is not None:
+                affordable.append((piece_start, run_end))
+        return affordable
+
+    def find_best_available(
+        self,
+        quantity: int,
+        tier: Optional[SeatTier] = None,
+        max_price: Optional[float] = None
+    ) -> Tuple[List[int], bool]:
+        """(ordinals, contiguous): a centred block in the frontmost row that fits, else runs from the front"""
+        pattern = free_run_pattern(tier)
+        rows_runs = []
+        for row in range(len(self.row_labels)):
+            runs = self.free_runs(row, pattern, max_price)
+            rows_runs.append(runs)
+
+            # Centre the block within the widest-enough run nearest the row centre
+            row_centre = (self.row_starts[row] + self.row_starts[row + 1] - 1) / 2
+            best = None
+            for run_start, run_end in runs:
+                if run_end - run_start < quantity:
+                    continue
+                block_start = int(row_centre - (quantity - 1) / 2)
+                block_start = min(max(block_start, run_start), run_end - quantity)
+                distance = abs(block_start + (quantity - 1) / 2 - row_centre)
+                if best is None or distance < best[0]:
+                    best = (distance, block_start)
+            if best is not None:
+                return list(range(best[1], best[1] + quantity)), True
+
+        # No block anywhere: fill from the front, largest runs first in each row
+        chosen = []
+        for runs in rows_runs:
+            for run_start, run_end in sorted(runs, key=lambda run: run[0] - run[1]):
+                take = min(run_end - run_start, quantity - len(chosen))
+                chosen.extend(range(run_start, run_start + take))
+                if len(chosen) == quantity:
+                    return chosen, False
+        return [], False
+
+    def compact(self, tier: Optional[SeatTier] = None, available_only: bool = False) -> dict:
+        """Columnar seat map: label dictionaries, price classes and packed states"""
+        tier_code = TIER_CODES[tier] if tier is not None else None
+        rows, ordinals = [], []
+        for row, row_label in enumerate(self.row_labels):
+            row_ordinals = [
+                ordinal for ordinal in range(self.row_starts[row], self.row_starts[row + 1])
+                if (tier_code is None or self.cells[ordinal] >> 2 == tier_code)
+                and not (available_only and self.cells[ordinal] & STATE_MASK == BOOKED)
+            ]
+            if row_ordinals:
+                rows.append([row_label, len(row_ordinals)])
+                ordinals.extend(row_ordinals)
+
+        seat_labels, price_classes = {}, {}
+        label_index = [seat_labels.setdefault(self.seat_labels[o], len(seat_labels)) for o in ordinals]
+        price_index = [
+            price_classes.setdefault((self.cells[o] >> 2, self.prices[o]), len(price_classes)) for o in ordinals
+        ]
+
+        # Seat ids as [first_id, length] runs of consecutive ids
+        id_runs = []
+        for ordinal in ordinals:
+            seat_id = self.ids[ordinal]
+            if id_runs and id_runs[-1][0] + id_runs[-1][1] == seat_id:
+                id_runs[-1][1] += 1
+            else:
+                id_runs.append([seat_id, 1])
+
+        return {
+            "event_id": self.event_id,
+            "count": len(ordinals),
+            "rows": rows,
+            "seat_labels": list(seat_labels),
+            "seat_label_index": _pack_indexes(label_index),
+            "price_classes": [[TIERS[code].value, price] for code, price in price_classes],
+            "price_class_index": _pack_indexes(price_index),
+            "id_runs": id_runs,
+            "states": STATE_NAMES,
+            "availability": _pack_states(bytes(self.cells[o] & STATE_MASK for o in ordinals)),
+        }
+
+    def memory_bytes(self) -> int:
+        """Approximate heap footprint of this index"""
+        size = sum(sys.getsizeof(a) for a in (
+            self.ids, self.prices, self.cells, self.row_starts, self.sorted_ids, self.sorted_ordinals,
+            self.seat_labels, self.row_labels, self.created_at, self.reserved_until,
+        ))
+        size += sum(sys.getsizeof(label) for label in set(self.seat_labels))
+        size += sum(sys.getsizeof(label) for label in self.row_labels)
+        size += sum(sys.getsizeof(created) for created in {id(c): c for c in self.created_at}.values())
+        return size
+
+
+def _pack_indexes(values: List[int]) -> dict:
+    """Base64 of little-endian unsigned ints, one or two bytes wide"""
+    width = 1 if max(values, default=0) < 256 else 2
+    packed = array("B" if width == 1 else "H", values)
+    if width == 2 and sys.byteorder == "big":
+        packed.byteswap()
+    return {"width": width, "data": base64.b64encode(packed.tobytes()).decode()}
+
+
+def _pack_states(states: bytes) -> str:
+    """Base64 of 2-bit states, four seats per byte, first seat in the low bits"""
+    length = (len(states) + 3) // 4
+    states = states.ljust(length * 4, b"\0")
+    packed = 0
+    for shift in range(4):
+        packed |= int.from_bytes(states[shift::4], "little") << (2 * shift)
+    return base64.b64encode(packed.to_bytes(length, "little")).decode()
+
+
+class SeatAvailability:
+    """Registry of per-event seat indexes, least recently used dropped first"""
+
+    def __init__(self):
+        self._indexes: "OrderedDict[int, EventSeatIndex]" = OrderedDict()
+        # Rebuild lock and generation only while a rebuild of the event is running
+        self._locks: Dict[int, asyncio.Lock] = {}
+        self._builders: Dict[int, int] = {}
+        # Bumped on every change so a rebuild racing a write is not cached
+        self._generations: Dict[int, int] = {}
+
+    def _fresh(self, event_id: int) -> Optional[EventSeatIndex]:
+        index = self._indexes.get(event_id)
+        if index is None:
+            return None
+        if time.monotonic() - index.loaded_at >= settings.SEAT_INDEX_TTL_SECONDS:
+            del self._indexes[event_id]
+            return None
+        self._indexes.move_to_end(event_id)
+        return index
+
+    def _store(self, event_id: int, index: EventSeatIndex):
+        self._indexes[event_id] = index
+        self._indexes.move_to_end(event_id)
+        now = time.monotonic()
+        for stale in [
+            other for other, cached in self._indexes.items()
+            if now - cached.loaded_at >= settings.SEAT_INDEX_TTL_SECONDS
+        ]:
+            del self._indexes[stale]
+        while len(self._indexes) > settings.SEAT_INDEX_MAX_EVENTS:
+            self._indexes.popitem(last=False)
+
+    async def get(self, db: AsyncSession, event_id: int) -> EventSeatIndex:
+        """Index for event_id, rebuilt from the seats table when missing or stale"""
+        index = self._fresh(event_id)
+        if index is not None:
+            return index
+
+        lock = self._locks.setdefault(event_id, asyncio.Lock())
+        self._builders[event_id] = self._builders.get(event_id, 0) + 1
+        try:
+            async with lock:
+                index = self._fresh(event_id)
+                if index is not None:
+                    return index
+
+                generation = self._generations.get(event_id, 0)
+                result = await db.execute(
+                    select(
+                        Seat.id,
+                        Seat.row_number,
+                        Seat.seat_number,
+                        Seat.tier,
+                        Seat.price,
+                        Seat.is_available,
+                        Seat.is_reserved,
+                        Seat.reserved_until,
+                        Seat.created_at,
+                    ).where(Seat.event_id == event_id)
+                )
+                index = EventSeatIndex(event_id, result.all())
+                if self._generations.get(event_id, 0) == generation:
+                    self._store(event_id, index)
+                return index
+        finally:
+            self._builders[event_id] -= 1
+            if not self._builders[event_id]:
+                del self._builders[event_id]
+                self._locks.pop(event_id, None)
+                self._generations.pop(event_id, None)
+
+    def peek(self, event_id: int) -> Optional[EventSeatIndex]:
+        """Loaded index for event_id, without touching the database"""
+        return self._indexes.get(event_id)
+
+    def _changed(self, event_id: int):
+        if event_id in self._builders:
+            self._generations[event_id] = self._generations.get(event_id, 0) + 1
+
+    def mark(
+        self,
+        event_id: int,
+        seat_ids: Iterable[int],
+        state: int,
+        reserved_until: Optional[datetime] = None
+    ):
+        """Record committed seat state changes and notify seat streams"""
+        seat_ids = list(seat_ids)
+        self._changed(event_id)
+        index = self._indexes.get(event_id)
+        if index is not None:
+            index.mark(seat_ids, state, reserved_until)
+        seat_hub.publish(event_id, dict.fromkeys(seat_ids, state))
+        response_cache.invalidate(*(f"seat:{seat_id}" for seat_id in seat_ids))
+
+    def invalidate(self, event_id: int):
+        """Drop an event's index after seats were added or removed, or the event was purged"""
+        self._changed(event_id)
+        self._indexes.pop(event_id, None)
+        seat_hub.resync(event_id)
+
+
+seat_availability = SeatAvailability()
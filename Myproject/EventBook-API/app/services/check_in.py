@@ -0,0 +1,101 @@
+"""Bulk check-in of buffered gate scans.
+
+A batch is resolved with one indexed lookup by qr_code and applied with one
+UPDATE whose CASE sets each booking's checked_in_at. Conflicts go to the
+earliest scan: the earliest scan of a booking within the batch is the one
+applied, and it only overwrites a stored check-in that is later (a scanner
+that was offline may sync after a later scan elsewhere). Callers own the
+transaction.
+"""
+from datetime import datetime, timezone
+from typing import Dict, List
+
+from sqlalchemy import case, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.models import Booking, BookingStatus
+
+CHECKED_IN = "checked_in"
+ALREADY_CHECKED_IN = "already_checked_in"
+CANCELLED = "cancelled"
+WRONG_EVENT = "wrong_event"
+INVALID = "invalid"
+
+
+def utc_naive(moment: datetime) -> datetime:
+    """Scanner timestamps as the naive UTC the database stores"""
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+
+async def check_in_scans(db: AsyncSession, event_id: int, scans: List) -> List[dict]:
+    """Apply a batch of scans for event_id; returns one result per scan, in order"""
+    scans = [(scan.qr_code, utc_naive(scan.scanned_at)) for scan in scans]
+    result = await db.execute(
+        select(
+            Booking.id,
+            Booking.qr_code,
+            Booking.event_id,
+            Booking.booking_number,
+            Booking.status,
+            Booking.checked_in_at,
+        ).where(Booking.qr_code.in_({qr_code for qr_code, _ in scans}))
+    )
+    bookings = {row.qr_code: row for row in result}
+
+    # Earliest scan per admissible booking
+    earliest: Dict[int, datetime] = {}
+    for qr_code, scanned_at in scans:
+        booking = bookings.get(qr_code)
+        if booking is None or booking.event_id != event_id or booking.status == BookingStatus.cancelled:
+            continue
+        if booking.id not in earliest or scanned_at < earliest[booking.id]:
+            earliest[booking.id] = scanned_at
+
+    checked_in_at = {booking.id: booking.checked_in_at for booking in bookings.values()}
+    pending = {
+        booking_id: scanned_at
+        for booking_id, scanned_at in earliest.items()
+        if checked_in_at[booking_id] is None or scanned_at < checked_in_at[booking_id]
+    }
+    applied = {}
+    if pending:
+        scan_time = case(pending, value=Booking.id)
+        result = await db.execute(
+            update(Booking)
+            .where(
+                Booking.id.in_(pending),
+                Booking.status != BookingStatus.cancelled,
+                or_(Booking.checked_in_at == None, Booking.checked_in_at > scan_time),
+            )
+            .values(status=BookingStatus.attended, checked_in_at=scan_time)
+            .returning(Booking.id, Booking.checked_in_at)
+            .execution_options(synchronize_session=False)
+        )
+        applied = dict(result.all())
+        checked_in_at.update(applied)
+
+    results = []
+    reported = set()
+    for qr_code, scanned_at in scans:
+        booking = bookings.get(qr_code)
+        entry = {"qr_code": qr_code, "scanned_at": scanned_at}
+        if booking is None:
+            entry["result"] = INVALID
+        elif booking.event_id != event_id:
+            entry["result"] = WRONG_EVENT
+        elif booking.status == BookingStatus.cancelled:
+            entry.update(result=CANCELLED, booking_number=booking.booking_number)
+        else:
+            # Only the applied earliest scan counts as the check-in; repeats of it conflict too
+            first = booking.id in applied and scanned_at == applied[booking.id] and booking.id not in reported
+            if first:
+                reported.add(booking.id)
+            entry.update(
+                result=CHECKED_IN if first else ALREADY_CHECKED_IN,
+                booking_number=booking.booking_number,
+                checked_in_at=checked_in_at[booking.id],
+            )
+        results.append(entry)
+    return results
@@ -0,0 +1,93 @@
+"""Facet counts for the event listing.
+
+One statement answers every facet: the filtered events are read once into a
+CTE (category, location, start day and cheapest seat), and a UNION ALL of
+GROUP BYs over it counts per category, location, day and price band.
+PostgreSQL materializes a CTE referenced more than once, so the events are
+scanned once. Days are folded into weeks here, which keeps the SQL the same
+on every database. Price bands use events.min_price, kept current by the
+seat write paths (see add_seat_counts).
+"""
+from collections import Counter
+from datetime import date, timedelta
+from typing import List
+
+from sqlalchemy import Select, String, case, cast, func, literal, null, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.models import Category, Event
+
+
+def price_bands() -> List[str]:
+    """Band labels in order; "0-25", ..., "250+" with the default bands"""
+    labels, lower = [], 0
+    for upper in settings.FACET_PRICE_BANDS:
+        labels.append(f"{lower:g}-{upper:g}")
+        lower = upper
+    labels.append(f"{lower:g}+")
+    return labels
+
+
+def _price_band(price):
+    labels = price_bands()
+    bands = [(price < upper, label) for upper, label in zip(settings.FACET_PRICE_BANDS, labels)]
+    return case((price.is_(None), null()), *bands, else_=labels[-1])
+
+
+def _week(day: str) -> str:
+    start = date.fromisoformat(day[:10])
+    return (start - timedelta(days=start.weekday())).isoformat()
+
+
+async def event_facets(db: AsyncSession, query: Select) -> dict:
+    """Counts per category, location, week and price band of the events query returns"""
+    faceted = query.with_only_columns(
+        Event.category_id,
+        Event.location,
+        func.date(Event.start_date).label("day"),
+        Event.min_price,
+    ).order_by(None).cte("faceted")
+
+    def grouped(facet: str, key):
+        return select(literal(facet), cast(key, String), null(), func.count()).select_from(faceted).group_by(key)
+
+    categories = (
+        select(literal("category"), cast(faceted.c.category_id, String), Category.name, func.count())
+        .select_from(faceted.outerjoin(Category, Category.id == faceted.c.category_id))
+        .group_by(faceted.c.category_id, Category.name)
+    )
+    band = _price_band(faceted.c.min_price)
+    statement = union_all(
+        categories,
+        grouped("location", faceted.c.location),
+        grouped("day", faceted.c.day),
+        grouped("price", band),
+    )
+
+    category_counts, locations, weeks, bands = [], Counter(), Counter(), Counter()
+    for facet, value, name, count in await db.execute(statement):
+        if facet == "category":
+            category_counts.append({
+                "category_id": int(value) if value is not None else None,
+                "name": name,
+                "count": count,
+            })
+        elif facet == "location":
+            locations[value] += count
+        elif facet == "day" and value is not None:
+            weeks[_week(value)] += count
+        elif facet == "price" and value is not None:
+            bands[value] += count
+
+    category_counts.sort(key=lambda facet: (-facet["count"], facet["category_id"] or 0))
+    return {
+        "total": sum(facet["count"] for facet in category_counts),
+        "categories": category_counts,
+        "locations": [
+            {"value": value, "count": count}
+            for value, count in locations.most_common(settings.FACET_LOCATION_LIMIT)
+        ],
+        "weeks": [{"value": week, "count": weeks[week]} for week in sorted(weeks)],
+        "price_bands": [{"value": label, "count": bands[label]} for label in price_bands() if bands[label]],
+    }
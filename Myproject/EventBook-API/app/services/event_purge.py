@@ -0,0 +1,215 @@
+"""Batched deletion of events and everything attached to them.
+
+db.delete(event) loaded every seat into the session to delete them one by
+one, and the event's bookings and reviews blocked the final DELETE anyway.
+Instead, delete_event hides the event (is_active = False), records an
+EventPurge row and hands the event to the purger. The purger removes the
+event's payments, bookings, reviews and seats with set-based DELETEs of at
+most EVENT_PURGE_BATCH_SIZE rows, committing and recording progress after
+each, and deletes the event row last. No child row is loaded into Python.
+Purges left unfinished by a restart are resumed on start.
+
+Pending and confirmed bookings, and completed or refunded payments (the
+financial records), are never deleted: events that have any cannot be
+purged. Claims skip inactive events, but a sale racing the DELETE request
+can still land, so the final transaction checks again and fails the purge
+instead of deleting the event.
+"""
+import asyncio
+import logging
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import and_, delete, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.database import AsyncSessionLocal
+from app.models.models import (
+    Booking,
+    BookingStatus,
+    Event,
+    EventPurge,
+    EventSeatCounter,
+    Payment,
+    PaymentStatus,
+    PurgeStatus,
+    Review,
+    Seat,
+)
+from app.services.availability import seat_availability
+from app.services.response_cache import response_cache
+
+logger = logging.getLogger(__name__)
+
+
+ACTIVE_BOOKINGS = (BookingStatus.pending, BookingStatus.confirmed)
+KEPT_PAYMENTS = (PaymentStatus.completed, PaymentStatus.refunded)
+
+
+def _event_payments(event_id: int):
+    return Payment.booking_id.in_(select(Booking.id).where(Booking.event_id == event_id))
+
+
+def purge_stages(event_id: int):
+    """(stage, model, criterion) in deletion order: children before what they reference"""
+    return (
+        ("payments", Payment, and_(_event_payments(event_id), Payment.status.notin_(KEPT_PAYMENTS))),
+        ("bookings", Booking, and_(Booking.event_id == event_id, Booking.status.notin_(ACTIVE_BOOKINGS))),
+        ("reviews", Review, Review.event_id == event_id),
+        ("seats", Seat, Seat.event_id == event_id),
+    )
+
+
+async def count_rows(db: AsyncSession, event_id: int) -> int:
+    """Rows a purge of event_id still has to delete"""
+    total = 0
+    for _, model, criterion in purge_stages(event_id):
+        total += await db.scalar(select(func.count()).select_from(model).where(criterion))
+    return total
+
+
+async def purge_blocker(db: AsyncSession, event_id: int) -> Optional[str]:
+    """Why event_id cannot be purged, if it cannot"""
+    active = await db.scalar(
+        select(func.count()).select_from(Booking).where(
+            Booking.event_id == event_id, Booking.status.in_(ACTIVE_BOOKINGS)
+        )
+    )
+    if active:
+        return f"Event has {active} pending or confirmed bookings; cancel them first"
+    paid = await db.scalar(
+        select(func.count()).select_from(Payment).where(_event_payments(event_id), Payment.status.in_(KEPT_PAYMENTS))
+    )
+    if paid:
+        return f"Event has {paid} completed or refunded payments, which are kept as financial records"
+    return None
+
+
+async def start_purge(db: AsyncSession, event: Event) -> EventPurge:
+    """Hide event and record its purge; the caller commits, then schedules it"""
+    purge = await db.get(EventPurge, event.id)
+    if purge is not None and purge.status != PurgeStatus.failed:
+        return purge
+    if purge is None:
+        purge = EventPurge(event_id=event.id, organizer_id=event.organizer_id, deleted_rows=0)
+        db.add(purge)
+    purge.status = PurgeStatus.pending
+    purge.error = None
+    purge.total_rows = purge.deleted_rows + await count_rows(db, event.id)
+    event.is_active = False
+    await db.flush()
+    return purge
+
+
+async def delete_batch(db: AsyncSession, model, criterion) -> int:
+    """Delete up to EVENT_PURGE_BATCH_SIZE rows of model matching criterion"""
+    batch = select(model.id).where(criterion).limit(settings.EVENT_PURGE_BATCH_SIZE)
+    result = await db.execute(
+        delete(model).where(model.id.in_(batch)).execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+async def purge_event(event_id: int):
+    """Delete an event's children batch by batch, then the event"""
+    async with AsyncSessionLocal() as db:
+        purge = await db.get(EventPurge, event_id)
+        if purge is None or purge.status in (PurgeStatus.done, PurgeStatus.failed):
+            return
+        purge.status = PurgeStatus.running
+        await db.commit()
+
+        stages = purge_stages(event_id)
+        for stage, model, criterion in stages:
+            purge.stage = stage
+            while True:
+                deleted = await delete_batch(db, model, criterion)
+                purge.deleted_rows += deleted
+                await db.commit()
+                if deleted < settings.EVENT_PURGE_BATCH_SIZE:
+                    break
+
+        # One last transaction with the event row, so rows written meanwhile cannot block it
+        blocker = await purge_blocker(db, event_id)
+        if blocker is not None:
+            # A sale landed while the purge ran; keep it and the event
+            await db.rollback()
+            raise PurgeBlocked(blocker)
+        for _, model, criterion in stages:
+            purge.deleted_rows += (await db.execute(
+                delete(model).where(criterion).execution_options(synchronize_session=False)
+            )).rowcount
+        await db.execute(delete(EventSeatCounter).where(EventSeatCounter.event_id == event_id))
+        await db.execute(delete(Event).where(Event.id == event_id).execution_options(synchronize_session=False))
+        purge.status = PurgeStatus.done
+        purge.stage = None
+        purge.finished_at = datetime.utcnow()
+        await db.commit()
+
+    seat_availability.invalidate(event_id)
+    response_cache.invalidate("events", f"event:{event_id}", f"event-reviews:{event_id}")
+
+
+class PurgeBlocked(Exception):
+    """The event gained bookings or payments that a purge must not delete"""
+
+
+async def fail_purge(event_id: int, error: str):
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            update(EventPurge)
+            .where(EventPurge.event_id == event_id)
+            .values(status=PurgeStatus.failed, error=error)
+        )
+        await db.commit()
+
+
+class EventPurger:
+    """Runs scheduled event purges one at a time"""
+
+    def __init__(self):
+        self._queue: "asyncio.Queue[int]" = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+
+    def schedule(self, event_id: int):
+        self._queue.put_nowait(event_id)
+
+    async def start(self):
+        """Resume unfinished purges and start the purge loop"""
+        async with AsyncSessionLocal() as db:
+            unfinished = await db.scalars(
+                select(EventPurge.event_id).where(
+                    EventPurge.status.in_((PurgeStatus.pending, PurgeStatus.running))
+                )
+            )
+            for event_id in unfinished:
+                self.schedule(event_id)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            event_id = await self._queue.get()
+            try:
+                await purge_event(event_id)
+            except Exception as e:
+                if isinstance(e, PurgeBlocked):
+                    logger.warning("Purge of event %s stopped: %s", event_id, e)
+                else:
+                    logger.exception("Purge of event %s failed", event_id)
+                try:
+                    await fail_purge(event_id, str(e))
+                except Exception:
+                    logger.exception("Could not record failed purge of event %s", event_id)
+
+
+event_purger = EventPurger()
@@ -0,0 +1,120 @@
+"""Full-text event search.
+
+PostgreSQL keeps a generated, weighted tsvector over title, venue, location
+and description in events.search_vector with a GIN index, plus a pg_trgm
+GIN index on location for fuzzy and substring location matches. SQLite uses
+an FTS5 external-content table, events_fts, kept in step with events by
+triggers. Both are created with the events table (see models.py), so
+create_event and update_event keep the index current without extra code.
+Other databases fall back to ILIKE filters.
+
+Matches are ranked by relevance (ts_rank_cd on PostgreSQL, bm25 on SQLite),
+but only the newest SEARCH_RANK_CANDIDATES matches that pass the other
+filters are scored: a term found in most events would otherwise cost a
+score per matching row.
+"""
+import re
+from typing import Optional, Tuple
+
+from sqlalchemy import Select, column, func, literal_column, or_, select, table
+
+from app.core.config import settings
+from app.models.models import Event
+
+TEXT_SEARCH_CONFIG = "english"
+
+# Column weights, matching the tsvector weights: title A, venue/location B, description C
+FTS5_WEIGHTS = (10.0, 1.0, 4.0, 4.0)  # title, description, venue, location
+
+events_fts = table("events_fts", column("rowid"))
+_fts_table = literal_column("events_fts")
+
+
+def fts5_query(text: str, field: Optional[str] = None, prefix: bool = False) -> Optional[str]:
+    """FTS5 MATCH expression requiring every word of text, optionally within one column"""
+    words = re.findall(r"\w+", text)
+    if not words:
+        return None
+    expression = " ".join(f'"{word}"*' if prefix else f'"{word}"' for word in words)
+    return f"{field} : ({expression})" if field else expression
+
+
+def _ranked(query: Select, rank, order_key) -> Select:
+    """Events of query ordered by rank, scoring only the newest candidates"""
+    candidates = (
+        query.with_only_columns(Event.id, rank.label("rank"))
+        .order_by(order_key.desc())
+        .limit(settings.SEARCH_RANK_CANDIDATES)
+        .subquery()
+    )
+    return (
+        select(Event)
+        .join(candidates, candidates.c.id == Event.id)
+        .order_by(candidates.c.rank.desc(), Event.id)
+    )
+
+
+def _postgres_search(query: Select, search: Optional[str], location: Optional[str], rank: bool) -> Tuple[Select, bool]:
+    if location:
+        # Substring or trigram-similar (pg_trgm.similarity_threshold); both use the trigram index
+        query = query.where(or_(
+            Event.location.ilike(f"%{location}%"),
+            Event.location.op("%")(location),
+        ))
+    if not search:
+        return query, False
+
+    vector = literal_column("events.search_vector")
+    terms = func.websearch_to_tsquery(TEXT_SEARCH_CONFIG, search)
+    query = query.where(vector.op("@@")(terms))
+    if not rank:
+        return query, False
+    return _ranked(query, func.ts_rank_cd(vector, terms), Event.id), True
+
+
+def _sqlite_search(query: Select, search: Optional[str], location: Optional[str], rank: bool) -> Tuple[Select, bool]:
+    search_terms = fts5_query(search) if search else None
+    location_terms = fts5_query(location, "location", prefix=True) if location else None
+    match = " AND ".join(terms for terms in (search_terms, location_terms) if terms)
+    if not match:
+        if location:
+            query = query.where(Event.location.ilike(f"%{location}%"))
+        return query, False
+
+    matches = _fts_table.op("MATCH")(match)
+    if not search_terms or not rank:
+        return query.where(Event.id.in_(select(events_fts.c.rowid).where(matches))), False
+
+    # bm25 is lower for better matches, and only valid in the query that runs the MATCH
+    query = query.join(events_fts, events_fts.c.rowid == Event.id).where(matches)
+    return _ranked(query, -func.bm25(_fts_table, *FTS5_WEIGHTS), events_fts.c.rowid), True
+
+
+def _fallback_search(query: Select, search: Optional[str], location: Optional[str], rank: bool) -> Tuple[Select, bool]:
+    if location:
+        query = query.where(Event.location.ilike(f"%{location}%"))
+    if search:
+        query = query.where(or_(
+            Event.title.ilike(f"%{search}%"),
+            Event.venue.ilike(f"%{search}%"),
+            Event.location.ilike(f"%{search}%"),
+            Event.description.ilike(f"%{search}%"),
+        ))
+    return query, False
+
+
+SEARCH_DIALECTS = {
+    "postgresql": _postgres_search,
+    "sqlite": _sqlite_search,
+}
+
+
+def search_events(
+    query: Select,
+    dialect: str,
+    search: Optional[str] = None,
+    location: Optional[str] = None,
+    rank: bool = True,
+) -> Tuple[Select, bool]:
+    """Filter query by search text and location; True when it is already ordered by relevance"""
+    return SEARCH_DIALECTS.get(dialect, _fallback_search)(query, search, location, rank)
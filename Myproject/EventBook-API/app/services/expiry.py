@@ -0,0 +1,179 @@
+"""Background expiry of seat holds and unpaid pending bookings.
+
+Deadlines sit in a min-heap; the engine sleeps until the earliest one (or
+until an earlier deadline is scheduled), then expires everything due in
+batched set-based UPDATEs. Heap entries are hints only: each UPDATE
+re-checks the deadline in SQL, so entries made stale by a renewed hold or
+a completed payment are harmless. On start the heap is re-seeded from the
+database, so deadlines survive restarts.
+"""
+import asyncio
+import heapq
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select, update
+
+from app.core.config import settings
+from app.db.database import AsyncSessionLocal
+from app.models.models import Booking, BookingStatus, Seat
+from app.services.availability import seat_availability, AVAILABLE
+from app.services.reservations import restock_seats
+from app.services.seat_counters import adjust_available_seats
+from app.services.tickets import revoked_bookings
+
+logger = logging.getLogger(__name__)
+
+HOLD = "hold"
+BOOKING = "booking"
+
+
+def payment_deadline(created_at: datetime) -> datetime:
+    """When an unpaid booking created at created_at expires"""
+    return created_at + timedelta(minutes=settings.BOOKING_PAYMENT_TIMEOUT_MINUTES)
+
+
+class ExpiryEngine:
+    """Releases stale seat holds and cancels unpaid pending bookings"""
+
+    def __init__(self):
+        self._heap: List[Tuple[datetime, str, int]] = []
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def _schedule(self, deadline: datetime, kind: str, item_id: int):
+        if not self._heap or deadline < self._heap[0][0]:
+            self._wakeup.set()
+        heapq.heappush(self._heap, (deadline, kind, item_id))
+
+    def schedule_hold(self, seat_id: int, reserved_until: datetime):
+        self._schedule(reserved_until, HOLD, seat_id)
+
+    def schedule_booking(self, booking_id: int, created_at: datetime):
+        self._schedule(payment_deadline(created_at), BOOKING, booking_id)
+
+    async def start(self):
+        """Seed deadlines from the database and start the expiry loop"""
+        async with AsyncSessionLocal() as db:
+            holds = await db.execute(
+                select(Seat.reserved_until, Seat.id).where(
+                    Seat.is_reserved == True,
+                    Seat.is_available == True,
+                    Seat.reserved_until != None,
+                )
+            )
+            bookings = await db.execute(
+                select(Booking.created_at, Booking.id).where(Booking.status == BookingStatus.pending)
+            )
+            self._heap = [(deadline, HOLD, seat_id) for deadline, seat_id in holds]
+            self._heap += [(payment_deadline(created), BOOKING, booking_id) for created, booking_id in bookings]
+        heapq.heapify(self._heap)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            timeout = None
+            if self._heap:
+                timeout = max((self._heap[0][0] - datetime.utcnow()).total_seconds(), 0)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            try:
+                await self.expire_due()
+            except Exception:
+                logger.exception("Expiry sweep failed")
+                await asyncio.sleep(settings.EXPIRY_RETRY_SECONDS)
+
+    async def expire_due(self):
+        """Expire every hold and booking whose deadline has passed"""
+        now = datetime.utcnow()
+        due = {HOLD: [], BOOKING: []}
+        while self._heap and self._heap[0][0] <= now:
+            deadline, kind, item_id = heapq.heappop(self._heap)
+            due[kind].append(item_id)
+
+        try:
+            batch_size = settings.EXPIRY_BATCH_SIZE
+            for start in range(0, len(due[HOLD]), batch_size):
+                await self.release_holds(due[HOLD][start:start + batch_size], now)
+            for start in range(0, len(due[BOOKING]), batch_size):
+                await self.cancel_bookings(due[BOOKING][start:start + batch_size], now)
+        except Exception:
+            # Put the work back so the next sweep retries it
+            for kind, item_ids in due.items():
+                for item_id in item_ids:
+                    heapq.heappush(self._heap, (now, kind, item_id))
+            raise
+
+    async def release_holds(self, seat_ids: List[int], now: datetime):
+        """Clear holds that are still expired in one UPDATE"""
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                update(Seat)
+                .where(
+                    Seat.id.in_(seat_ids),
+                    Seat.is_reserved == True,
+                    Seat.reserved_until <= now,
+                )
+                .values(is_reserved=False, reserved_until=None, reserved_by=None)
+                .returning(Seat.id, Seat.event_id)
+                .execution_options(synchronize_session=False)
+            )
+            released = result.all()
+            await db.commit()
+
+        for event_id, event_seat_ids in _by_event(released).items():
+            seat_availability.mark(event_id, event_seat_ids, AVAILABLE)
+
+    async def cancel_bookings(self, booking_ids: List[int], now: datetime):
+        """Cancel still-unpaid bookings past their deadline and free their seats"""
+        cutoff = now - timedelta(minutes=settings.BOOKING_PAYMENT_TIMEOUT_MINUTES)
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                update(Booking)
+                .where(
+                    Booking.id.in_(booking_ids),
+                    Booking.status == BookingStatus.pending,
+                    Booking.created_at <= cutoff,
+                )
+                .values(status=BookingStatus.cancelled)
+                .returning(Booking.booking_number, Booking.seat_id)
+                .execution_options(synchronize_session=False)
+            )
+            cancelled = result.all()
+            seat_ids = [row.seat_id for row in cancelled]
+            restocked = await restock_seats(db, seat_ids) if seat_ids else []
+
+            by_event = _by_event(restocked)
+            for event_id, event_seat_ids in by_event.items():
+                await adjust_available_seats(db, event_id, len(event_seat_ids))
+            await db.commit()
+
+        revoked_bookings.add(row.booking_number for row in cancelled)
+        for event_id, event_seat_ids in by_event.items():
+            seat_availability.mark(event_id, event_seat_ids, AVAILABLE)
+
+
+def _by_event(rows) -> Dict[int, List[int]]:
+    """Group (id, event_id, ...) rows into seat ids per event"""
+    grouped = defaultdict(list)
+    for row in rows:
+        grouped[row.event_id].append(row.id)
+    return grouped
+
+
+expiry_engine = ExpiryEngine()
@@ -0,0 +1,176 @@
+"""Proximity search over event coordinates.
+
+Events with coordinates carry a geohash: a base32 string whose prefixes
+are nested cells of the latitude/longitude grid, so every event inside a
+cell has a geohash in the range [cell, cell + "~"). A radius search covers
+the circle's bounding box with at most GEO_MAX_CELLS cells of the finest
+precision that allows it, scans those ranges on the (geohash, latitude,
+longitude) index and drops candidates outside the box. It then refines the
+survivors by exact great-circle distance and sorts them. The radius grows
+from GEO_MIN_RADIUS_KM until the circle holds the requested page, so a
+dense city costs a small circle rather than all of its events. Works the
+same on any database with a B-tree index; no PostGIS or earthdistance
+needed.
+"""
+import math
+from typing import Iterable, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import Select, and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.models import Event
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+PRECISION = 9  # ~5 m cells
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+GEO_MAX_CELLS = 16
+# Radius search starts this small and grows by GEO_RADIUS_STEP
+GEO_MIN_RADIUS_KM = 0.5
+GEO_RADIUS_STEP = 4
+
+
+def encode(latitude: float, longitude: float, precision: int = PRECISION) -> str:
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        interval, coordinate = (lon_range, longitude) if even else (lat_range, latitude)
+        middle = (interval[0] + interval[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[value])
+            bits, value = 0, 0
+    return "".join(chars)
+
+
+def event_geohash(latitude: Optional[float], longitude: Optional[float]) -> Optional[str]:
+    """Geohash stored on an event; None unless both coordinates are set"""
+    if latitude is None or longitude is None:
+        return None
+    return encode(latitude, longitude)
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi, dlambda = phi2 - phi1, math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bounding_box(latitude: float, longitude: float, radius_km: float) -> Tuple[float, float, float, float]:
+    """(min_lat, max_lat, min_lon, max_lon) around the circle; longitudes may pass +-180"""
+    dlat = radius_km / KM_PER_DEGREE
+    min_lat, max_lat = max(-90.0, latitude - dlat), min(90.0, latitude + dlat)
+    # Widest longitude span is at the box edge nearest a pole
+    widest = max(abs(min_lat), abs(max_lat))
+    cos_lat = math.cos(math.radians(widest))
+    dlon = 180.0 if cos_lat < 1e-9 else min(180.0, radius_km / (KM_PER_DEGREE * cos_lat))
+    return min_lat, max_lat, longitude - dlon, longitude + dlon
+
+
+def _cell_size(precision: int) -> Tuple[float, float]:
+    bits = 5 * precision
+    lon_bits = (bits + 1) // 2
+    return 180.0 / (1 << (bits - lon_bits)), 360.0 / (1 << lon_bits)
+
+
+def covering_cells(box: Tuple[float, float, float, float], max_cells: int = GEO_MAX_CELLS) -> List[str]:
+    """Fewest-candidates geohash cells covering box, at most max_cells of them"""
+    min_lat, max_lat, min_lon, max_lon = box
+    for precision in range(PRECISION, 0, -1):
+        lat_size, lon_size = _cell_size(precision)
+        lat_cells = range(math.floor((min_lat + 90) / lat_size), math.floor((max_lat + 90) / lat_size) + 1)
+        lon_cells = range(math.floor((min_lon + 180) / lon_size), math.floor((max_lon + 180) / lon_size) + 1)
+        columns = 360.0 / lon_size
+        if len(lat_cells) * min(len(lon_cells), columns) > max_cells:
+            continue
+        cells: Set[str] = set()
+        rows = int(180.0 / lat_size)
+        for lat_cell in lat_cells:
+            lat_cell = min(lat_cell, rows - 1)
+            for lon_cell in lon_cells:
+                # Wrap across the antimeridian
+                lon_cell %= int(columns)
+                cells.add(encode(
+                    -90 + (lat_cell + 0.5) * lat_size,
+                    -180 + (lon_cell + 0.5) * lon_size,
+                    precision,
+                ))
+        return sorted(cells)
+    return [""]  # The whole world
+
+
+def _in_longitudes(min_lon: float, max_lon: float):
+    if max_lon - min_lon >= 360:
+        return None
+    if min_lon < -180:
+        return or_(Event.longitude >= min_lon + 360, Event.longitude <= max_lon)
+    if max_lon > 180:
+        return or_(Event.longitude >= min_lon, Event.longitude <= max_lon - 360)
+    return Event.longitude.between(min_lon, max_lon)
+
+
+def near_filter(latitude: float, longitude: float, radius_km: float):
+    """Index-friendly WHERE clause for events possibly within radius_km"""
+    box = bounding_box(latitude, longitude, radius_km)
+    cells = covering_cells(box)
+    clauses = [
+        or_(*(and_(Event.geohash >= cell, Event.geohash < cell + "~") for cell in cells)),
+        Event.latitude.between(box[0], box[1]),
+    ]
+    longitudes = _in_longitudes(box[2], box[3])
+    if longitudes is not None:
+        clauses.append(longitudes)
+    return and_(*clauses)
+
+
+def search_radii(radius_km: float) -> List[float]:
+    """Growing radii ending at radius_km"""
+    radii = [radius_km]
+    while radii[-1] / GEO_RADIUS_STEP >= GEO_MIN_RADIUS_KM:
+        radii.append(radii[-1] / GEO_RADIUS_STEP)
+    return radii[::-1]
+
+
+async def nearby_events(
+    db: AsyncSession,
+    query: Select,
+    latitude: float,
+    longitude: float,
+    radius_km: float,
+    skip: int = 0,
+    limit: int = 50,
+    options: Sequence = (),
+) -> List[Event]:
+    """Events of query within radius_km, nearest first"""
+    candidates = query.with_only_columns(Event.id, Event.latitude, Event.longitude).order_by(None)
+    # Widen the circle until it holds the page: everything inside a circle is
+    # nearer than anything outside it, so dense areas never scan the full radius
+    for step_km in search_radii(radius_km):
+        rows = await db.execute(candidates.where(near_filter(latitude, longitude, step_km)))
+        found = sorted(
+            (distance, event_id)
+            for event_id, distance in _distances(rows, latitude, longitude)
+            if distance <= step_km
+        )
+        if len(found) >= skip + limit:
+            break
+    page = found[skip:skip + limit]
+    if not page:
+        return []
+
+    ids = [event_id for _, event_id in page]
+    events = {event.id: event for event in await db.scalars(select(Event).options(*options).where(Event.id.in_(ids)))}
+    return [events[event_id] for event_id in ids if event_id in events]
+
+
+def _distances(rows: Iterable, latitude: float, longitude: float):
+    for event_id, event_latitude, event_longitude in rows:
+        yield event_id, haversine_km(latitude, longitude, event_latitude, event_longitude)
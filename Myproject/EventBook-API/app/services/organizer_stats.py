@@ -0,0 +1,172 @@
+"""Organizer dashboard totals from the organizer_stats rollup.
+
+Triggers on events, bookings and payments (see ORGANIZER_STATS_SOURCES in
+app/models/models.py) add each written row's contribution to its
+organizer's stats in the writing transaction, so every path is covered:
+ORM and Core updates, check-in scans, expiry and purges alike. The totals
+are spread over ORGANIZER_STATS_SHARDS rows per organizer, picked by the
+written row's id, so concurrent bookings for one organizer do not queue on
+a single row lock. The dashboard sums an organizer's shards: one primary
+key range read instead of scanning the organizer's events and bookings.
+
+recount() computes the same totals from the raw tables. Run
+
+    python -m app.services.organizer_stats verify
+    python -m app.services.organizer_stats rebuild
+
+to compare the rollup with them, or to rewrite it from them (needed once
+for databases that held events before the rollup existed).
+"""
+import argparse
+import asyncio
+import math
+import sys
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.database import AsyncSessionLocal
+from app.models.models import (
+    ORGANIZER_STATS_COLUMNS,
+    Booking,
+    BookingStatus,
+    Event,
+    OrganizerStat,
+    Payment,
+    PaymentStatus,
+)
+
+REVENUE_TOLERANCE = 0.005  # Float sums drift; anything under a cent matches
+
+
+def _empty() -> dict:
+    return {name: 0 for name in ORGANIZER_STATS_COLUMNS} | {"total_revenue": 0.0}
+
+
+def _row(values) -> dict:
+    stats = dict(zip(ORGANIZER_STATS_COLUMNS, values))
+    stats["total_revenue"] = float(stats["total_revenue"])
+    return stats
+
+
+async def organizer_stats(db: AsyncSession, organizer_id: int) -> dict:
+    """Dashboard totals of organizer_id from the rollup"""
+    row = (await db.execute(
+        select(*(func.coalesce(func.sum(getattr(OrganizerStat, name)), 0) for name in ORGANIZER_STATS_COLUMNS))
+        .where(OrganizerStat.organizer_id == organizer_id)
+    )).one()
+    return _row(row)
+
+
+async def rollup(db: AsyncSession, organizer_id: Optional[int] = None) -> Dict[int, dict]:
+    """Rollup totals per organizer"""
+    query = select(
+        OrganizerStat.organizer_id,
+        *(func.sum(getattr(OrganizerStat, name)) for name in ORGANIZER_STATS_COLUMNS),
+    ).group_by(OrganizerStat.organizer_id)
+    if organizer_id is not None:
+        query = query.where(OrganizerStat.organizer_id == organizer_id)
+    return {row[0]: _row(row[1:]) for row in await db.execute(query)}
+
+
+async def recount(db: AsyncSession, organizer_id: Optional[int] = None) -> Dict[int, dict]:
+    """Totals per organizer counted from events, bookings and payments"""
+    events = select(
+        Event.organizer_id,
+        func.count(Event.id),
+        func.count(Event.id).filter(Event.is_active.is_(True)),
+    ).group_by(Event.organizer_id)
+    bookings = select(
+        Event.organizer_id,
+        func.count(Booking.id),
+        func.count(Booking.id).filter(Booking.status.in_([BookingStatus.confirmed, BookingStatus.attended])),
+    ).join(Event, Event.id == Booking.event_id).group_by(Event.organizer_id)
+    revenue = select(
+        Event.organizer_id,
+        func.sum(Payment.amount),
+    ).join(Booking, Booking.id == Payment.booking_id).join(Event, Event.id == Booking.event_id).where(
+        Payment.status == PaymentStatus.completed
+    ).group_by(Event.organizer_id)
+    if organizer_id is not None:
+        events, bookings, revenue = (
+            query.where(Event.organizer_id == organizer_id) for query in (events, bookings, revenue)
+        )
+
+    totals: Dict[int, dict] = {}
+    for organizer, total, active in await db.execute(events):
+        totals.setdefault(organizer, _empty()).update(total_events=total, active_events=active)
+    for organizer, total, attendees in await db.execute(bookings):
+        totals.setdefault(organizer, _empty()).update(total_bookings=total, total_attendees=attendees)
+    for organizer, amount in await db.execute(revenue):
+        totals.setdefault(organizer, _empty())["total_revenue"] = float(amount or 0)
+    return totals
+
+
+def _matches(stored: dict, counted: dict) -> bool:
+    return all(
+        math.isclose(stored[name], counted[name], abs_tol=REVENUE_TOLERANCE)
+        if name == "total_revenue" else stored[name] == counted[name]
+        for name in ORGANIZER_STATS_COLUMNS
+    )
+
+
+async def verify(db: AsyncSession, organizer_id: Optional[int] = None) -> Dict[int, Tuple[dict, dict]]:
+    """Organizers whose rollup differs from the raw tables, as (rollup, recount)"""
+    stored, counted = await rollup(db, organizer_id), await recount(db, organizer_id)
+    mismatches = {}
+    for organizer in stored.keys() | counted.keys():
+        stats, expected = stored.get(organizer, _empty()), counted.get(organizer, _empty())
+        if not _matches(stats, expected):
+            mismatches[organizer] = (stats, expected)
+    return mismatches
+
+
+async def rebuild(db: AsyncSession, organizer_id: Optional[int] = None) -> int:
+    """Rewrite the rollup from the raw tables; the caller commits. Returns organizers written"""
+    if db.get_bind().dialect.name == "postgresql":
+        # Writers' triggers wait until the rebuild commits, so none of their deltas are lost
+        await db.execute(text("LOCK TABLE organizer_stats IN EXCLUSIVE MODE"))
+    cleared = delete(OrganizerStat)
+    if organizer_id is not None:
+        cleared = cleared.where(OrganizerStat.organizer_id == organizer_id)
+    await db.execute(cleared.execution_options(synchronize_session=False))
+    counted = await recount(db, organizer_id)
+    if counted:
+        await db.execute(insert(OrganizerStat), [
+            {"organizer_id": organizer, "shard": 0, **stats} for organizer, stats in counted.items()
+        ])
+    return len(counted)
+
+
+def _describe(organizer: int, stats: dict, expected: dict) -> str:
+    differences = ", ".join(
+        f"{name} {stats[name]} != {expected[name]}"
+        for name in ORGANIZER_STATS_COLUMNS if stats[name] != expected[name]
+    )
+    return f"organizer {organizer}: {differences}"
+
+
+async def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Check or rebuild the organizer_stats rollup")
+    parser.add_argument("command", choices=("verify", "rebuild"))
+    parser.add_argument("--organizer", type=int, help="Only this organizer")
+    args = parser.parse_args(argv)
+
+    async with AsyncSessionLocal() as db:
+        mismatches = await verify(db, args.organizer)
+        for organizer, (stats, expected) in sorted(mismatches.items()):
+            print(_describe(organizer, stats, expected))
+        if args.command == "verify":
+            print(f"{len(mismatches)} organizer(s) out of step")
+            return 1 if mismatches else 0
+
+        written = await rebuild(db, args.organizer)
+        await db.commit()
+        remaining = await verify(db, args.organizer)
+        print(f"Rebuilt {written} organizer(s); {len(mismatches)} were out of step, {len(remaining)} still are")
+        return 1 if remaining else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
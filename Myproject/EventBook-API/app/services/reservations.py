@@ -0,0 +1,121 @@
+"""Atomic seat claims shared by the seat and booking routes.
+
+Each state change is one conditional UPDATE ... RETURNING. Buyer-facing
+claims (holds and sales) only match seats of active events, so nothing is
+sold for an event that is deactivated or being deleted, and pick their
+rows with FOR UPDATE SKIP LOCKED (a no-op on SQLite), so losers fail fast
+instead of queueing. Releases and restocks wait for row locks instead: a
+seat skipped there would never go back on sale. Callers own the
+transaction.
+"""
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_, exists, or_, select, update
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.models import Event, Seat
+
+
+def claimable(user_id: int, now: datetime):
+    """Seats that are for sale and not held by another user"""
+    return and_(
+        Seat.is_available == True,
+        or_(
+            Seat.is_reserved == False,
+            Seat.reserved_until == None,
+            Seat.reserved_until < now,
+            Seat.reserved_by == user_id,
+        ),
+    )
+
+
+def on_sale():
+    """Seats of active events: not deactivated, and not being deleted"""
+    return exists().where(Event.id == Seat.event_id, Event.is_active == True)
+
+
+def _unlocked(condition):
+    """Rows matching condition that no other transaction is writing"""
+    return Seat.id.in_(
+        select(Seat.id).where(condition).with_for_update(skip_locked=True)
+    )
+
+
+async def _claim(db: AsyncSession, condition, values: dict, skip_locked: bool = True) -> List[Row]:
+    result = await db.execute(
+        update(Seat)
+        .where(_unlocked(condition) if skip_locked else condition)
+        .values(**values)
+        .returning(Seat.id, Seat.event_id, Seat.price)
+        .execution_options(synchronize_session=False)
+    )
+    return result.all()
+
+
+async def hold_seats(
+    db: AsyncSession,
+    seat_ids: Iterable[int],
+    user_id: int,
+    event_id: Optional[int] = None
+) -> Tuple[List[Row], datetime]:
+    """Place a hold on seats for user_id; returns the claimed rows and hold expiry"""
+    seat_ids = set(seat_ids)
+    now = datetime.utcnow()
+    reserved_until = now + timedelta(minutes=settings.SEAT_HOLD_MINUTES)
+
+    condition = and_(Seat.id.in_(seat_ids), claimable(user_id, now), on_sale())
+    if event_id is not None:
+        condition = and_(condition, Seat.event_id == event_id)
+
+    rows = await _claim(db, condition, {
+        "is_reserved": True,
+        "reserved_until": reserved_until,
+        "reserved_by": user_id,
+    })
+    return rows, reserved_until
+
+
+async def release_seats(db: AsyncSession, seat_ids: Iterable[int], user_id: int) -> List[Row]:
+    """Drop holds that belong to user_id"""
+    condition = and_(
+        Seat.id.in_(set(seat_ids)),
+        Seat.is_reserved == True,
+        Seat.reserved_by == user_id,
+    )
+    return await _claim(db, condition, {
+        "is_reserved": False,
+        "reserved_until": None,
+        "reserved_by": None,
+    }, skip_locked=False)
+
+
+async def sell_seats(
+    db: AsyncSession,
+    seat_ids: Iterable[int],
+    user_id: int,
+    event_id: int
+) -> List[Row]:
+    """Mark seats as booked for user_id, honouring other users' holds"""
+    now = datetime.utcnow()
+    condition = and_(
+        Seat.id.in_(set(seat_ids)),
+        Seat.event_id == event_id,
+        claimable(user_id, now),
+        on_sale(),
+    )
+    return await _claim(db, condition, {
+        "is_available": False,
+        "is_reserved": False,
+        "reserved_until": None,
+        "reserved_by": None,
+    })
+
+
+async def restock_seats(db: AsyncSession, seat_ids: Iterable[int]) -> List[Row]:
+    """Put booked seats back on sale"""
+    condition = and_(Seat.id.in_(set(seat_ids)), Seat.is_available == False)
+    return await _claim(db, condition, {"is_available": True}, skip_locked=False)
+
@@ -0,0 +1,224 @@
+"""Cache of serialized responses for public read endpoints.
+
+Entries hold the final response bytes (and, above RESPONSE_CACHE_GZIP_MIN_BYTES,
+a gzipped copy made once at store time), so a hit skips the session, the
+query and serialization. Each entry carries tags such as "events" or
+"event:42"; write handlers invalidate the tags they affect after committing.
+Invalidation advances a global epoch and records it against the tag, and a
+response computed while one of its tags changed is not stored, so a slow
+read cannot cache pre-write data.
+
+Storage sits behind ResponseCacheBackend. MemoryCacheBackend is an LRU
+bounded by RESPONSE_CACHE_MAX_ENTRIES and RESPONSE_CACHE_MAX_BYTES with a
+per-entry TTL; it is local to the process, so with several workers a write
+is seen by the others after at most RESPONSE_CACHE_TTL_SECONDS. It remembers
+the epochs of only as many recently invalidated tags as it holds entries;
+a read older than the oldest forgotten invalidation is not stored.
+"""
+import gzip
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from app.core.config import settings
+
+
+@dataclass
+class CachedResponse:
+    """A stored response"""
+    status_code: int
+    headers: List[Tuple[str, str]]
+    body: bytes
+    gzipped: Optional[bytes]
+    tags: Tuple[str, ...]
+    expires_at: float
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + len(self.gzipped or b"")
+
+
+class ResponseCacheBackend(ABC):
+    """Where cached responses live"""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[CachedResponse]:
+        """Live entry stored under key, if any"""
+
+    @abstractmethod
+    def versions(self, tags: Iterable[str]) -> Tuple[int, ...]:
+        """Invalidation state of tags before a read, to hand back to set()"""
+
+    @abstractmethod
+    def set(self, key: str, entry: CachedResponse, versions: Tuple[int, ...]) -> bool:
+        """Store entry unless one of its tags was invalidated since versions was read"""
+
+    @abstractmethod
+    def invalidate(self, tags: Iterable[str]) -> int:
+        """Drop entries carrying any of tags; returns how many were dropped"""
+
+    @abstractmethod
+    def clear(self):
+        """Drop every entry"""
+
+    @abstractmethod
+    def usage(self) -> Dict[str, int]:
+        """Entry count and stored bytes"""
+
+
+class MemoryCacheBackend(ResponseCacheBackend):
+    """Size-bounded LRU of one process"""
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._tagged: Dict[str, Set[str]] = {}
+        # Epoch of each recently invalidated tag, oldest first, at most max_entries of them
+        self._invalidated: "OrderedDict[str, int]" = OrderedDict()
+        self._epoch = 0
+        # Every tag no longer in _invalidated was last invalidated at or before this epoch
+        self._forgotten = 0
+        self._bytes = 0
+        # Sync endpoints invalidate from the threadpool
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at <= time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def versions(self, tags: Iterable[str]) -> Tuple[int, ...]:
+        with self._lock:
+            return (self._epoch,)
+
+    def set(self, key: str, entry: CachedResponse, versions: Tuple[int, ...]) -> bool:
+        if entry.size > self.max_bytes:
+            return False
+        with self._lock:
+            read_at = versions[0]
+            if read_at < self._forgotten or any(self._invalidated.get(tag, 0) > read_at for tag in entry.tags):
+                return False
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._bytes += entry.size
+            for tag in entry.tags:
+                self._tagged.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+            return True
+
+    def invalidate(self, tags: Iterable[str]) -> int:
+        dropped = 0
+        with self._lock:
+            self._epoch += 1
+            for tag in tags:
+                self._invalidated[tag] = self._epoch
+                self._invalidated.move_to_end(tag)
+                for key in self._tagged.pop(tag, ()):
+                    if key in self._entries:
+                        self._remove(key)
+                        dropped += 1
+            while len(self._invalidated) > self.max_entries:
+                _, self._forgotten = self._invalidated.popitem(last=False)
+        return dropped
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tagged.clear()
+            self._bytes = 0
+
+    def usage(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "bytes": self._bytes}
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+        for tag in entry.tags:
+            keys = self._tagged.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tagged[tag]
+
+
+def create_backend(kind: str) -> ResponseCacheBackend:
+    if kind == "memory":
+        return MemoryCacheBackend(settings.RESPONSE_CACHE_MAX_ENTRIES, settings.RESPONSE_CACHE_MAX_BYTES)
+    raise ValueError(f"Unknown response cache backend: {kind}")
+
+
+class ResponseCache:
+    """Response cache with hit/miss counters"""
+
+    def __init__(self, backend: ResponseCacheBackend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.invalidations = 0
+
+    def lookup(self, key: str) -> Optional[CachedResponse]:
+        entry = self.backend.get(key)
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    def versions(self, tags: Iterable[str]) -> Tuple[int, ...]:
+        return self.backend.versions(tags)
+
+    def store(
+        self,
+        key: str,
+        status_code: int,
+        headers: List[Tuple[str, str]],
+        body: bytes,
+        tags: Tuple[str, ...],
+        versions: Tuple[int, ...],
+        ttl: Optional[int] = None,
+    ) -> CachedResponse:
+        gzipped = None
+        if settings.RESPONSE_CACHE_GZIP and len(body) >= settings.RESPONSE_CACHE_GZIP_MIN_BYTES:
+            gzipped = gzip.compress(body, compresslevel=6)
+        entry = CachedResponse(
+            status_code=status_code,
+            headers=headers,
+            body=body,
+            gzipped=gzipped,
+            tags=tags,
+            expires_at=time.monotonic() + (ttl if ttl is not None else settings.RESPONSE_CACHE_TTL_SECONDS),
+        )
+        if self.backend.set(key, entry, versions):
+            self.stores += 1
+        return entry
+
+    def invalidate(self, *tags: str):
+        """Drop responses carrying any of tags; call after the write commits"""
+        self.invalidations += self.backend.invalidate(tags)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "stores": self.stores,
+            "invalidations": self.invalidations,
+            **self.backend.usage(),
+        }
+
+
+response_cache = ResponseCache(create_backend(settings.RESPONSE_CACHE_BACKEND))
@@ -0,0 +1,124 @@
+"""Contention-free available-seat counters.
+
+events.available_seats holds a folded base. Changes are written as deltas to
+event_seat_counters, upserted into one of SEAT_COUNTER_SHARDS rows per event
+picked at random, so concurrent bookings of one event rarely touch the same
+row and never the event row. Event.available_seats reads base + sum(deltas).
+A background task folds deltas into the base every
+SEAT_COUNTER_FOLD_SECONDS; reconcile_seat_counts recomputes the counters
+from the seats table.
+"""
+import asyncio
+import logging
+import random
+from collections import defaultdict
+from typing import Optional
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.database import AsyncSessionLocal
+from app.models.models import Event, EventSeatCounter, Seat
+
+logger = logging.getLogger(__name__)
+
+UPSERT_DIALECTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+async def adjust_available_seats(db: AsyncSession, event_id: int, delta: int) -> None:
+    """Record a change to an event's available seats as a sharded delta"""
+    if not delta:
+        return
+    insert = UPSERT_DIALECTS[db.get_bind().dialect.name]
+    stmt = insert(EventSeatCounter).values(
+        event_id=event_id,
+        shard=random.randrange(settings.SEAT_COUNTER_SHARDS),
+        available_delta=delta,
+    )
+    await db.execute(stmt.on_conflict_do_update(
+        index_elements=[EventSeatCounter.event_id, EventSeatCounter.shard],
+        set_={"available_delta": EventSeatCounter.available_delta + stmt.excluded.available_delta},
+    ))
+
+
+async def fold_seat_counters(db: AsyncSession) -> int:
+    """Move pending deltas into events.available_seats; returns events touched"""
+    result = await db.execute(
+        delete(EventSeatCounter).returning(EventSeatCounter.event_id, EventSeatCounter.available_delta)
+    )
+    totals = defaultdict(int)
+    for event_id, delta in result:
+        totals[event_id] += delta
+
+    for event_id, delta in totals.items():
+        if delta:
+            await db.execute(
+                update(Event)
+                .where(Event.id == event_id)
+                .values(available_seats_base=Event.available_seats_base + delta)
+                .execution_options(synchronize_session=False)
+            )
+    return len(totals)
+
+
+async def reconcile_seat_counts(db: AsyncSession, event_id: int) -> Optional[dict]:
+    """Recompute an event's seat counters from its seats"""
+    seats = select(func.count(Seat.id)).where(Seat.event_id == event_id)
+    pending = select(func.coalesce(func.sum(EventSeatCounter.available_delta), 0)).where(
+        EventSeatCounter.event_id == event_id
+    )
+    # One statement, one snapshot: seat states and deltas are read consistently
+    total_seats = await db.scalar(
+        update(Event)
+        .where(Event.id == event_id)
+        .values(
+            total_seats=seats.scalar_subquery(),
+            min_price=select(func.min(Seat.price)).where(Seat.event_id == event_id).scalar_subquery(),
+            available_seats_base=(
+                seats.where(Seat.is_available == True).scalar_subquery() - pending.scalar_subquery()
+            ),
+        )
+        .returning(Event.total_seats)
+        .execution_options(synchronize_session=False)
+    )
+    if total_seats is None:
+        return None
+    available_seats = await db.scalar(select(Event.available_seats).where(Event.id == event_id))
+    return {"event_id": event_id, "total_seats": total_seats, "available_seats": available_seats}
+
+
+class SeatCounterFolder:
+    """Periodically folds seat-counter deltas into events"""
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(settings.SEAT_COUNTER_FOLD_SECONDS)
+            try:
+                async with AsyncSessionLocal() as db:
+                    await fold_seat_counters(db)
+                    await db.commit()
+            except Exception:
+                logger.exception("Seat counter fold failed")
+
+
+seat_counter_folder = SeatCounterFolder()
@@ -0,0 +1,86 @@
+"""In-process fan-out of seat state changes to streaming subscribers.
+
+Changes are coalesced per event for SEAT_STREAM_BATCH_SECONDS, encoded
+once, and pushed to every subscriber queue in one pass. A subscriber whose
+queue is full is not waited on: its backlog is dropped and it is told to
+resync from a fresh snapshot instead.
+"""
+import asyncio
+import json
+from collections import defaultdict
+from typing import Dict, Optional, Set
+
+from app.core.config import settings
+
+# Queue item telling a subscriber its deltas were dropped
+RESYNC = None
+
+
+class SeatSubscription:
+    """One streaming client of an event's seat changes"""
+
+    def __init__(self, event_id: int):
+        self.event_id = event_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=settings.SEAT_STREAM_QUEUE_SIZE)
+
+    def push(self, batch: Optional[str]):
+        try:
+            self.queue.put_nowait(batch)
+        except asyncio.QueueFull:
+            self.resync()
+
+    def resync(self):
+        """Replace the backlog with a single resync marker"""
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(RESYNC)
+
+
+class SeatStatusHub:
+    """Coalesces seat changes per event and fans them out to subscribers"""
+
+    def __init__(self):
+        self._subscribers: Dict[int, Set[SeatSubscription]] = defaultdict(set)
+        self._pending: Dict[int, Dict[int, int]] = {}
+        self._flush_scheduled = False
+
+    def subscribe(self, event_id: int) -> SeatSubscription:
+        subscription = SeatSubscription(event_id)
+        self._subscribers[event_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: SeatSubscription):
+        subscribers = self._subscribers.get(subscription.event_id)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.event_id]
+
+    def subscriber_count(self, event_id: int) -> int:
+        return len(self._subscribers.get(event_id, ()))
+
+    def publish(self, event_id: int, changes: Dict[int, int]):
+        """Queue seat_id -> state changes for the next batch"""
+        if event_id not in self._subscribers:
+            return
+        self._pending.setdefault(event_id, {}).update(changes)
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            asyncio.get_running_loop().call_later(settings.SEAT_STREAM_BATCH_SECONDS, self._flush)
+
+    def resync(self, event_id: int):
+        """Tell every subscriber of event_id to reload its snapshot"""
+        self._pending.pop(event_id, None)
+        for subscription in self._subscribers.get(event_id, ()):
+            subscription.resync()
+
+    def _flush(self):
+        self._flush_scheduled = False
+        pending, self._pending = self._pending, {}
+        for event_id, changes in pending.items():
+            batch = json.dumps({"seats": [[seat_id, state] for seat_id, state in changes.items()]})
+            for subscription in self._subscribers.get(event_id, ()):
+                subscription.push(batch)
+
+
+seat_hub = SeatStatusHub()
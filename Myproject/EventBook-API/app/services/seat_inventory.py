@@ -0,0 +1,99 @@
+"""Set-based seat creation from explicit seat lists or compact layouts"""
+from datetime import datetime
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional
+
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.models import Seat, Event
+from app.services.seat_counters import adjust_available_seats
+from app.schemas.schemas import SeatLayoutSection
+
+
+def row_label_to_number(label: str) -> int:
+    """Spreadsheet-style row label to a 1-based number (A=1, Z=26, AA=27)"""
+    number = 0
+    for char in label.upper():
+        number = number * 26 + ord(char) - ord("A") + 1
+    return number
+
+
+def row_number_to_label(number: int) -> str:
+    """1-based row number back to its label (27 -> AA)"""
+    label = ""
+    while number > 0:
+        number, remainder = divmod(number - 1, 26)
+        label = chr(ord("A") + remainder) + label
+    return label
+
+
+def _section_bounds(section: SeatLayoutSection):
+    first_row = row_label_to_number(section.first_row)
+    last_row = row_label_to_number(section.last_row or section.first_row)
+    if last_row < first_row:
+        raise ValueError(f"Row range {section.first_row}-{section.last_row} is reversed")
+    if section.last_seat < section.first_seat:
+        raise ValueError(f"Seat range {section.first_seat}-{section.last_seat} is reversed")
+    return first_row, last_row, section.first_seat, section.last_seat
+
+
+def layout_size(sections: List[SeatLayoutSection]) -> int:
+    """Validate a layout and return how many seats it expands to"""
+    bounds = [_section_bounds(section) for section in sections]
+
+    # Overlapping sections would create duplicate seats
+    for i, (row_a, row_b, seat_a, seat_b) in enumerate(bounds):
+        for other_row_a, other_row_b, other_seat_a, other_seat_b in bounds[i + 1:]:
+            if row_a <= other_row_b and other_row_a <= row_b and seat_a <= other_seat_b and other_seat_a <= seat_b:
+                raise ValueError("Layout sections overlap")
+
+    return sum((row_b - row_a + 1) * (seat_b - seat_a + 1) for row_a, row_b, seat_a, seat_b in bounds)
+
+
+def expand_layout(event_id: int, sections: List[SeatLayoutSection]) -> Iterator[dict]:
+    """Yield one insert parameter set per seat in the layout"""
+    created_at = datetime.utcnow()
+    for section in sections:
+        first_row, last_row, first_seat, last_seat = _section_bounds(section)
+        for row in range(first_row, last_row + 1):
+            row_label = row_number_to_label(row)
+            for seat in range(first_seat, last_seat + 1):
+                yield {
+                    "event_id": event_id,
+                    "row_number": row_label,
+                    "seat_number": str(seat),
+                    "tier": section.tier,
+                    "price": section.price,
+                    "is_available": True,
+                    "is_reserved": False,
+                    "created_at": created_at,
+                }
+
+
+async def insert_seats(db: AsyncSession, seats: Iterable[dict]) -> int:
+    """Insert seats in executemany batches without building ORM objects"""
+    seats = iter(seats)
+    inserted = 0
+    while True:
+        batch = list(islice(seats, settings.SEAT_INSERT_BATCH_SIZE))
+        if not batch:
+            return inserted
+        await db.execute(insert(Seat.__table__), batch)
+        inserted += len(batch)
+
+
+async def add_seat_counts(db: AsyncSession, event_id: int, count: int, available: Optional[int] = None) -> int:
+    """Change an event's seat counters and from-price in SQL; returns the new total_seats"""
+    await adjust_available_seats(db, event_id, count if available is None else available)
+    return await db.scalar(
+        update(Event)
+        .where(Event.id == event_id)
+        .values(
+            total_seats=Event.total_seats + count,
+            min_price=select(func.min(Seat.price)).where(Seat.event_id == event_id).scalar_subquery(),
+        )
+        .returning(Event.total_seats)
+        .execution_options(synchronize_session=False)
+    )
@@ -0,0 +1,115 @@
+"""Conditional GET: ETag / Last-Modified validators and 304 responses.
+
+Validators come from a fingerprint of what a response shows. For a single
+resource that is its id and updated_at (sent as Last-Modified too). For a
+list page it is the row count, max(updated_at) and sum(id) of the rows the
+page query returns, so edits, inserts and deletions within the page all
+change it. Lists send no Last-Modified: a deletion does not move
+max(updated_at).
+
+Full responses compute the fingerprint from the rows they loaded anyway. A
+conditional request (If-None-Match / If-Modified-Since) first runs the same
+lookup or page query as an aggregate that reads a few indexed columns and
+serializes nothing, and is answered with 304 when the validators match.
+ETags are weak: nested objects embedded in a response are not covered.
+"""
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Iterable, Optional, Sequence
+
+from fastapi import Request, Response
+from sqlalchemy import Select, func, select
+
+
+def entity_tag(*parts) -> str:
+    digest = hashlib.sha256("|".join(map(str, parts)).encode()).hexdigest()[:32]
+    return f'W/"{digest}"'
+
+
+def page_fingerprint(query: Select, modified: str = "updated_at", sums: Sequence[str] = ()) -> Select:
+    """Aggregate over the rows query returns: count, max(modified), sum(id) and sums of columns"""
+    model = query.column_descriptions[0]["entity"]
+    # Same filters, order and limit, but only the columns the fingerprint needs
+    rows = query.with_only_columns(
+        model.id, getattr(model, modified), *(getattr(model, name) for name in sums)
+    ).subquery()
+    return select(
+        func.count(),
+        func.max(rows.c[modified]),
+        func.coalesce(func.sum(rows.c.id), 0),
+        *(func.coalesce(func.sum(rows.c[name]), 0) for name in sums),
+    )
+
+
+def rows_fingerprint(items: Iterable, modified: str = "updated_at", sums: Sequence[str] = ()) -> tuple:
+    """page_fingerprint computed from loaded rows"""
+    items = list(items)
+    stamps = [getattr(item, modified) for item in items if getattr(item, modified) is not None]
+    return (
+        len(items),
+        max(stamps, default=None),
+        sum(item.id for item in items),
+        *(sum(getattr(item, name) or 0 for item in items) for name in sums),
+    )
+
+
+def http_date(value: datetime) -> str:
+    # Columns hold naive UTC
+    return format_datetime(value.replace(microsecond=0, tzinfo=timezone.utc), usegmt=True)
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    """Weak comparison of If-None-Match against etag"""
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in header.split(","))
+
+
+def _parse_http_date(value: str) -> Optional[datetime]:
+    try:
+        parsed = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def is_current(request: Request, etag: Optional[str], last_modified: Optional[str]) -> bool:
+    """Whether the request's preconditions say its cached copy matches these validators"""
+    if_none_match = request.headers.get("if-none-match")
+    # If-None-Match wins over If-Modified-Since when both are sent
+    if if_none_match:
+        return etag is not None and _etag_matches(if_none_match, etag)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified:
+        since, modified = _parse_http_date(if_modified_since), _parse_http_date(last_modified)
+        return since is not None and modified is not None and modified <= since
+    return False
+
+
+class Conditional:
+    """Validators of a GET response, checked against the request's preconditions"""
+
+    def __init__(self, request: Request, response: Response):
+        self.request = request
+        self.response = response
+        self.headers = {}
+
+    @property
+    def requested(self) -> bool:
+        headers = self.request.headers
+        return "if-none-match" in headers or "if-modified-since" in headers
+
+    def validators(self, etag: str, last_modified: Optional[datetime] = None) -> bool:
+        """Send etag (and last_modified) with the response; True if the client's copy is current"""
+        self.headers = {"ETag": etag}
+        if last_modified is not None:
+            self.headers["Last-Modified"] = http_date(last_modified)
+        self.response.headers.update(self.headers)
+        return is_current(self.request, etag, self.headers.get("Last-Modified"))
+
+    def not_modified(self) -> Response:
+        return Response(status_code=304, headers=self.headers)
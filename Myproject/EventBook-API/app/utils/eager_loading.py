@@ -0,0 +1,61 @@
+"""Eager-loading options derived from response schemas.
+
+Nested schema fields whose name matches a relationship of the ORM model are
+loaded with the query: many-to-one relationships with joinedload (same
+query), collections with selectinload (one query each). Serializing a page
+of N rows then costs a fixed number of queries instead of one lazy load per
+row and relationship, and works under AsyncSession, where lazy loads raise.
+"""
+from functools import lru_cache
+from typing import Iterator, Optional, Tuple, Type, get_args
+
+from fastapi import Request
+from pydantic import BaseModel
+from sqlalchemy import inspect
+from sqlalchemy.orm import joinedload, selectinload
+
+
+def schema_of(annotation) -> Optional[Type[BaseModel]]:
+    """Schema inside Optional[...] / List[...] annotations, if any"""
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation
+    for arg in get_args(annotation):
+        schema = schema_of(arg)
+        if schema is not None:
+            return schema
+    return None
+
+
+def _loader_options(model, schema: Type[BaseModel], parent=None) -> Iterator:
+    relationships = inspect(model).relationships
+    for name, field in schema.model_fields.items():
+        nested = schema_of(field.annotation)
+        relationship = relationships.get(name)
+        if nested is None or relationship is None:
+            continue
+
+        loader = selectinload if relationship.uselist else joinedload
+        attribute = getattr(model, name)
+        option = loader(attribute) if parent is None else getattr(parent, loader.__name__)(attribute)
+        yield option
+        yield from _loader_options(relationship.mapper.class_, nested, option)
+
+
+@lru_cache(maxsize=None)
+def eager_options(model, schema) -> Tuple:
+    """Loader options for serializing model instances as schema"""
+    schema = schema_of(schema)
+    if schema is None:
+        return ()
+    return tuple(_loader_options(model, schema))
+
+
+class ResponseLoading:
+    """Eager loads implied by the current route's response_model"""
+
+    def __init__(self, request: Request):
+        route = request.scope.get("route")
+        self.response_model = getattr(route, "response_model", None)
+
+    def options(self, model) -> Tuple:
+        return eager_options(model, self.response_model)
@@ -0,0 +1,228 @@
+"""Idempotency-Key support for mutating routes.
+
+Routers built with route_class=IdempotentRoute honour an Idempotency-Key
+header on POST/PUT/PATCH/DELETE. The first request with a key claims a row
+in idempotency_keys, runs the handler and stores its status, headers and
+body for IDEMPOTENCY_TTL_HOURS; a retry with the same key replays the stored
+response without running the handler again. Keys are scoped to the caller
+and route, and reusing one with a different body is rejected.
+
+Duplicates that arrive while the first request is still running wait for
+it: in-process through a shared future, across workers by polling the
+claimed row. 5xx outcomes are not stored, so those can be retried.
+"""
+import asyncio
+import hashlib
+import json
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, Request, Response
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+from sqlalchemy import delete, update
+from sqlalchemy.exc import IntegrityError
+
+from app.core.config import settings
+from app.core.security import decode_user_id
+from app.db.database import AsyncSessionLocal
+from app.models.models import IdempotencyKey
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MUTATING_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+POLL_SECONDS = 0.1
+# Recomputed for the replayed body
+UNSTORED_HEADERS = {"content-length", "content-type"}
+
+
+@dataclass
+class StoredResponse:
+    request_hash: str
+    status_code: int
+    body: bytes
+    media_type: Optional[str]
+    headers: List[Tuple[str, str]]
+
+
+def _stored_headers(response: Response) -> List[Tuple[str, str]]:
+    """Headers of response worth replaying, such as Location and ETag"""
+    return [
+        (name.decode("latin-1"), value.decode("latin-1"))
+        for name, value in response.raw_headers
+        if name.decode("latin-1").lower() not in UNSTORED_HEADERS
+    ]
+
+
+def _replay(stored: StoredResponse, request_hash: str) -> Response:
+    if stored.request_hash != request_hash:
+        raise HTTPException(status_code=422, detail="Idempotency-Key was already used with a different request")
+    response = Response(content=stored.body, status_code=stored.status_code, media_type=stored.media_type)
+    response.raw_headers.extend(
+        (name.encode("latin-1"), value.encode("latin-1")) for name, value in stored.headers
+    )
+    response.headers[REPLAYED_HEADER] = "true"
+    return response
+
+
+class IdempotencyStore:
+    """Claims, stores and replays responses by idempotency key"""
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    async def run(self, key: str, request_hash: str, call: Callable) -> Response:
+        while True:
+            running = self._inflight.get(key)
+            if running is None:
+                break
+            stored = await asyncio.shield(running)
+            if stored is not None:
+                return _replay(stored, request_hash)
+            # The first request failed without a response; take over
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        stored = None
+        try:
+            claimed = await self._claim(key, request_hash)
+            if claimed is not None:
+                stored = claimed
+                return _replay(stored, request_hash)
+
+            try:
+                response = await call()
+            except HTTPException as exc:
+                response = JSONResponse({"detail": exc.detail}, status_code=exc.status_code, headers=exc.headers)
+            except BaseException:
+                await self._release(key)
+                raise
+
+            body = getattr(response, "body", None)
+            if body is None or response.status_code >= 500:
+                await self._release(key)
+            else:
+                stored = StoredResponse(
+                    request_hash, response.status_code, body, response.media_type, _stored_headers(response)
+                )
+                await self._save(key, stored)
+            return response
+        finally:
+            del self._inflight[key]
+            future.set_result(stored)
+
+    async def _claim(self, key: str, request_hash: str) -> Optional[StoredResponse]:
+        """Claim key for this request, or wait for and return the stored response"""
+        deadline = asyncio.get_running_loop().time() + settings.IDEMPOTENCY_WAIT_SECONDS
+        while True:
+            now = datetime.utcnow()
+            async with AsyncSessionLocal() as db:
+                db.add(IdempotencyKey(
+                    key=key,
+                    request_hash=request_hash,
+                    created_at=now,
+                    expires_at=now + timedelta(hours=settings.IDEMPOTENCY_TTL_HOURS),
+                ))
+                try:
+                    await db.commit()
+                    return None
+                except IntegrityError:
+                    await db.rollback()
+
+                row = await db.get(IdempotencyKey, key)
+                if row is None:
+                    continue
+                if row.expires_at <= now or (
+                    row.status_code is None
+                    and row.created_at <= now - timedelta(seconds=settings.IDEMPOTENCY_LOCK_SECONDS)
+                ):
+                    # Expired, or abandoned by a worker that died mid-request
+                    await db.execute(
+                        delete(IdempotencyKey).where(
+                            IdempotencyKey.key == key,
+                            IdempotencyKey.created_at == row.created_at,
+                        )
+                    )
+                    await db.commit()
+                    continue
+                if row.request_hash != request_hash:
+                    raise HTTPException(
+                        status_code=422,
+                        detail="Idempotency-Key was already used with a different request"
+                    )
+                if row.status_code is not None:
+                    return StoredResponse(
+                        row.request_hash, row.status_code, row.response_body, row.media_type,
+                        [tuple(header) for header in json.loads(row.response_headers or "[]")]
+                    )
+
+            if asyncio.get_running_loop().time() >= deadline:
+                raise HTTPException(
+                    status_code=409,
+                    detail="A request with this Idempotency-Key is still in progress",
+                    headers={"Retry-After": "1"},
+                )
+            await asyncio.sleep(POLL_SECONDS)
+
+    async def _save(self, key: str, stored: StoredResponse):
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(IdempotencyKey)
+                .where(IdempotencyKey.key == key)
+                .values(
+                    status_code=stored.status_code,
+                    response_body=stored.body,
+                    media_type=stored.media_type,
+                    response_headers=json.dumps(stored.headers),
+                )
+            )
+            # Keys are only looked up by value, so expired rows can go whenever one is written
+            await db.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at < datetime.utcnow()))
+            await db.commit()
+
+    async def _release(self, key: str):
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                delete(IdempotencyKey).where(IdempotencyKey.key == key, IdempotencyKey.status_code == None)
+            )
+            await db.commit()
+
+
+idempotency_store = IdempotencyStore()
+
+
+def _caller(request: Request) -> Optional[int]:
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        return decode_user_id(token)
+    except HTTPException:
+        return None
+
+
+class IdempotentRoute(APIRoute):
+    """Route that replays stored responses for repeated Idempotency-Keys"""
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def idempotent_handler(request: Request) -> Response:
+            client_key = request.headers.get(IDEMPOTENCY_HEADER)
+            if client_key is None or request.method not in MUTATING_METHODS:
+                return await handler(request)
+
+            # Anonymous requests fail authentication anyway; let the handler say so
+            user_id = _caller(request)
+            if user_id is None:
+                return await handler(request)
+
+            scope = f"{user_id}:{request.method}:{request.url.path}:{client_key}"
+            key = hashlib.sha256(scope.encode()).hexdigest()
+            request_hash = hashlib.sha256(
+                request.url.query.encode() + b"\0" + await request.body()
+            ).hexdigest()
+            return await idempotency_store.run(key, request_hash, lambda: handler(request))
+
+        return idempotent_handler
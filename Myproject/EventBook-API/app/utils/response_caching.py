@@ -0,0 +1,94 @@
+"""Serve public GET routes from the response cache.
+
+Routers built with route_class=CachedRoute cache the endpoints marked with
+@cached(...). The key is the path plus the query parameters, sorted and
+without empty values, so ?b=2&a=1 and ?a=1&b=2&c= share an entry. A hit is
+answered before dependencies are resolved, so no session is opened. Tag
+templates are filled in from path parameters, e.g. "event:{event_id}".
+"""
+from typing import Callable, Optional
+from urllib.parse import urlencode
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+
+from app.services.response_cache import CachedResponse, response_cache
+from app.utils.conditional import is_current
+
+CACHE_STATUS_HEADER = "X-Cache"
+# Recomputed for whichever body variant is sent
+UNCACHED_HEADERS = {"content-length", "content-encoding", "vary"}
+
+
+def cached(*tags: str, ttl: Optional[int] = None):
+    """Mark a GET endpoint as cacheable, invalidated by tags"""
+    def mark(endpoint):
+        endpoint.cache_tags = tags
+        endpoint.cache_ttl = ttl
+        return endpoint
+    return mark
+
+
+def cache_key(request: Request) -> str:
+    params = sorted((name, value) for name, value in request.query_params.multi_items() if value != "")
+    return f"{request.url.path}?{urlencode(params)}"
+
+
+def cache_tags(tags, request: Request) -> tuple:
+    # "/events/007" must carry the same tag as the event:7 a writer invalidates
+    params = {
+        name: str(int(value)) if value.isdigit() else value
+        for name, value in request.path_params.items()
+    }
+    return tuple(tag.format(**params) for tag in tags)
+
+
+def _respond(entry: CachedResponse, request: Request, cache_status: str) -> Response:
+    headers = dict(entry.headers)
+    validators = {name: value for name, value in headers.items() if name.lower() in ("etag", "last-modified")}
+    if validators and is_current(request, headers.get("etag"), headers.get("last-modified")):
+        return Response(status_code=304, headers={**validators, CACHE_STATUS_HEADER: cache_status})
+    body = entry.body
+    if entry.gzipped is not None and "gzip" in request.headers.get("accept-encoding", ""):
+        body = entry.gzipped
+        headers["Content-Encoding"] = "gzip"
+    headers["Vary"] = "Accept-Encoding"
+    headers[CACHE_STATUS_HEADER] = cache_status
+    return Response(content=body, status_code=entry.status_code, headers=headers)
+
+
+class CachedRoute(APIRoute):
+    """Route that answers marked GET endpoints from the response cache"""
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+        tags = getattr(self.endpoint, "cache_tags", None)
+        if tags is None:
+            return handler
+        ttl = self.endpoint.cache_ttl
+
+        async def cached_handler(request: Request) -> Response:
+            if request.method != "GET":
+                return await handler(request)
+
+            key = cache_key(request)
+            entry = response_cache.lookup(key)
+            if entry is not None:
+                return _respond(entry, request, "HIT")
+
+            entry_tags = cache_tags(tags, request)
+            versions = response_cache.versions(entry_tags)
+            response = await handler(request)
+            body = getattr(response, "body", None)
+            if response.status_code != 200 or body is None:
+                return response
+
+            headers = [
+                (name.decode("latin-1"), value.decode("latin-1"))
+                for name, value in response.raw_headers
+                if name.decode("latin-1").lower() not in UNCACHED_HEADERS
+            ]
+            entry = response_cache.store(key, response.status_code, headers, body, entry_tags, versions, ttl)
+            return _respond(entry, request, "MISS")
+
+        return cached_handler
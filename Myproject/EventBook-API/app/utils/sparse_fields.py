@@ -0,0 +1,81 @@
+"""Sparse fieldsets: ?fields=id,title,start_date on list endpoints.
+
+Requested names are checked against the route's response schema. The query
+then loads only those columns, plus the ones the handler reads itself (sort
+keys, validators), with load_only, and eager-loads only the requested
+relationships. The response is serialized with a schema of just those
+fields, skipping response_model validation of the full one. Without
+?fields= the endpoint behaves as before.
+"""
+from functools import lru_cache
+from typing import Any, List, Optional, Sequence, Tuple, Type
+
+from fastapi import HTTPException, Query, Request, Response
+from pydantic import BaseModel, ConfigDict, TypeAdapter, create_model
+from sqlalchemy import inspect
+from sqlalchemy.orm import load_only
+
+from app.utils.eager_loading import eager_options, schema_of
+
+
+@lru_cache(maxsize=256)
+def partial_schema(schema: Type[BaseModel], fields: Tuple[str, ...]) -> Type[BaseModel]:
+    """schema narrowed to fields"""
+    return create_model(
+        f"{schema.__name__}Fields",
+        __config__=ConfigDict(from_attributes=True),
+        **{name: (schema.model_fields[name].annotation, schema.model_fields[name]) for name in fields},
+    )
+
+
+@lru_cache(maxsize=256)
+def _list_adapter(schema: Type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(List[schema])
+
+
+class SparseFields:
+    """fields query parameter of a list endpoint, checked against its response schema"""
+
+    def __init__(
+        self,
+        request: Request,
+        response: Response,
+        fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,title,start_date")
+    ):
+        route = request.scope.get("route")
+        self.response_model = getattr(route, "response_model", None)
+        self.schema = schema_of(self.response_model)
+        self.response = response
+        self.fields = self._parse(fields)
+
+    def _parse(self, fields: Optional[str]) -> Optional[Tuple[str, ...]]:
+        names = tuple(dict.fromkeys(name.strip() for name in (fields or "").split(",") if name.strip()))
+        if not names or self.schema is None:
+            return None
+        unknown = [name for name in names if name not in self.schema.model_fields]
+        if unknown:
+            raise HTTPException(
+                status_code=422,
+                detail=f"Unknown fields: {', '.join(unknown)} (available: {', '.join(self.schema.model_fields)})"
+            )
+        return names
+
+    def options(self, model, *reads: str) -> Tuple:
+        """Loader options for the requested fields and the columns the handler reads"""
+        if self.fields is None:
+            return eager_options(model, self.response_model)
+        columns = inspect(model).column_attrs
+        loaded = [getattr(model, name) for name in dict.fromkeys((*self.fields, *reads)) if name in columns]
+        return (load_only(*loaded), *eager_options(model, partial_schema(self.schema, self.fields)))
+
+    def render(self, items: Sequence) -> Any:
+        """items as the endpoint's return value, narrowed when fields were requested"""
+        if self.fields is None:
+            return items
+        adapter = _list_adapter(partial_schema(self.schema, self.fields))
+        return Response(
+            content=adapter.dump_json(adapter.validate_python(items, from_attributes=True)),
+            media_type="application/json",
+            # Pagination and validator headers set on the injected response
+            headers=dict(self.response.headers),
+        )
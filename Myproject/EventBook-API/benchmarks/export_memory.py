@@ -0,0 +1,83 @@
+"""Peak RSS of streaming one event's bookings export.
+
+Fills a scratch SQLite database with one event of --bookings confirmed
+bookings (seats, user and event included), then runs export_bookings
+over it and samples the process RSS while the chunks are consumed:
+
+    python -m benchmarks.export_memory --bookings 1000000
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime
+
+DB_PATH = os.path.join(tempfile.mkdtemp(prefix="eventbook-export-"), "export.db")
+# Settings are read on import, so point the app at the scratch database first
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+os.environ.pop("ASYNC_DATABASE_URL", None)
+
+from sqlalchemy import insert  # noqa: E402
+
+from app.db.database import Base, engine  # noqa: E402
+from app.models.models import Booking, BookingStatus, Event, Seat, SeatTier, User  # noqa: E402
+from app.services.exports import export_bookings  # noqa: E402
+
+BATCH = 50_000
+
+
+def rss_mb() -> float:
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+
+
+def seed(bookings: int):
+    Base.metadata.create_all(engine)
+    with engine.begin() as db:
+        db.execute(insert(User).values(id=1, email="export@bench.example", password_hash="-", full_name="Export"))
+        db.execute(insert(Event).values(
+            id=1, title="Export", organizer_id=1, venue="Hall", location="Bench City",
+            start_date=datetime(2030, 1, 1, 19), end_date=datetime(2030, 1, 1, 23),
+        ))
+        for start in range(1, bookings + 1, BATCH):
+            numbers = range(start, min(start + BATCH, bookings + 1))
+            db.execute(insert(Seat), [
+                {"id": number, "event_id": 1, "row_number": f"R{number // 100}", "seat_number": str(number % 100),
+                 "tier": SeatTier.standard, "price": 25.0, "is_available": False}
+                for number in numbers
+            ])
+            db.execute(insert(Booking), [
+                {"id": number, "user_id": 1, "event_id": 1, "seat_id": number, "booking_number": f"BK{number}",
+                 "status": BookingStatus.confirmed, "total_amount": 25.0}
+                for number in numbers
+            ])
+
+
+async def export(export_format: str, compress: bool):
+    base = peak = rss_mb()
+    exported = chunks = 0
+    started = time.perf_counter()
+    async for chunk in export_bookings(1, export_format, compress):
+        exported += len(chunk)
+        chunks += 1
+        if chunks % 20 == 0:
+            peak = max(peak, rss_mb())
+    peak = max(peak, rss_mb())
+    print(
+        f"{export_format}{' gzip' if compress else ''}: {exported / 1e6:.1f} MB in "
+        f"{time.perf_counter() - started:.1f} s, RSS {base:.0f} MB -> peak {peak:.0f} MB (+{peak - base:.1f} MB)"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bookings", type=int, default=1_000_000)
+    args = parser.parse_args()
+    try:
+        seed(args.bookings)
+        for export_format, compress in (("csv", False), ("ndjson", False), ("csv", True)):
+            asyncio.run(export(export_format, compress))
+    finally:
+        shutil.rmtree(os.path.dirname(DB_PATH))
@@ -0,0 +1,104 @@
+"""Booking throughput on a single hot event of a running API.
+
+Seeds an event with --seats seats through the public API, then has
+--clients concurrent buyers book them (POST /bookings/) until every seat
+is taken. Reports bookings/sec and latency, then checks that the event's
+available_seats, folded from its sharded counters, matches the seats still
+available. Run it from the project root with the server's settings (.env),
+since tokens are signed with its SECRET_KEY:
+
+    uvicorn main:app --port 8000
+    python -m benchmarks.hot_event_bookings http://127.0.0.1:8000 --clients 20
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+from collections import Counter
+
+import httpx
+from jose import jwt
+
+from app.core.config import settings
+
+API = "/api/v1"
+ROW_SEATS = 100
+
+
+async def seed(client: httpx.AsyncClient, seats: int, buyers: int) -> tuple:
+    """(buyer headers, organizer headers, event id, seat ids) for a fresh event"""
+    tag = uuid.uuid4().hex[:8]
+
+    async def token(role: str, number: int = 0) -> dict:
+        user = (await client.post(f"{API}/auth/register", json={
+            "email": f"{role}{number}-{tag}@bench.example", "full_name": role, "password": "bench-pass", "role": role,
+        })).json()
+        # Signed here with the server's SECRET_KEY, like the app's own tokens
+        access = jwt.encode({"sub": str(user["id"])}, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+        return {"Authorization": f"Bearer {access}"}
+
+    organizer = await token("organizer")
+    buyer_headers = [await token("user", number) for number in range(buyers)]
+    category = (await client.post(f"{API}/categories/", headers=organizer, json={
+        "name": f"Bench {tag}", "slug": f"bench-{tag}",
+    })).json()
+    event = (await client.post(f"{API}/events/", headers=organizer, json={
+        "title": f"Hot event {tag}", "category_id": category["id"], "venue": "Hall", "location": "Bench City",
+        "start_date": "2030-01-01T19:00:00", "end_date": "2030-01-01T23:00:00",
+    })).json()
+    await client.post(f"{API}/seats/bulk", headers=organizer, json={
+        "event_id": event["id"],
+        "seats": [
+            {"seat_number": str(number % ROW_SEATS + 1), "row_number": f"R{number // ROW_SEATS}",
+             "tier": "Standard", "price": 10.0}
+            for number in range(seats)
+        ],
+    })
+    seat_ids = [seat["id"] for seat in (await client.get(f"{API}/seats/event/{event['id']}")).json()]
+    return buyer_headers, organizer, event["id"], seat_ids
+
+
+async def run(base_url: str, clients: int, seats: int):
+    limits = httpx.Limits(max_connections=clients + 2, max_keepalive_connections=clients + 2)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+        buyers, organizer, event_id, seat_ids = await seed(client, seats, clients)
+        queue = list(reversed(seat_ids))
+        latencies, outcomes = [], Counter()
+
+        async def buyer(headers: dict):
+            while queue:
+                seat_id = queue.pop()
+                started = time.perf_counter()
+                try:
+                    response = await client.post(f"{API}/bookings/", headers=headers, json={
+                        "event_id": event_id, "seat_id": seat_id,
+                    })
+                    outcomes[response.status_code] += 1
+                except httpx.HTTPError as error:
+                    outcomes[type(error).__name__] += 1
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(buyer(headers) for headers in buyers))
+        elapsed = time.perf_counter() - started
+
+        event = (await client.get(f"{API}/events/{event_id}")).json()
+        remaining = sum(seat["is_available"] for seat in (await client.get(f"{API}/seats/event/{event_id}")).json())
+
+    latencies.sort()
+    print(f"{clients} clients, {len(seat_ids)} seats: {outcomes[201] / elapsed:.0f} bookings/s in {elapsed:.1f} s")
+    print(
+        f"latency p50 {statistics.median(latencies) * 1000:.0f} ms, "
+        f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:.0f} ms, outcomes {dict(outcomes)}"
+    )
+    print(f"available_seats {event['available_seats']}, seats still available {remaining}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("base_url")
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--seats", type=int, default=2000)
+    args = parser.parse_args()
+    asyncio.run(run(args.base_url, args.clients, args.seats))
@@ -0,0 +1,93 @@
+"""Requests/sec of a running API under many concurrent clients.
+
+Seeds an organizer, a buyer and an event with one booking through the
+public API, then has --clients concurrent clients fetch that booking
+(GET /bookings/{id}: token check plus booking, event, seat and user loads)
+until --requests have been answered. Point it at a server started from
+any commit to compare them. Run it from the project root with the
+server's settings (.env), since tokens are signed with its SECRET_KEY:
+
+    uvicorn main:app --port 8000
+    python -m benchmarks.load_test http://127.0.0.1:8000 --clients 500
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+from collections import Counter
+
+import httpx
+from jose import jwt
+
+from app.core.config import settings
+
+API = "/api/v1"
+
+
+async def seed(client: httpx.AsyncClient) -> tuple:
+    """(buyer headers, booking id) for a fresh event"""
+    tag = uuid.uuid4().hex[:8]
+
+    async def token(role: str) -> dict:
+        user = (await client.post(f"{API}/auth/register", json={
+            "email": f"{role}-{tag}@bench.example", "full_name": role, "password": "bench-pass", "role": role,
+        })).json()
+        # Signed here with the server's SECRET_KEY, like the app's own tokens
+        access = jwt.encode({"sub": str(user["id"])}, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+        return {"Authorization": f"Bearer {access}"}
+
+    organizer, buyer = await token("organizer"), await token("user")
+    category = (await client.post(f"{API}/categories/", headers=organizer, json={
+        "name": f"Bench {tag}", "slug": f"bench-{tag}",
+    })).json()
+    event = (await client.post(f"{API}/events/", headers=organizer, json={
+        "title": f"Load test {tag}", "category_id": category["id"], "venue": "Hall", "location": "Bench City",
+        "start_date": "2030-01-01T19:00:00", "end_date": "2030-01-01T23:00:00",
+    })).json()
+    seat = (await client.post(f"{API}/seats/", headers=organizer, json={
+        "event_id": event["id"], "seat_number": "1", "row_number": "A", "tier": "VIP", "price": 10.0,
+    })).json()
+    booking = (await client.post(f"{API}/bookings/", headers=buyer, json={
+        "event_id": event["id"], "seat_id": seat["id"],
+    })).json()
+    return buyer, booking["id"]
+
+
+async def run(base_url: str, clients: int, requests: int):
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        headers, booking_id = await seed(client)
+        url = f"{API}/bookings/{booking_id}"
+        latencies, errors, remaining = [], Counter(), requests
+
+        async def worker():
+            nonlocal remaining
+            while remaining > 0:
+                remaining -= 1
+                started = time.perf_counter()
+                try:
+                    response = await client.get(url, headers=headers)
+                    if response.status_code != 200:
+                        errors[f"HTTP {response.status_code}"] += 1
+                except httpx.HTTPError as error:
+                    errors[type(error).__name__] += 1
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(clients)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    print(f"{len(latencies)} requests, {clients} clients, {sum(errors.values())} errors {dict(errors)}")
+    print(f"{len(latencies) / elapsed:.0f} req/s")
+    print(f"p50 {statistics.median(latencies) * 1000:.0f} ms, p99 {latencies[int(len(latencies) * 0.99)] * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("base_url")
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+    asyncio.run(run(args.base_url, args.clients, args.requests))
@@ -0,0 +1,85 @@
+"""Deep-page latency of keyset cursors vs OFFSET on the bookings listing.
+
+Fills a scratch SQLite database with --bookings bookings per user for four
+users, then times the query GET /bookings/ runs for one user's page --page
+(--limit rows each), built by Pagination.apply once with the cursor of the
+previous page and once with skip. Page 1 is timed for reference:
+
+    python -m benchmarks.pagination --bookings 100000 --page 1000
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+DB_PATH = os.path.join(tempfile.mkdtemp(prefix="eventbook-pagination-"), "pagination.db")
+# Settings are read on import, so point the app at the scratch database first
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+os.environ.pop("ASYNC_DATABASE_URL", None)
+
+from sqlalchemy import insert, select  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from app.db.database import Base, engine  # noqa: E402
+from app.models.models import Booking, BookingStatus  # noqa: E402
+from app.utils.pagination import Pagination, encode_cursor  # noqa: E402
+
+USERS = 4
+BATCH = 50_000
+REPEATS = 20
+
+
+def seed(bookings: int):
+    Base.metadata.create_all(engine)
+    started = datetime(2030, 1, 1)
+    with engine.begin() as db:
+        for start in range(0, bookings * USERS, BATCH):
+            db.execute(insert(Booking), [
+                {"user_id": 1 + number % USERS, "event_id": 1, "seat_id": number + 1,
+                 "booking_number": f"BK{number}", "status": BookingStatus.pending, "total_amount": 25.0,
+                 "created_at": started + timedelta(seconds=number)}
+                for number in range(start, min(start + BATCH, bookings * USERS))
+            ])
+
+
+def page_query(limit: int, cursor: str = None, skip: int = 0):
+    """The GET /bookings/ query for user 1"""
+    page = Pagination(request=None, response=None, cursor=cursor)
+    query = select(Booking).where(Booking.user_id == 1)
+    return page.apply(query, Booking.created_at, Booking.id, limit=limit, skip=skip)
+
+
+def timed(db: Session, query) -> tuple:
+    """(booking ids, mean ms) over REPEATS runs of query"""
+    started = time.perf_counter()
+    for _ in range(REPEATS):
+        ids = [booking.id for booking in db.scalars(query)]
+        db.expunge_all()
+    return ids, (time.perf_counter() - started) / REPEATS * 1000
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bookings", type=int, default=100_000, help="Bookings per user")
+    parser.add_argument("--page", type=int, default=1_000)
+    parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args()
+    try:
+        seed(args.bookings)
+        with Session(engine) as db:
+            # Cursor of the last row of the previous page, as the client would hold it
+            previous = db.execute(
+                select(Booking.created_at, Booking.id).where(Booking.user_id == 1)
+                .order_by(Booking.created_at.desc(), Booking.id.desc())
+                .offset((args.page - 1) * args.limit - 1).limit(1)
+            ).one()
+            by_cursor, cursor_ms = timed(db, page_query(args.limit, cursor=encode_cursor(previous)))
+            by_skip, skip_ms = timed(db, page_query(args.limit, skip=(args.page - 1) * args.limit))
+            _, first_ms = timed(db, page_query(args.limit))
+        assert by_cursor == by_skip, "cursor and skip pages differ"
+        print(f"page {args.page:,} of {args.limit}: cursor {cursor_ms:.1f} ms, skip {skip_ms:.1f} ms")
+        print(f"page 1: {first_ms:.1f} ms")
+    finally:
+        shutil.rmtree(os.path.dirname(DB_PATH))
@@ -0,0 +1,89 @@
+"""Size and latency of the full vs compact seat map of one large event.
+
+Fills a scratch SQLite database with one event of --seats seats in rows of
+1,000 (half Standard, half VIP), then fetches GET /seats/event/{event_id}
+in-process as a Seat list and as ?format=compact. Reports the body size,
+gzipped size and best latency over --repeats requests of each:
+
+    python -m benchmarks.seat_map_formats --seats 100000
+"""
+import argparse
+import gzip
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime
+
+DB_PATH = os.path.join(tempfile.mkdtemp(prefix="eventbook-seatmap-"), "seatmap.db")
+# Settings are read on import, so point the app at the scratch database first
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+os.environ.pop("ASYNC_DATABASE_URL", None)
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+
+from app.db.database import Base, engine  # noqa: E402
+from app.models.models import Event, Seat, SeatTier, User  # noqa: E402
+from main import app  # noqa: E402
+
+ROW_SEATS = 1_000
+
+
+def row_label(number: int) -> str:
+    """A, B, ..., Z, AA, AB, ... for 0, 1, 2, ..."""
+    label = ""
+    number += 1
+    while number:
+        number, letter = divmod(number - 1, 26)
+        label = chr(ord("A") + letter) + label
+    return label
+
+
+def seed(seats: int):
+    Base.metadata.create_all(engine)
+    with engine.begin() as db:
+        db.execute(insert(User).values(id=1, email="seatmap@bench.example", password_hash="-", full_name="Seat map"))
+        db.execute(insert(Event).values(
+            id=1, title="Stadium", organizer_id=1, venue="Big", location="Bench City",
+            start_date=datetime(2030, 1, 1, 19), end_date=datetime(2030, 1, 1, 23),
+            total_seats=seats, available_seats=seats,
+        ))
+        db.execute(insert(Seat), [
+            {"event_id": 1, "row_number": row_label(number // ROW_SEATS), "seat_number": str(number % ROW_SEATS + 1),
+             "tier": SeatTier.standard if number % ROW_SEATS < ROW_SEATS // 2 else SeatTier.vip,
+             "price": 50.0 if number % ROW_SEATS < ROW_SEATS // 2 else 150.0,
+             # Every tenth seat sold, so the availability column is not uniform
+             "is_available": number % 10 != 0}
+            for number in range(seats)
+        ])
+
+
+def measure(client: TestClient, params: dict, repeats: int):
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        response = client.get("/api/v1/seats/event/1", params=params)
+        timings.append(time.perf_counter() - started)
+        response.raise_for_status()
+    body = response.content
+    print(
+        f"{params.get('format', 'full')}: {len(body) / 1e6:.2f} MB "
+        f"({len(gzip.compress(body)) / 1e3:.0f} KB gzipped), best of {repeats} {min(timings) * 1000:.0f} ms"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seats", type=int, default=100_000)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+    try:
+        seed(args.seats)
+        with TestClient(app) as client:
+            # Builds the availability index, which a live event already has
+            client.get("/api/v1/seats/event/1", params={"format": "compact"}).raise_for_status()
+            measure(client, {}, args.repeats)
+            measure(client, {"format": "compact"}, args.repeats)
+    finally:
+        shutil.rmtree(os.path.dirname(DB_PATH))
@@ -0,0 +1,125 @@
+"""Fan-out of seat-state deltas to many Server-Sent Events subscribers.
+
+Seeds an event with --seats seats through the public API, opens
+--subscribers streams on GET /seats/event/{event_id}/stream and waits for
+each one's snapshot. A buyer then holds --changes seats one at a time, and
+every subscriber records when each hold reaches it. Reports how long
+subscribing took and the delay from a hold's response to its delivery,
+over all subscribers. Run it from the project root with the server's
+settings (.env), since tokens are signed with its SECRET_KEY:
+
+    uvicorn main:app --port 8000
+    python -m benchmarks.seat_stream http://127.0.0.1:8000 --subscribers 10000
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import uuid
+
+import httpx
+from jose import jwt
+
+from app.core.config import settings
+
+API = "/api/v1"
+
+
+async def seed(client: httpx.AsyncClient, seats: int) -> tuple:
+    """(buyer headers, event id, seat ids) for a fresh event"""
+    tag = uuid.uuid4().hex[:8]
+
+    async def token(role: str) -> dict:
+        user = (await client.post(f"{API}/auth/register", json={
+            "email": f"{role}-{tag}@bench.example", "full_name": role, "password": "bench-pass", "role": role,
+        })).json()
+        # Signed here with the server's SECRET_KEY, like the app's own tokens
+        access = jwt.encode({"sub": str(user["id"])}, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+        return {"Authorization": f"Bearer {access}"}
+
+    organizer, buyer = await token("organizer"), await token("user")
+    category = (await client.post(f"{API}/categories/", headers=organizer, json={
+        "name": f"Bench {tag}", "slug": f"bench-{tag}",
+    })).json()
+    event = (await client.post(f"{API}/events/", headers=organizer, json={
+        "title": f"Stream test {tag}", "category_id": category["id"], "venue": "Hall", "location": "Bench City",
+        "start_date": "2030-01-01T19:00:00", "end_date": "2030-01-01T23:00:00",
+    })).json()
+    await client.post(f"{API}/seats/bulk", headers=organizer, json={
+        "event_id": event["id"],
+        "seats": [
+            {"seat_number": str(number), "row_number": "A", "tier": "Standard", "price": 10.0}
+            for number in range(1, seats + 1)
+        ],
+    })
+    seat_ids = [seat["id"] for seat in (await client.get(f"{API}/seats/event/{event['id']}")).json()]
+    return buyer, event["id"], seat_ids
+
+
+async def subscribe(client: httpx.AsyncClient, event_id: int, ready: asyncio.Event, received: list, stats: dict):
+    """Read one stream, recording (seat_id, arrival) for every delta"""
+    async with client.stream("GET", f"{API}/seats/event/{event_id}/stream") as response:
+        kind = None
+        async for line in response.aiter_lines():
+            if line.startswith("event: "):
+                kind = line[len("event: "):]
+            elif line.startswith("data: "):
+                if kind == "snapshot":
+                    stats["snapshots"] += 1
+                    if stats["snapshots"] == stats["subscribers"]:
+                        ready.set()
+                    elif ready.is_set():
+                        stats["resyncs"] += 1
+                elif kind == "seats":
+                    arrived = time.perf_counter()
+                    received.extend((seat_id, arrived) for seat_id, _ in json.loads(line[len("data: "):])["seats"])
+
+
+async def run(base_url: str, subscribers: int, seats: int, changes: int, interval: float):
+    limits = httpx.Limits(max_connections=subscribers + 10, max_keepalive_connections=subscribers + 10)
+    timeout = httpx.Timeout(120, read=None)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=timeout) as client:
+        buyer, event_id, seat_ids = await seed(client, seats)
+
+        ready = asyncio.Event()
+        received, stats = [], {"subscribers": subscribers, "snapshots": 0, "resyncs": 0}
+        started = time.perf_counter()
+        streams = [
+            asyncio.create_task(subscribe(client, event_id, ready, received, stats))
+            for _ in range(subscribers)
+        ]
+        await ready.wait()
+        print(f"{subscribers} subscribers got their snapshot in {time.perf_counter() - started:.1f} s")
+
+        sent = {}
+        for seat_id in seat_ids[:changes]:
+            response = await client.post(f"{API}/seats/{seat_id}/reserve", headers=buyer)
+            response.raise_for_status()
+            sent[seat_id] = time.perf_counter()
+            await asyncio.sleep(interval)
+        await asyncio.sleep(max(1.0, settings.SEAT_STREAM_BATCH_SECONDS * 10))
+
+        for stream in streams:
+            stream.cancel()
+        await asyncio.gather(*streams, return_exceptions=True)
+
+    delays = [arrived - sent[seat_id] for seat_id, arrived in received if seat_id in sent]
+    delays.sort()
+    print(f"{len(sent)} changes, {len(delays)} of {subscribers * len(sent)} deliveries, {stats['resyncs']} resyncs")
+    if delays:
+        print(
+            f"delivery p50 {statistics.median(delays) * 1000:.0f} ms, "
+            f"p99 {delays[int(len(delays) * 0.99)] * 1000:.0f} ms, max {delays[-1] * 1000:.0f} ms"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("base_url")
+    parser.add_argument("--subscribers", type=int, default=10000)
+    parser.add_argument("--seats", type=int, default=100)
+    parser.add_argument("--changes", type=int, default=50)
+    parser.add_argument("--interval", type=float, default=0.2, help="Seconds between seat changes")
+    args = parser.parse_args()
+    asyncio.run(run(args.base_url, args.subscribers, args.seats, args.changes, args.interval))
@@ -3,8 +3,12 @@ from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
 from app.core.config import settings
-from app.db.database import engine, Base
+from app.db.database import engine, async_engine, AsyncSessionLocal, Base
 from app.api.v1 import api_router
+from app.services.expiry import expiry_engine
+from app.services.tickets import revoked_bookings
+from app.services.seat_counters import seat_counter_folder
+from app.services.event_purge import event_purger
 
 
 @asynccontextmanager
@@ -13,9 +17,19 @@ async def lifespan(app: FastAPI):
     print("🚀 Starting EventBook API...")
     Base.metadata.create_all(bind=engine)
     print("✅ Database tables created")
+    async with AsyncSessionLocal() as db:
+        await revoked_bookings.load(db)
+    await expiry_engine.start()
+    print("⏱️  Expiry engine started")
+    seat_counter_folder.start()
+    await event_purger.start()
     yield
     # Shutdown
     print("👋 Shutting down EventBook API...")
+    await expiry_engine.stop()
+    await seat_counter_folder.stop()
+    await event_purger.stop()
+    await async_engine.dispose()
 
 
 # Initialize FastAPI app
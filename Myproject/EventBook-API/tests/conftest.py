@@ -0,0 +1,108 @@
+import os
+import tempfile
+import uuid
+
+# Settings are read on import, so point the app at a scratch database first
+DB_PATH = os.path.join(tempfile.mkdtemp(prefix="eventbook-tests-"), "test.db")
+os.environ["DATABASE_URL"] = os.environ.get("TEST_DATABASE_URL", f"sqlite:///{DB_PATH}")
+os.environ.pop("ASYNC_DATABASE_URL", None)
+
+import pytest
+import pytest_asyncio
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core.security import create_access_token
+from app.db.database import ASYNC_DATABASE_URL, async_engine, engine
+from main import app
+
+API = "/api/v1"
+
+
+def auth(user_id: int) -> dict:
+    return {"Authorization": f"Bearer {create_access_token({'sub': str(user_id)})}"}
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+def register(client: TestClient, role: str = "user") -> dict:
+    """A new user's auth headers"""
+    response = client.post(f"{API}/auth/register", json={
+        "email": f"{role}-{uuid.uuid4().hex[:10]}@example.com",
+        "full_name": role.title(),
+        "password": "secret-password",
+        "role": role,
+    })
+    assert response.status_code == 201, response.text
+    return auth(response.json()["id"])
+
+
+@pytest.fixture
+def organizer(client) -> dict:
+    return register(client, "organizer")
+
+
+@pytest.fixture
+def buyer(client) -> dict:
+    return register(client)
+
+
+def create_event(client: TestClient, organizer: dict, seats: int = 0, **fields) -> dict:
+    """An event of organizer with seats seats in row A"""
+    slug = f"category-{uuid.uuid4().hex[:10]}"
+    category = client.post(f"{API}/categories/", json={"name": slug, "slug": slug}, headers=organizer).json()
+    response = client.post(f"{API}/events/", headers=organizer, json={
+        "title": "Test Event",
+        "category_id": category["id"],
+        "venue": "Main Hall",
+        "location": "Springfield",
+        "start_date": "2030-06-15T19:00:00",
+        "end_date": "2030-06-15T23:00:00",
+        **fields,
+    })
+    assert response.status_code == 201, response.text
+    event = response.json()
+    if seats:
+        response = client.post(f"{API}/seats/bulk", headers=organizer, json={
+            "event_id": event["id"],
+            "seats": [
+                {"seat_number": str(number), "row_number": "A", "tier": "VIP", "price": 100.0}
+                for number in range(1, seats + 1)
+            ],
+        })
+        assert response.status_code == 201, response.text
+    return event
+
+
+def event_seats(client: TestClient, event_id: int) -> list:
+    return client.get(f"{API}/seats/event/{event_id}").json()
+
+
+@pytest_asyncio.fixture
+async def sessions(client):
+    """Session factory on an engine of the test's own event loop"""
+    # SQLite serializes writers; queued ones wait instead of failing after 5 s
+    engine = create_async_engine(ASYNC_DATABASE_URL, connect_args={"timeout": 120})
+    yield async_sessionmaker(engine, expire_on_commit=False, autoflush=False)
+    await engine.dispose()
+
+
+@pytest.fixture
+def statements():
+    """SQL statements the app runs while the test does, in order"""
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    engines = (engine, async_engine.sync_engine)
+    for target in engines:
+        event.listen(target, "before_cursor_execute", record)
+    yield executed
+    for target in engines:
+        event.remove(target, "before_cursor_execute", record)
@@ -0,0 +1,45 @@
+import pytest
+
+from app.core.config import settings
+from app.services.availability import seat_availability
+from tests.conftest import API, create_event
+
+
+@pytest.mark.parametrize("params", ["tier=Balcony", "tier=Balcony&format=compact"])
+def test_unknown_tier_is_rejected(client, organizer, params):
+    event = create_event(client, organizer, seats=2)
+    assert client.get(f"{API}/seats/event/{event['id']}?{params}").status_code == 422
+
+
+def test_known_tier_filters_seats(client, organizer):
+    event = create_event(client, organizer, seats=2)
+    assert len(client.get(f"{API}/seats/event/{event['id']}?tier=VIP").json()) == 2
+    assert client.get(f"{API}/seats/event/{event['id']}?tier=Economy").json() == []
+
+
+def test_least_recently_used_index_is_dropped(client, organizer, monkeypatch):
+    monkeypatch.setattr(settings, "SEAT_INDEX_MAX_EVENTS", 2)
+    events = [create_event(client, organizer, seats=1) for _ in range(3)]
+    for event in events:
+        client.get(f"{API}/seats/event/{event['id']}")
+
+    assert seat_availability.peek(events[0]["id"]) is None
+    assert seat_availability.peek(events[1]["id"]) is not None
+    assert seat_availability.peek(events[2]["id"]) is not None
+
+
+def test_expired_index_is_dropped(client, organizer, monkeypatch):
+    event = create_event(client, organizer, seats=1)
+    client.get(f"{API}/seats/event/{event['id']}")
+    monkeypatch.setattr(settings, "SEAT_INDEX_TTL_SECONDS", 0)
+    client.get(f"{API}/seats/event/{create_event(client, organizer)['id']}")
+
+    assert seat_availability.peek(event["id"]) is None
+
+
+def test_unknown_events_leave_no_rebuild_state(client):
+    for event_id in range(900000, 900050):
+        assert client.get(f"{API}/seats/event/{event_id}").json() == []
+
+    assert not any(event_id >= 900000 for event_id in seat_availability._locks)
+    assert not any(event_id >= 900000 for event_id in seat_availability._generations)
@@ -0,0 +1,45 @@
+import pytest
+
+from tests.conftest import API, create_event, event_seats, register
+
+
+def attended_event(client, organizer, attendees: int) -> tuple:
+    """(event, attendee headers) of an event whose attendees each booked, checked in and reviewed"""
+    event = create_event(client, organizer, seats=attendees)
+    buyers = []
+    for seat in event_seats(client, event["id"]):
+        buyer = register(client)
+        booking = client.post(f"{API}/bookings/", headers=buyer, json={"event_id": event["id"], "seat_id": seat["id"]})
+        client.post(f"{API}/bookings/verify-qr", headers=organizer, json={"qr_code": booking.json()["qr_code"]})
+        review = client.post(f"{API}/reviews/", headers=buyer, json={"event_id": event["id"], "rating": 4})
+        assert review.status_code == 201, review.text
+        buyers.append(buyer)
+    return event, buyers
+
+
+# Queries per request, the current-user lookup included: one per page however many rows it holds
+@pytest.mark.parametrize("attendees", [1, 4])
+@pytest.mark.parametrize("route, as_organizer, queries", [
+    ("/bookings/event/{event_id}/bookings", True, 3),
+    ("/events/{event_id}", False, 1),
+    ("/events/organizer/my-events", True, 2),
+    ("/reviews/event/{event_id}", False, 1),
+])
+def test_page_queries_do_not_grow_with_rows(client, organizer, statements, attendees, route, as_organizer, queries):
+    event, _ = attended_event(client, organizer, attendees)
+    statements.clear()
+    response = client.get(API + route.format(event_id=event["id"]), headers=organizer if as_organizer else {})
+
+    assert response.status_code == 200, response.text
+    assert len(statements) == queries, statements
+
+
+def test_nested_booking_details_come_with_the_booking(client, organizer, statements):
+    event, (buyer,) = attended_event(client, organizer, 1)
+    booking_id = client.get(f"{API}/bookings/", headers=buyer).json()[0]["id"]
+    statements.clear()
+    booking = client.get(f"{API}/bookings/{booking_id}", headers=buyer).json()
+
+    assert (booking["event"]["id"], booking["seat"]["row_number"]) == (event["id"], "A")
+    assert booking["user"]["id"] == booking["user_id"]
+    assert len(statements) == 2, statements
@@ -0,0 +1,112 @@
+import time
+
+import pytest
+from sqlalchemy import insert, select, update
+
+from app.db.database import engine
+from app.models.models import Booking, BookingStatus, Event, Payment, PaymentStatus
+from app.services.event_purge import EventPurger, event_purger
+from tests.conftest import API, create_event, event_seats
+
+
+def book(client, buyer, event_id: int, seat_id: int) -> dict:
+    response = client.post(f"{API}/bookings/", headers=buyer, json={"event_id": event_id, "seat_id": seat_id})
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def set_booking(booking_id: int, status: BookingStatus):
+    with engine.begin() as db:
+        db.execute(update(Booking).where(Booking.id == booking_id).values(status=status))
+
+
+def add_payment(booking_id: int, status: PaymentStatus):
+    with engine.begin() as db:
+        db.execute(insert(Payment).values(booking_id=booking_id, amount=100.0, status=status))
+
+
+def purge_status(client, organizer, event_id: int) -> dict:
+    for _ in range(200):
+        purge = client.get(f"{API}/events/{event_id}/purge", headers=organizer).json()
+        if purge["status"] in ("done", "failed"):
+            return purge
+        time.sleep(0.02)
+    return purge
+
+
+@pytest.fixture
+def purging_event(client, organizer, monkeypatch) -> tuple:
+    """(event, seats) of an event whose deletion was accepted but not yet run"""
+    event = create_event(client, organizer, seats=4)
+    seats = event_seats(client, event["id"])
+    monkeypatch.setattr(event_purger, "schedule", lambda event_id: None)
+    assert client.delete(f"{API}/events/{event['id']}", headers=organizer).status_code == 202
+    return event, seats
+
+
+def test_event_being_deleted_is_not_on_sale(client, buyer, purging_event):
+    event, seats = purging_event
+    attempts = [
+        client.post(f"{API}/seats/{seats[0]['id']}/reserve", headers=buyer),
+        client.post(f"{API}/seats/event/{event['id']}/best-available", headers=buyer, json={"quantity": 2}),
+        client.post(f"{API}/bookings/", headers=buyer, json={"event_id": event["id"], "seat_id": seats[1]["id"]}),
+        client.post(f"{API}/bookings/cart", headers=buyer, json={"event_id": event["id"], "seat_ids": [seats[2]["id"]]}),
+    ]
+    for response in attempts:
+        assert response.status_code == 400, response.text
+        assert response.json()["detail"] == "Event is not on sale"
+
+
+def test_deactivated_event_is_not_on_sale(client, organizer, buyer):
+    event = create_event(client, organizer, seats=1)
+    seat = event_seats(client, event["id"])[0]
+    assert client.put(f"{API}/events/{event['id']}", headers=organizer, json={"is_active": False}).status_code == 200
+
+    response = client.post(f"{API}/bookings/", headers=buyer, json={"event_id": event["id"], "seat_id": seat["id"]})
+    assert response.status_code == 400
+
+
+def test_sale_racing_the_purge_fails_it(client, organizer, buyer, purging_event):
+    event, seats = purging_event
+    # Sold by a claim that read the event as active before the DELETE committed
+    with engine.begin() as db:
+        db.execute(update(Event).where(Event.id == event["id"]).values(is_active=True))
+    booking = book(client, buyer, event["id"], seats[0]["id"])
+    with engine.begin() as db:
+        db.execute(update(Event).where(Event.id == event["id"]).values(is_active=False))
+
+    EventPurger.schedule(event_purger, event["id"])
+    purge = purge_status(client, organizer, event["id"])
+
+    assert purge["status"] == "failed"
+    assert "pending or confirmed" in purge["error"]
+    with engine.connect() as db:
+        assert db.scalar(select(Booking.status).where(Booking.id == booking["id"])) == BookingStatus.pending
+        assert db.scalar(select(Event.id).where(Event.id == event["id"])) == event["id"]
+
+
+def test_event_with_payment_records_is_not_purged(client, organizer, buyer):
+    event = create_event(client, organizer, seats=1)
+    booking = book(client, buyer, event["id"], event_seats(client, event["id"])[0]["id"])
+    set_booking(booking["id"], BookingStatus.cancelled)
+    add_payment(booking["id"], PaymentStatus.refunded)
+
+    response = client.delete(f"{API}/events/{event['id']}", headers=organizer)
+    assert response.status_code == 409
+    assert "financial records" in response.json()["detail"]
+
+
+def test_purge_removes_cancelled_bookings_and_unpaid_payments(client, organizer, buyer):
+    event = create_event(client, organizer, seats=2)
+    seats = event_seats(client, event["id"])
+    bookings = [book(client, buyer, event["id"], seat["id"]) for seat in seats]
+    for booking, status in zip(bookings, (PaymentStatus.pending, PaymentStatus.failed)):
+        set_booking(booking["id"], BookingStatus.cancelled)
+        add_payment(booking["id"], status)
+
+    assert client.delete(f"{API}/events/{event['id']}", headers=organizer).status_code == 202
+    assert purge_status(client, organizer, event["id"])["status"] == "done"
+    with engine.connect() as db:
+        booking_ids = [booking["id"] for booking in bookings]
+        assert db.scalars(select(Booking.id).where(Booking.id.in_(booking_ids))).all() == []
+        assert db.scalars(select(Payment.id).where(Payment.booking_id.in_(booking_ids))).all() == []
@@ -0,0 +1,14 @@
+from app.core.config import settings
+from tests.conftest import API, create_event
+
+
+def test_nearby_search_is_not_capped_by_relevance_candidates(client, organizer, monkeypatch):
+    title = "Zanzibar Quartet"
+    near = create_event(client, organizer, title=title, latitude=40.0, longitude=-75.0)
+    # Newer text matches, far away, fill the ranking's candidate pool
+    create_event(client, organizer, title=title, latitude=-33.9, longitude=151.2)
+    monkeypatch.setattr(settings, "SEARCH_RANK_CANDIDATES", 1)
+
+    response = client.get(f"{API}/events/", params={"search": "Zanzibar", "near": "40.01,-75.01", "radius_km": 10})
+    assert response.status_code == 200, response.text
+    assert [event["id"] for event in response.json()] == [near["id"]]
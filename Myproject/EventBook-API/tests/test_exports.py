@@ -0,0 +1,63 @@
+import tracemalloc
+
+from sqlalchemy import insert
+
+from app.db.database import engine
+from app.models.models import Booking, BookingStatus, Seat, SeatTier
+from app.services.exports import export_bookings
+from tests.conftest import API, create_event
+
+
+def seed_bookings(client, organizer, count: int) -> int:
+    """Id of an event with count confirmed bookings, inserted directly"""
+    event = create_event(client, organizer)
+    user_id = client.get(f"{API}/users/me", headers=organizer).json()["id"]
+    with engine.begin() as db:
+        seat_ids = db.scalars(insert(Seat).returning(Seat.id), [
+            {"event_id": event["id"], "row_number": f"R{number // 100}", "seat_number": str(number % 100),
+             "tier": SeatTier.standard, "price": 25.0, "is_available": False}
+            for number in range(count)
+        ]).all()
+        db.execute(insert(Booking), [
+            {"user_id": user_id, "event_id": event["id"], "seat_id": seat_id,
+             "booking_number": f"EXP-{event['id']}-{seat_id}", "status": BookingStatus.confirmed,
+             "total_amount": 25.0}
+            for seat_id in seat_ids
+        ])
+    return event["id"]
+
+
+def export_peak(client, event_id: int, export_format: str) -> tuple:
+    """(bytes exported, peak bytes allocated meanwhile) for a full export"""
+    async def consume():
+        exported = 0
+        async for chunk in export_bookings(event_id, export_format):
+            exported += len(chunk)
+        return exported
+
+    tracemalloc.start()
+    try:
+        # On the app's event loop, where its async engine's connections live
+        exported = client.portal.call(consume)
+        return exported, tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def test_export_memory_stays_flat(client, organizer):
+    small, large = seed_bookings(client, organizer, 5_000), seed_bookings(client, organizer, 50_000)
+    for export_format in ("csv", "ndjson"):
+        small_bytes, small_peak = export_peak(client, small, export_format)
+        large_bytes, large_peak = export_peak(client, large, export_format)
+
+        assert large_bytes > 9 * small_bytes
+        # Ten times the rows, not ten times the memory: peak is one batch, not the export
+        assert large_peak < 1.5 * small_peak, (small_peak, large_peak)
+        assert large_peak < 4 * 1024 * 1024
+
+
+def test_export_response_streams_every_booking(client, organizer):
+    event_id = seed_bookings(client, organizer, 2_500)
+    response = client.get(f"{API}/bookings/event/{event_id}/export", params={"format": "csv"}, headers=organizer)
+    assert response.status_code == 200
+    assert len(response.text.splitlines()) == 2_501
@@ -0,0 +1,67 @@
+from sqlalchemy import update
+
+from app.db.database import AsyncSessionLocal, engine
+from app.models.models import OrganizerStat
+from app.services import organizer_stats
+from tests.conftest import API, create_event, event_seats
+from tests.test_event_purge import book, purge_status
+from tests.test_payments import confirm
+
+
+def totals(client, organizer_id: int) -> tuple:
+    """(rollup, recount) of organizer_id"""
+    async def read():
+        async with AsyncSessionLocal() as db:
+            return (
+                (await organizer_stats.rollup(db, organizer_id)).get(organizer_id),
+                (await organizer_stats.recount(db, organizer_id)).get(organizer_id),
+            )
+
+    return client.portal.call(read)
+
+
+def cli(client, *argv: str) -> int:
+    return client.portal.call(organizer_stats.main, list(argv))
+
+
+def test_rollup_follows_bookings_cancellations_and_purges(client, organizer, buyer):
+    organizer_id = client.get(f"{API}/users/me", headers=organizer).json()["id"]
+    kept, purged = create_event(client, organizer, seats=2), create_event(client, organizer, seats=1)
+
+    paid, cancelled = (book(client, buyer, kept["id"], seat["id"]) for seat in event_seats(client, kept["id"]))
+    payment = client.post(f"{API}/payments/", headers=buyer, json={"booking_id": paid["id"], "amount": 100.0}).json()
+    assert confirm(client, buyer, payment["id"]).status_code == 200
+    assert client.put(f"{API}/bookings/{cancelled['id']}/cancel", headers=buyer).status_code == 200
+
+    dropped = book(client, buyer, purged["id"], event_seats(client, purged["id"])[0]["id"])
+    assert client.put(f"{API}/bookings/{dropped['id']}/cancel", headers=buyer).status_code == 200
+    assert client.delete(f"{API}/events/{purged['id']}", headers=organizer).status_code == 202
+    assert purge_status(client, organizer, purged["id"])["status"] == "done"
+
+    stored, counted = totals(client, organizer_id)
+    assert stored == counted
+    assert counted == {
+        "total_events": 1, "active_events": 1, "total_bookings": 2, "total_attendees": 1, "total_revenue": 100.0,
+    }
+
+
+def test_verify_reports_and_rebuild_fixes_a_corrupted_rollup(client, organizer, buyer, capsys):
+    organizer_id = client.get(f"{API}/users/me", headers=organizer).json()["id"]
+    event = create_event(client, organizer, seats=1)
+    book(client, buyer, event["id"], event_seats(client, event["id"])[0]["id"])
+    assert cli(client, "verify", "--organizer", str(organizer_id)) == 0
+
+    with engine.begin() as db:
+        db.execute(
+            update(OrganizerStat)
+            .where(OrganizerStat.organizer_id == organizer_id)
+            .values(total_bookings=OrganizerStat.total_bookings + 5)
+        )
+    capsys.readouterr()
+    assert cli(client, "verify", "--organizer", str(organizer_id)) == 1
+    assert f"organizer {organizer_id}: total_bookings" in capsys.readouterr().out
+
+    assert cli(client, "rebuild", "--organizer", str(organizer_id)) == 0
+    stored, counted = totals(client, organizer_id)
+    assert stored == counted
+    assert counted["total_bookings"] == 1
@@ -0,0 +1,35 @@
+import base64
+import json
+
+import pytest
+
+from tests.conftest import API, create_event, event_seats
+
+
+def crafted(values) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).rstrip(b"=").decode()
+
+
+@pytest.mark.parametrize("cursor", [crafted([{}, 1]), crafted([1, 1]), crafted({"a": 1}), "not-base64!", "e30"])
+def test_malformed_cursor_is_rejected(client, buyer, cursor):
+    response = client.get(f"{API}/bookings/", params={"cursor": cursor}, headers=buyer)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+
+
+def test_cursor_pages_through_every_booking(client, organizer, buyer):
+    event = create_event(client, organizer, seats=3)
+    booked = {
+        client.post(f"{API}/bookings/", headers=buyer, json={"event_id": event["id"], "seat_id": seat["id"]}).json()["id"]
+        for seat in event_seats(client, event["id"])
+    }
+
+    seen, params = [], {"limit": 1}
+    while True:
+        response = client.get(f"{API}/bookings/", params=params, headers=buyer)
+        assert response.status_code == 200
+        seen += [booking["id"] for booking in response.json()]
+        if "X-Next-Cursor" not in response.headers:
+            break
+        params = {"limit": 1, "cursor": response.headers["X-Next-Cursor"]}
+    assert len(seen) == 3 and set(seen) == booked
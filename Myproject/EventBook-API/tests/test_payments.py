@@ -0,0 +1,211 @@
+import asyncio
+import hashlib
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import APIRouter, HTTPException, Response
+from sqlalchemy import event, insert, update
+
+from app.core.config import settings
+from app.core.security import decode_user_id
+from app.db.database import engine
+from app.models.models import Booking, BookingStatus, IdempotencyKey
+from app.utils.idempotency import IdempotentRoute
+from main import app
+from tests.conftest import API, create_event, event_seats
+
+
+def book_and_pay(client, organizer, buyer) -> tuple:
+    """(booking, payment) for a new pending booking of buyer"""
+    event = create_event(client, organizer, seats=1)
+    seat = event_seats(client, event["id"])[0]
+    booking = client.post(f"{API}/bookings/", headers=buyer, json={"event_id": event["id"], "seat_id": seat["id"]})
+    assert booking.status_code == 201, booking.text
+    payment = client.post(f"{API}/payments/", headers=buyer, json={"booking_id": booking.json()["id"], "amount": 100.0})
+    assert payment.status_code == 201, payment.text
+    return booking.json(), payment.json()
+
+
+def confirm(client, buyer, payment_id: int):
+    return client.put(
+        f"{API}/payments/{payment_id}/confirm",
+        params={"payment_intent_id": f"pi_{payment_id}", "payment_method": "card"},
+        headers=buyer,
+    )
+
+
+def booking_status(client, buyer, booking_id: int) -> str:
+    return client.get(f"{API}/bookings/{booking_id}", headers=buyer).json()["status"]
+
+
+def test_confirm_pays_a_pending_booking(client, organizer, buyer):
+    booking, payment = book_and_pay(client, organizer, buyer)
+
+    response = confirm(client, buyer, payment["id"])
+    assert response.status_code == 200, response.text
+    assert response.json()["status"] == "completed"
+    assert booking_status(client, buyer, booking["id"]) == "confirmed"
+    assert confirm(client, buyer, payment["id"]).status_code == 400
+
+
+def test_confirm_loses_to_expiry_cancelling_in_between(client, organizer, buyer):
+    booking, payment = book_and_pay(client, organizer, buyer)
+
+    expired = []
+
+    def expire_first(conn, cursor, statement, parameters, context, executemany):
+        # The expiry engine commits its cancel after the route has read the booking as pending
+        if statement.startswith("UPDATE bookings SET status") and not expired:
+            expired.append(booking["id"])
+            with engine.begin() as other:
+                other.execute(update(Booking).where(Booking.id == booking["id"]).values(status=BookingStatus.cancelled))
+
+    event.listen(engine, "before_cursor_execute", expire_first)
+    try:
+        response = confirm(client, buyer, payment["id"])
+    finally:
+        event.remove(engine, "before_cursor_execute", expire_first)
+
+    assert response.status_code == 400
+    assert booking_status(client, buyer, booking["id"]) == "cancelled"
+    assert client.get(f"{API}/payments/{payment['id']}", headers=buyer).json()["status"] == "pending"
+
+
+def pay(client, buyer, booking_id: int, key: str, amount: float = 100.0):
+    return client.post(
+        f"{API}/payments/", headers={**buyer, "Idempotency-Key": key}, json={"booking_id": booking_id, "amount": amount}
+    )
+
+
+def test_retried_payment_is_replayed(client, organizer, buyer):
+    event = create_event(client, organizer, seats=1)
+    seat = event_seats(client, event["id"])[0]
+    booking = client.post(f"{API}/bookings/", headers=buyer, json={"event_id": event["id"], "seat_id": seat["id"]}).json()
+    key = uuid.uuid4().hex
+
+    first, retry = pay(client, buyer, booking["id"], key), pay(client, buyer, booking["id"], key)
+    assert first.status_code == retry.status_code == 201
+    assert retry.json() == first.json()
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in first.headers
+
+    # Same key, different body
+    assert pay(client, buyer, booking["id"], key, amount=1.0).status_code == 422
+
+
+# Stand-in for a slow or failing mutating route, with headers worth replaying
+idempotent_router = APIRouter(route_class=IdempotentRoute)
+handled = []
+
+
+@idempotent_router.post("/created", status_code=201)
+async def create_thing(response: Response, delay: float = 0):
+    handled.append("created")
+    await asyncio.sleep(delay)
+    number = len(handled)
+    response.headers["Location"] = f"/things/{number}"
+    response.headers["ETag"] = f'"{number}"'
+    return {"number": number}
+
+
+@idempotent_router.post("/broken")
+async def broken_thing():
+    handled.append("broken")
+    raise HTTPException(status_code=503, detail="Try again")
+
+
+@pytest.fixture(scope="module")
+def idempotent_routes(client):
+    app.include_router(idempotent_router, prefix="/idempotency-test")
+    yield "/idempotency-test"
+    app.router.routes[:] = [
+        route for route in app.router.routes if not getattr(route, "path", "").startswith("/idempotency-test")
+    ]
+
+
+def test_replay_keeps_the_first_response_headers(client, buyer, idempotent_routes):
+    headers = {**buyer, "Idempotency-Key": uuid.uuid4().hex}
+    first = client.post(f"{idempotent_routes}/created", headers=headers)
+    retry = client.post(f"{idempotent_routes}/created", headers=headers)
+
+    assert retry.status_code == 201
+    assert retry.json() == first.json()
+    assert retry.headers["Location"] == first.headers["Location"]
+    assert retry.headers["ETag"] == first.headers["ETag"]
+
+
+def test_concurrent_duplicate_waits_for_the_first_request(client, buyer, idempotent_routes):
+    headers = {**buyer, "Idempotency-Key": uuid.uuid4().hex}
+    handled.clear()
+
+    def post():
+        return client.post(f"{idempotent_routes}/created", params={"delay": 0.5}, headers=headers)
+
+    with ThreadPoolExecutor(2) as pool:
+        responses = list(pool.map(lambda _: post(), range(2)))
+
+    assert handled == ["created"]
+    assert responses[0].json() == responses[1].json()
+    assert sorted(response.headers.get("Idempotent-Replayed", "") for response in responses) == ["", "true"]
+
+
+def test_server_errors_are_not_stored(client, buyer, idempotent_routes):
+    headers = {**buyer, "Idempotency-Key": uuid.uuid4().hex}
+    handled.clear()
+
+    assert client.post(f"{idempotent_routes}/broken", headers=headers).status_code == 503
+    assert client.post(f"{idempotent_routes}/broken", headers=headers).status_code == 503
+    assert handled == ["broken", "broken"]
+
+
+def claim_elsewhere(buyer, path: str, client_key: str) -> str:
+    """Key of a request another worker has claimed and is still running"""
+    user_id = decode_user_id(buyer["Authorization"].split()[1])
+    key = hashlib.sha256(f"{user_id}:POST:{path}:{client_key}".encode()).hexdigest()
+    request_hash = hashlib.sha256(b"\0").hexdigest()
+    now = datetime.utcnow()
+    with engine.begin() as db:
+        db.execute(insert(IdempotencyKey).values(
+            key=key, request_hash=request_hash, created_at=now, expires_at=now + timedelta(hours=1)
+        ))
+    return key
+
+
+def test_duplicate_polls_a_request_running_on_another_worker(client, buyer, idempotent_routes):
+    client_key = uuid.uuid4().hex
+    path = f"{idempotent_routes}/created"
+    key = claim_elsewhere(buyer, path, client_key)
+    handled.clear()
+
+    def finish():
+        time.sleep(0.3)
+        with engine.begin() as db:
+            db.execute(update(IdempotencyKey).where(IdempotencyKey.key == key).values(
+                status_code=201, response_body=b'{"number": 42}', media_type="application/json",
+                response_headers='[["location", "/things/42"]]',
+            ))
+
+    worker = threading.Thread(target=finish)
+    worker.start()
+    response = client.post(path, headers={**buyer, "Idempotency-Key": client_key})
+    worker.join()
+
+    assert handled == []
+    assert response.status_code == 201
+    assert response.json() == {"number": 42}
+    assert response.headers["Location"] == "/things/42"
+
+
+def test_duplicate_gives_up_on_a_request_that_runs_too_long(client, buyer, idempotent_routes, monkeypatch):
+    client_key = uuid.uuid4().hex
+    path = f"{idempotent_routes}/created"
+    claim_elsewhere(buyer, path, client_key)
+    monkeypatch.setattr(settings, "IDEMPOTENCY_WAIT_SECONDS", 0)
+
+    response = client.post(path, headers={**buyer, "Idempotency-Key": client_key})
+    assert response.status_code == 409
+    assert response.headers["Retry-After"] == "1"
@@ -0,0 +1,111 @@
+import asyncio
+import time
+
+import pytest
+from sqlalchemy import event as sql_event, select, update
+from sqlalchemy.dialects import postgresql
+
+from app.db.database import async_engine, engine
+from app.models.models import Booking, BookingStatus, Seat
+from app.services import reservations
+from tests.conftest import API, create_event, event_seats, register
+
+CLAIMS = 2000
+
+
+@pytest.mark.asyncio
+async def test_concurrent_claims_have_one_winner(client, organizer, sessions):
+    event = create_event(client, organizer, seats=1)
+    seat_id = event_seats(client, event["id"])[0]["id"]
+    latencies = []
+
+    async def claim(user_id: int) -> bool:
+        started = time.perf_counter()
+        async with sessions() as db:
+            claimed, _ = await reservations.hold_seats(db, [seat_id], user_id, event["id"])
+            await db.commit()
+        latencies.append(time.perf_counter() - started)
+        return bool(claimed)
+
+    results = await asyncio.gather(*(claim(100000 + n) for n in range(CLAIMS)))
+
+    assert sum(results) == 1
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99)]
+    print(f"\n{CLAIMS} concurrent claims: p50 {latencies[len(latencies) // 2] * 1000:.1f} ms, p99 {p99 * 1000:.1f} ms")
+
+
+def test_second_buyer_cannot_hold_a_held_seat(client, organizer, buyer):
+    event = create_event(client, organizer, seats=1)
+    seat_id = event_seats(client, event["id"])[0]["id"]
+
+    assert client.post(f"{API}/seats/{seat_id}/reserve", headers=buyer).status_code == 200
+    assert client.post(f"{API}/seats/{seat_id}/reserve", headers=buyer).status_code == 200  # Own hold renews
+    response = client.post(f"{API}/seats/{seat_id}/reserve", headers=register(client))
+    assert response.status_code == 400
+
+
+class RecordingSession:
+    def __init__(self):
+        self.statements = []
+
+    async def execute(self, statement):
+        self.statements.append(str(statement.compile(dialect=postgresql.dialect())))
+
+        class Result:
+            def all(self):
+                return []
+        return Result()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("call, skips_locked", [
+    (lambda db: reservations.hold_seats(db, [1], 1), True),
+    (lambda db: reservations.sell_seats(db, [1], 1, 1), True),
+    (lambda db: reservations.release_seats(db, [1], 1), False),
+    (lambda db: reservations.restock_seats(db, [1]), False),
+])
+async def test_only_buyer_claims_skip_locked_rows(call, skips_locked):
+    # A restock or release that skipped a locked row would leave the seat off sale for good
+    db = RecordingSession()
+    await call(db)
+    assert ("SKIP LOCKED" in db.statements[0]) == skips_locked
+
+
+def test_stale_cancel_does_not_restock_a_resold_seat(client, organizer, buyer):
+    event = create_event(client, organizer, seats=1)
+    seat_id = event_seats(client, event["id"])[0]["id"]
+    booking = client.post(f"{API}/bookings/", headers=buyer, json={"event_id": event["id"], "seat_id": seat_id}).json()
+
+    expired = []
+
+    def expire_and_resell(conn, cursor, statement, parameters, context, executemany):
+        # After the route has read the booking as pending, the expiry engine cancels it
+        # and restocks the seat, and another buyer books it
+        if statement.startswith("UPDATE bookings SET status") and not expired:
+            expired.append(booking["id"])
+            with engine.begin() as other:
+                other.execute(update(Booking).where(Booking.id == booking["id"]).values(status=BookingStatus.cancelled))
+                other.execute(update(Seat).where(Seat.id == seat_id).values(is_available=False))
+
+    sql_event.listen(async_engine.sync_engine, "before_cursor_execute", expire_and_resell)
+    try:
+        response = client.put(f"{API}/bookings/{booking['id']}/cancel", headers=buyer)
+    finally:
+        sql_event.remove(async_engine.sync_engine, "before_cursor_execute", expire_and_resell)
+
+    assert response.status_code == 400
+    with engine.connect() as db:
+        assert db.scalar(select(Seat.is_available).where(Seat.id == seat_id)) is False
+
+
+def test_cancel_restocks_the_seat(client, organizer, buyer):
+    event = create_event(client, organizer, seats=1)
+    seat_id = event_seats(client, event["id"])[0]["id"]
+    booking = client.post(f"{API}/bookings/", headers=buyer, json={"event_id": event["id"], "seat_id": seat_id}).json()
+
+    response = client.put(f"{API}/bookings/{booking['id']}/cancel", headers=buyer)
+    assert response.status_code == 200, response.text
+    assert response.json()["status"] == "cancelled"
+    assert event_seats(client, event["id"])[0]["is_available"]
+    assert client.put(f"{API}/bookings/{booking['id']}/cancel", headers=buyer).status_code == 400
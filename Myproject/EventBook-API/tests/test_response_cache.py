@@ -0,0 +1,73 @@
+import time
+
+import pytest
+
+from app.services.response_cache import CachedResponse, MemoryCacheBackend, ResponseCacheBackend
+from tests.conftest import API, create_event, event_seats
+
+
+def test_backend_interface_is_abstract():
+    with pytest.raises(TypeError):
+        ResponseCacheBackend()
+
+
+def rename(client, headers, full_name: str):
+    response = client.put(f"{API}/users/me", params={"full_name": full_name}, headers=headers)
+    assert response.status_code == 200, response.text
+
+
+def test_organizer_rename_refreshes_cached_event(client, organizer):
+    event = create_event(client, organizer)
+    url = f"{API}/events/{event['id']}"
+    client.get(url)
+    assert client.get(url).headers["X-Cache"] == "HIT"
+
+    rename(client, organizer, "Renamed Organizer")
+    response = client.get(url)
+    assert response.headers["X-Cache"] == "MISS"
+    assert response.json()["organizer"]["full_name"] == "Renamed Organizer"
+
+
+def test_reviewer_rename_refreshes_cached_reviews(client, organizer, buyer):
+    event = create_event(client, organizer, seats=1)
+    seat = event_seats(client, event["id"])[0]
+    booking = client.post(f"{API}/bookings/", headers=buyer, json={"event_id": event["id"], "seat_id": seat["id"]}).json()
+    client.post(f"{API}/bookings/verify-qr", headers=organizer, json={"qr_code": booking["qr_code"]})
+    review = client.post(f"{API}/reviews/", headers=buyer, json={"event_id": event["id"], "rating": 5})
+    assert review.status_code == 201, review.text
+    url = f"{API}/reviews/event/{event['id']}"
+    client.get(url)
+
+    rename(client, buyer, "Renamed Reviewer")
+    assert client.get(url).json()[0]["user"]["full_name"] == "Renamed Reviewer"
+
+
+def cached(body: bytes, *tags: str) -> CachedResponse:
+    return CachedResponse(
+        status_code=200, headers=[], body=body, gzipped=None, tags=tags, expires_at=time.monotonic() + 60
+    )
+
+
+def test_memory_backend_stays_bounded_across_many_invalidated_tags():
+    backend = MemoryCacheBackend(max_entries=100, max_bytes=1024 * 1024)
+    for seat_id in range(100_000):
+        backend.invalidate([f"seat:{seat_id}"])
+
+    assert len(backend._invalidated) <= 100
+    assert backend.set("fresh", cached(b"{}", "seat:1"), backend.versions(["seat:1"]))
+
+
+def test_memory_backend_skips_reads_that_raced_an_invalidation():
+    backend = MemoryCacheBackend(max_entries=2, max_bytes=1024 * 1024)
+    versions = backend.versions(["event:1"])
+    backend.invalidate(["event:1"])
+    assert not backend.set("raced", cached(b"{}", "event:1"), versions)
+
+    # Once the invalidation is forgotten, a read that began before it is still refused
+    versions = backend.versions(["event:2"])
+    backend.invalidate(["event:2"])
+    backend.invalidate(["event:3"])
+    backend.invalidate(["event:4"])
+    assert "event:2" not in backend._invalidated
+    assert not backend.set("raced", cached(b"{}", "event:2"), versions)
+    assert backend.set("fresh", cached(b"{}", "event:2"), backend.versions(["event:2"]))
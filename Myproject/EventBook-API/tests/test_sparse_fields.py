@@ -0,0 +1,55 @@
+import pytest
+
+from tests.conftest import API, create_event, event_seats
+
+
+@pytest.fixture
+def booked_event(client, organizer, buyer) -> dict:
+    """An event of organizer with two seats booked by buyer"""
+    event = create_event(client, organizer, seats=2)
+    for seat in event_seats(client, event["id"]):
+        response = client.post(f"{API}/bookings/", headers=buyer, json={"event_id": event["id"], "seat_id": seat["id"]})
+        assert response.status_code == 201, response.text
+    return event
+
+
+def bookings_query(statements) -> str:
+    """The page query of an event bookings request"""
+    return next(statement for statement in statements if statement.startswith("SELECT bookings."))
+
+
+@pytest.mark.parametrize("path", ["/events/", "/bookings/", "/seats/event/1"])
+def test_unknown_field_is_rejected(client, buyer, path):
+    response = client.get(f"{API}{path}", params={"fields": "id,nope"}, headers=buyer)
+    assert response.status_code == 422
+    assert "nope" in response.json()["detail"]
+
+
+def test_only_requested_fields_are_returned(client, organizer):
+    event = create_event(client, organizer)
+    response = client.get(f"{API}/events/", params={"fields": "id,title", "category_id": event["category_id"]})
+    assert response.json() == [{"id": event["id"], "title": event["title"]}]
+
+
+def test_requested_columns_only_are_loaded(client, organizer, booked_event, statements):
+    url = f"{API}/bookings/event/{booked_event['id']}/bookings"
+    statements.clear()
+    response = client.get(url, params={"fields": "id,status"}, headers=organizer)
+
+    assert [set(booking) for booking in response.json()] == [{"id", "status"}] * 2
+    query = bookings_query(statements)
+    assert "bookings.status" in query
+    assert "bookings.qr_code" not in query and "bookings.total_amount" not in query
+
+
+def test_unrequested_relationships_are_not_loaded(client, organizer, booked_event, statements):
+    url = f"{API}/bookings/event/{booked_event['id']}/bookings"
+    statements.clear()
+    client.get(url, params={"fields": "id,status"}, headers=organizer)
+    assert not any("JOIN seats" in statement or "FROM seats" in statement for statement in statements)
+
+    statements.clear()
+    response = client.get(url, params={"fields": "id,seat"}, headers=organizer)
+    assert all(booking["seat"]["row_number"] == "A" for booking in response.json())
+    assert "JOIN seats" in bookings_query(statements)
+    assert "JOIN users" not in bookings_query(statements)
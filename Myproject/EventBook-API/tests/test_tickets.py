@@ -0,0 +1,19 @@
+import pytest
+
+from app.services.tickets import read_ticket, sign_ticket
+from tests.conftest import API
+
+
+def test_signed_ticket_round_trips():
+    assert tuple(read_ticket(sign_ticket("BK123", 4, 56))) == ("BK123", 4, 56)
+
+
+@pytest.mark.parametrize("signature", ["x" * 22, "ünïcödé", "🎫"])
+def test_forged_signature_is_rejected(signature):
+    assert read_ticket(f"EB1.BK123-4-56.{signature}") is None
+
+
+def test_gate_rejects_non_ascii_signature(client, organizer):
+    response = client.post(f"{API}/bookings/verify-qr", headers=organizer, json={"qr_code": "EB1.BK123-4-56.ü"})
+    assert response.status_code == 200
+    assert response.json()["valid"] is False
@@ -0,0 +1,52 @@
+import pytest
+
+from app.services.admission import AdmissionStore
+from tests.conftest import API, create_event, event_seats
+
+
+def test_store_interface_is_abstract():
+    with pytest.raises(TypeError):
+        AdmissionStore()
+
+
+@pytest.fixture
+def gated_seat(client, organizer) -> dict:
+    """A seat of an event whose waiting room is open"""
+    event = create_event(client, organizer, seats=1)
+    response = client.put(f"{API}/waiting-room/{event['id']}", headers=organizer, json={"rate": 100, "burst": 10})
+    assert response.status_code == 200, response.text
+    yield event_seats(client, event["id"])[0]
+    client.delete(f"{API}/waiting-room/{event['id']}", headers=organizer)
+
+
+def admission_pass(client, buyer, event_id: int) -> str:
+    ticket = client.post(f"{API}/waiting-room/{event_id}/join", headers=buyer).json()["ticket"]
+    status = client.get(f"{API}/waiting-room/{event_id}/status", params={"ticket": ticket}).json()
+    assert status["admitted"], status
+    return status["admission_pass"]
+
+
+def test_hold_without_pass_is_turned_away_before_any_write(client, buyer, gated_seat, statements):
+    statements.clear()
+    response = client.post(f"{API}/seats/{gated_seat['id']}/reserve", headers=buyer)
+
+    assert response.status_code == 403
+    assert not any(statement.startswith("UPDATE seats") for statement in statements)
+
+
+def test_hold_with_pass_is_admitted(client, buyer, gated_seat):
+    headers = {**buyer, "X-Admission-Pass": admission_pass(client, buyer, gated_seat["event_id"])}
+    response = client.post(f"{API}/seats/{gated_seat['id']}/reserve", headers=headers)
+    assert response.status_code == 200, response.text
+
+
+def test_hold_of_unknown_seat_is_not_found(client, buyer):
+    assert client.post(f"{API}/seats/987654/reserve", headers=buyer).status_code == 404
+
+
+def test_admission_tokens_are_not_access_tokens(client, buyer, gated_seat):
+    event_id = gated_seat["event_id"]
+    ticket = client.post(f"{API}/waiting-room/{event_id}/join", headers=buyer).json()["ticket"]
+    for token in (ticket, admission_pass(client, buyer, event_id)):
+        response = client.get(f"{API}/users/me", headers={"Authorization": f"Bearer {token}"})
+        assert response.status_code == 401